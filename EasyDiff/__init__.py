@@ -1,6 +1,32 @@
 name = "EasyDiff"
-from .ad import *
-from .var import *
-from .rev_var import *
-import numpy as np
-from enum import Enum
\ No newline at end of file
+import importlib
+
+# public names and the submodule defining them; a submodule (and numpy) is only imported
+# the first time one of its names is used (PEP 562), so importing EasyDiff itself is cheap
+_LAZY = {
+    'AD': '.ad', 'AD_Mode': '.ad',
+    'Var': '.var',
+    'Rev_Var': '.rev_var',
+    'Scalar_Var': '.scalar_var',
+    'Tape': '.tape_var', 'Tape_Var': '.tape_var', 'Tape_Op': '.tape_var', 'Compiled_Tape': '.tape_var',
+    'Sparse_Der': '.sparse_der',
+    'Generated_Function': '.codegen', 'tape_source': '.codegen',
+    'Result_Cache': '.cache',
+    'Profiler': '.profiler',
+    'graph_stats': '.graph_stats', 'Graph_Monitor': '.graph_stats',
+    'Timeline': '.timeline',
+    'np': 'numpy',
+}
+
+__all__ = list(_LAZY)
+
+def __getattr__(attr):
+    if attr not in _LAZY:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, attr))
+    module = importlib.import_module(_LAZY[attr], __name__)
+    value = module if attr == 'np' else getattr(module, attr)
+    globals()[attr] = value # later lookups do not go through __getattr__
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,15 +1,43 @@
-import sys, os
+import os
+import copy
+import numbers
 from EasyDiff.var import Var
 from EasyDiff.rev_var import Rev_Var
+from EasyDiff.scalar_var import Scalar_Var
+from EasyDiff.tape_var import Tape, Tape_Var, Compiled_Tape
+from EasyDiff.sparse_der import Sparse_Der
+from EasyDiff.codegen import Generated_Function
+from EasyDiff.cache import Result_Cache
+from EasyDiff.timeline import NO_SPAN
 import numpy as np
-from enum import Enum
 
 class AD_Mode:
     FORWARD = 0
     REVERSE = 1
+    TAPE = 2 # reverse mode recorded on a flat array-backed Tape
+    AUTO = 3 # FORWARD or REVERSE, whichever is estimated to be cheaper for the function at hand
+
+# cost of one operation in units of a scalar forward mode operation, measured with benchmarks/bench_auto.py
+_FORWARD_WIDTH_COST = 1 / 3000 # every seed direction carried in der
+_REVERSE_TRACE_COST = 0.75 # recording the Rev_Var node
+_REVERSE_SWEEP_COST = 0.25 # visiting the node in one backward sweep
+_REVERSE_RECORD_COST = 0.85 # pruning and ordering the graph of a function returning a list of outputs
+# cost of one input of a reverse mode evaluation, in the same units
+_REVERSE_INPUT_COST = 1.0 # seeding the Rev_Var and collecting its gradient
+_REVERSE_INPUT_SWEEP_COST = 0.2 # reading its gradient after every sweep
+# operation count assumed for a function that is not traced
+_UNTRACED_OPS = 100
+
+# largest number of inputs evaluated on Scalar_Var in FORWARD mode, measured with benchmarks/bench_scalar.py
+_SCALAR_MAX_DIMEN = 8
+# cost of one operation on Scalar_Var in units of a scalar forward mode operation on Var, same benchmark
+_SCALAR_FORWARD_COST = 0.6
+
+# persistent worker pools of AD.jac_matrix_many, by number of workers
+_POOLS = {}
 
 class AD():
-    def __init__(self, vals, ders, mode = AD_Mode.FORWARD):
+    def __init__(self, vals, ders, mode = AD_Mode.FORWARD, sparse = False, chunk = None, trace = False, cache = None, timeline = None, dtype = np.float64, scalar = True):
         """
         init the AD class
         INPUT
@@ -17,7 +45,21 @@ class AD():
         self: an AD class
         vals: a list of initial value for a list of variables
         ders: a list of initial derivative for a list of variables
-        mode: the mode for auto-diff, ie, FORWARD or REVERSE
+        mode: the mode for auto-diff, ie, FORWARD, REVERSE, TAPE or AUTO (see select_mode)
+        sparse: in FORWARD mode, store der as a Sparse_Der that only keeps nonzero partials
+        chunk: in FORWARD mode, the default number of seed directions per pass (see auto_diff)
+        trace: in AUTO mode, count the operations of a function with one traced evaluation before choosing
+        cache: a Result_Cache, auto_diff and jac_matrix then return the cached result for a function 
+               (by identity) already differentiated at the same vals, ders and mode
+        timeline: a Timeline, auto_diff and jac_matrix then record a span for each of their phases
+                  (seed, evaluate or record, backward, assemble) that can be saved as Chrome trace-event JSON
+        dtype: the floating point type of the input values, the seeded ders and the returned Jacobians in FORWARD 
+               and REVERSE mode (np.float32 halves the memory traffic of large batched ders; TAPE mode stays float64)
+        scalar: in FORWARD mode, evaluate functions of at most 8 float64 inputs at a single point on Scalar_Var, 
+                which keeps der as a tuple of floats and uses the math module (not with sparse or a chunk narrower 
+                than the inputs); the result is returned as a Var, and a function that raises a math domain error 
+                or returns something else than a Scalar_Var or a constant is evaluated on Var instead, 
+                so it runs twice and its side effects happen twice. False always uses Var
         
         RETURNS
         =======
@@ -26,43 +68,194 @@ class AD():
         EXAMPLES
         =======
         >>> ad = AD(np.array([2, 2]), np.array([1, 1]), AD_Mode.FORWARD)
-        >>> print(vars(ad.vars[0]), vars(ad.vars[1]))
-        {'val': 2, 'der': array([1, 0])} {'val': 2, 'der': array([0, 1])}
+        >>> print(ad.vars[0].val, ad.vars[0].der, ad.vars[1].val, ad.vars[1].der)
+        2.0 [1. 0.] 2.0 [0. 1.]
         >>> ad = AD(np.array([2, 2]), np.array([1, 1]), AD_Mode.REVERSE)
-        >>> print(vars(ad.vars[0]), vars(ad.vars[1]))
-        {'value': 2, 'children': [], 'grad_value': None} {'value': 2, 'children': [], 'grad_value': None}
+        >>> print(ad.vars[0].value, ad.vars[0].children, ad.vars[0].grad_value)
+        2.0 [] None
+        >>> ad = AD(np.array([2, 2]), np.array([1, 1]), AD_Mode.FORWARD, sparse=True)
+        >>> print(ad.vars[0].der.entries == {0: 1}, ad.vars[1].der.toarray())
+        True [0. 1.]
+        >>> ad = AD(np.array([2, 2]), np.array([0.5, 1]), AD_Mode.FORWARD, dtype=np.float32)
+        >>> print(ad.vars[0].der, ad.vars[0].der.dtype, ad.auto_diff(lambda x, y: x * y).der.dtype)
+        [0.5 0. ] float32 float32
         """
+        self.auto = mode == AD_Mode.AUTO
+        self.trace = trace
+        self.selection = None # AUTO mode: (selected mode, reason)
         self.mode = mode
+        self.vals = vals
+        self.ders = ders
+        self.sparse = sparse
+        self.chunk = chunk
+        self.cache = cache
+        self.timeline = timeline
+        self.dtype = np.dtype(dtype)
+        self.scalar = scalar
+        self.scalar_vars = None # FORWARD mode inputs of the scalar fast path, when it applies
+        if self.auto:
+            self.vars = [] # built once a mode is selected for a function
+        else:
+            self._init_vars()
+
+    def _init_vars(self):
         if self.mode == AD_Mode.FORWARD:
-            assert(len(vals) == len(ders))
+            assert(len(self.vals) == len(self.ders))
 
-            self.vars = []
-            dimen = len(vals)
-            cnt = 0
-            for val, der in zip(vals, ders):
-                der_list = np.array([0 for i in range(dimen)])
-                der_list[cnt] = der
-                self.vars.append(Var(val, der_list))
-                cnt += 1
-        else:
-            self.vals = vals
+            dimen = len(self.vals)
+            if self.sparse:
+                self.vars = []
+                cnt = 0
+                for val, der in zip(self.vals, self.ders):
+                    # O(1) per input instead of O(n)
+                    self.vars.append(Var(self._cast(val), Sparse_Der({cnt: self.dtype.type(der)}, dimen, self.dtype)))
+                    cnt += 1
+            else:
+                # with a chunk size only the first block of directions is seeded up front
+                self.vars = self._seed(0, dimen if self.chunk is None else min(self.chunk, dimen))
+            if self._scalar_inputs():
+                self.scalar_vars = [Scalar_Var(float(x.val), tuple(x.der.tolist())) for x in self._seed(0, dimen)]
+        elif self.mode == AD_Mode.REVERSE:
             self.vars = []
             for val in self.vals:
-                self.vars.append(Rev_Var(val))
+                self.vars.append(Rev_Var(self._cast(val)))
+        else:
+            self.tape = Tape()
+            self.vars = [self.tape.variable(val) for val in self.vals]
             
     def clear(self):
         if self.mode == AD_Mode.REVERSE:
             self.vars = []
             for val in self.vals:
-                self.vars.append(Rev_Var(val))
+                self.vars.append(Rev_Var(self._cast(val)))
+        elif self.mode == AD_Mode.TAPE:
+            self.tape.reset() # reuse the allocated arrays
+            self.vars = [self.tape.variable(val) for val in self.vals]
+
+    def _cast(self, val):
+        """ an input value (a number or a batch of values) as self.dtype """
+        return np.asarray(val, dtype=self.dtype)[()]
 
-    def auto_diff(self, func):
+    def _seed(self, start, stop):
+        """ forward mode input variables whose der covers the seed directions start, ..., stop - 1 """
+        xs = []
+        cnt = 0
+        for val, der in zip(self.vals, self.ders):
+            der_list = np.zeros(stop - start, dtype=self.dtype)
+            if start <= cnt < stop:
+                der_list[cnt - start] = der
+            xs.append(Var(self._cast(val), der_list))
+            cnt += 1
+        return xs
+
+    def _scalar_inputs(self):
+        """ whether FORWARD mode can evaluate on Scalar_Var: a few scalar float64 inputs and dense ders """
+        return (self.scalar and not self.sparse and len(self.vals) <= _SCALAR_MAX_DIMEN and self.dtype == np.float64
+                and all(np.ndim(val) == 0 for val in self.vals))
+
+    def _use_scalar(self, chunk):
+        """ whether FORWARD mode evaluates on self.scalar_vars, a chunk narrower than the inputs keeps Var """
+        return self.scalar_vars is not None and (chunk is None or chunk >= len(self.vals))
+
+    def _scalar_eval(self, func):
+        """ func evaluated on self.scalar_vars, None if it raised a math domain error """
+        try:
+            return func(*self.scalar_vars)
+        except (ArithmeticError, ValueError): # the math module raises where numpy returns inf or nan with a warning
+            return None
+
+    @staticmethod
+    def _is_scalar(out):
+        """ whether out can be returned as a Var, a constant or a batch from a constant array operand can not """
+        return isinstance(out, Scalar_Var) and isinstance(out.val, float)
+
+    @staticmethod
+    def _is_constant(out):
+        """ whether out is a constant output, the same on Scalar_Var and on Var """
+        return isinstance(out, numbers.Real)
+
+    def _span(self, name, **args):
+        """ a span of self.timeline, or a span recording nothing without a timeline """
+        if self.timeline is None:
+            return NO_SPAN
+        return self.timeline.span(name, **args)
+
+    def _block(self, start, stop):
+        """ seeds for one block of directions, reusing the ones built at construction when they match """
+        if start == 0 and self.vars and len(self.vars[0].der) == stop:
+            return self.vars
+        return self._seed(start, stop)
+
+    def select_mode(self, funcs, chunk = None, batch = False):
+        """
+        AUTO mode: estimate the cost of FORWARD and REVERSE mode for funcs and switch to the cheaper one.
+        Forward mode costs one pass per function, with every operation carrying a der of width n 
+        (less on Scalar_Var, for up to _SCALAR_MAX_DIMEN inputs); 
+        reverse mode records every operation once and sweeps it once per output, 
+        and also pays for seeding every input and collecting its gradient, so it only wins for 
+        functions with many operations of many inputs.
+        The operation count comes from one traced evaluation if the AD object was created with trace=True, 
+        otherwise every function is assumed to have _UNTRACED_OPS operations.
+
+        INPUT
+        =======
+        funcs: a list of functions with one output each, or one function returning a list of outputs
+        chunk: the chunk size of the call (defaults to self.chunk), a narrower one keeps forward mode on Var
+        batch: whether the call evaluates a batch of points (jac_matrix_batch), which runs on Var
+        
+        RETURNS
+        =======
+        the selected mode; self.selection holds (mode, reason)
+        
+        EXAMPLES
+        =======
+        >>> ad = AD(np.array([1.0, 2.0]), np.array([1, 1]), AD_Mode.AUTO)
+        >>> f = lambda x, y: [np.sin(x) * y, x + y, x * y, x / y]
+        >>> ad.select_mode(f) == AD_Mode.FORWARD
+        True
+        >>> print(ad.selection[1])
+        n=2 inputs, m=4 outputs, operation count not traced: forward ~ 60.00, reverse ~ 263.60
+        """
+        dimen = len(self.vals)
+        chunk = chunk or self.chunk
+        scalar = not batch and self._scalar_inputs() and (chunk is None or chunk >= dimen) # see _use_scalar
+        outputs, total, forward, reverse = 0, 0, 0, 0
+        for func in ([funcs] if callable(funcs) else funcs):
+            if self.trace:
+                xs = [Rev_Var(self._cast(val)) for val in self.vals]
+                z = func(*xs)
+                ops = len(Rev_Var.topological_sort(xs)) - dimen
+            else: # only the number of outputs is needed
+                z = func(*[self._cast(val) for val in self.vals]) if callable(funcs) else None
+                ops = _UNTRACED_OPS
+            m = len(z) if isinstance(z, (list, tuple)) else 1
+            outputs += m
+            total += ops
+            forward += ops * (_SCALAR_FORWARD_COST if scalar else 1 + dimen * _FORWARD_WIDTH_COST)
+            reverse += ops * (_REVERSE_TRACE_COST + m * _REVERSE_SWEEP_COST)
+            reverse += dimen * (_REVERSE_INPUT_COST + m * _REVERSE_INPUT_SWEEP_COST)
+            if callable(funcs): # recorded once by _jac_matrix_recorded, auto_diff passes a list
+                reverse += ops * _REVERSE_RECORD_COST
+
+        mode = AD_Mode.FORWARD if forward <= reverse else AD_Mode.REVERSE
+        counted = '{} traced operations'.format(total) if self.trace else 'operation count not traced'
+        reason = 'n={} inputs, m={} outputs, {}: forward ~ {:.2f}, reverse ~ {:.2f}'.format(
+            dimen, outputs, counted, forward, reverse)
+        if mode != self.mode or not self.vars:
+            self.mode = mode
+            self._init_vars()
+        self.selection = (mode, reason)
+        return mode
+
+    def auto_diff(self, func, chunk = None):
         """
         Passing a function to a AD object, and return the final Var object with val and der.
 
         INPUT
         =======
-        a function
+        func: a function
+        chunk: FORWARD mode only, evaluate func ceil(n / chunk) times with chunk seed directions each,
+               so every Var carries a der of width chunk instead of n (defaults to the chunk given to AD)
         
         RETURNS
         =======
@@ -86,24 +279,205 @@ class AD():
         >>> ad = AD(np.array([2]), np.array([1]), AD_Mode.REVERSE)
         >>> print("Rev_Var.log(x) ** 2: {}".format(vars(ad.auto_diff(f1))))
         Rev_Var.log(x) ** 2: {'val': 0.4804530139182014, 'der': array([0.69314718])}
+        >>> f1 = lambda x, y: Tape_Var.log(x) ** Tape_Var.sin(y)
+        >>> ad = AD(np.array([2, 2]), np.array([1, 1]), AD_Mode.TAPE)
+        >>> print("Tape_Var.log(x) ** Tape_Var.sin(y): {}".format(vars(ad.auto_diff(f1))))
+        Tape_Var.log(x) ** Tape_Var.sin(y): {'val': 0.7165772257590739, 'der': array([0.47001694, 0.10929465])}
         """
+        with self._span('auto_diff', n=len(self.vals)):
+            return self._cached('auto_diff', func, lambda: self._auto_diff(func, chunk))
+
+    def _cached(self, name, funcs, compute):
+        """ compute() through self.cache, keyed on the functions (by identity), the mode, the input values 
+        and the dtype of the results """
+        if self.cache is None:
+            return compute()
+        key = Result_Cache.key(name, funcs, AD_Mode.AUTO if self.auto else self.mode, self.vals, self.ders, self.sparse, 
+                               np.dtype(self.dtype).str)
+        with self._span('cache lookup'):
+            res = self.cache.get(key)
+        if res is None:
+            res = compute()
+            self.cache.put(key, res)
+        return copy.deepcopy(res) # the caller may modify the result in place
+
+    def _auto_diff(self, func, chunk = None):
+        """ auto_diff without the cache """
+        if self.auto:
+            with self._span('select_mode'):
+                self.select_mode([func], chunk)
+        return self._diff(func, chunk)
+
+    def _diff(self, func, chunk = None):
+        """ auto_diff in the current mode """
         if self.mode == AD_Mode.FORWARD:
-            return func(*self.vars)
+            chunk = chunk or self.chunk
+            if self._use_scalar(chunk):
+                with self._span('evaluate'):
+                    z = self._scalar_eval(func)
+                if self._is_scalar(z):
+                    with self._span('assemble'):
+                        return Var(np.float64(z.val), np.array(z.der, dtype=self.dtype))
+                if self._is_constant(z): # returned unchanged like on Var
+                    return z
+            if chunk is None or self.sparse:
+                with self._span('evaluate'):
+                    return func(*self.vars)
+            dimen = len(self.vals)
+            blocks = []
+            for start in range(0, dimen, chunk):
+                with self._span('seed', start=start):
+                    xs = self._block(start, min(start + chunk, dimen))
+                with self._span('evaluate', start=start):
+                    blocks.append(func(*xs))
+            if not isinstance(blocks[0], Var): # a constant, returned unchanged like without chunks
+                return blocks[0]
+            with self._span('assemble'):
+                return Var(blocks[0].val, np.concatenate([z.der for z in blocks]))
+        elif self.mode == AD_Mode.TAPE:
+            with self._span('seed'):
+                self.clear()
+            with self._span('record'):
+                z = func(*self.vars)
+            with self._span('backward'):
+                adjoint = self.tape.gradient(z)
+            with self._span('assemble'):
+                return Var(z.value, adjoint[[x.index for x in self.vars]])
         else:
-            self.clear()
-            z = func(*self.vars)
-            z.grad_value = 1.0
-            res = list(map(lambda x: x.grad(), self.vars))
-            return Var(z.value, np.array(res)) # provide a unify interface
+            with self._span('seed'):
+                self.clear()
+            with self._span('record'):
+                z = func(*self.vars)
+            with self._span('backward'):
+                z.grad_value = 1.0
+                Rev_Var.backward(self.vars) # one sweep fills in the gradients of all inputs
+            with self._span('assemble'):
+                res = [x.grad_value for x in self.vars]
+                return Var(z.value, np.array(res, dtype=self.dtype)) # provide a unify interface
+
+    @staticmethod
+    def jvp(func, vals, direction):
+        """
+        Jacobian-vector product in one forward pass: every input carries a single tangent 
+        (its entry of direction) instead of a full der vector, so each operation does scalar derivative work.
+
+        INPUT
+        =======
+        func: a function of n inputs, returning a Var or a list of m Vars
+        vals: a list of n input values
+        direction: a vector v of length n, or an array of shape (k, n) with one direction per row
+        
+        RETURNS
+        =======
+        value: value of func at vals (an array of shape (m,) for a list of outputs)
+        tangent: the directional derivative J v, with shape (), (k,), (m,) or (m, k)
+        
+        EXAMPLES
+        =======
+        >>> f1 = lambda x, y: Var.log(x) ** Var.sin(y)
+        >>> value, tangent = AD.jvp(f1, [2, 2], [1, 0])
+        >>> print(value, tangent)
+        0.7165772257590739 0.4700169356371355
+        >>> value, tangent = AD.jvp(f1, [2, 2], np.array([[1, 0], [0, 1], [1, 1]]))
+        >>> print(tangent)
+        [0.47001694 0.10929465 0.57931158]
+        >>> f2 = lambda x, y: [x * y, x + y]
+        >>> print(AD.jvp(f2, [2, 3], [1, 1]))
+        (array([6, 5]), array([5, 2]))
+        """
+        direction = np.asarray(direction)
+        # a 1-D direction gives every input a scalar tangent, a (k, n) one a tangent vector of length k
+        xs = [Var(val, direction[..., cnt]) for cnt, val in enumerate(vals)]
+        z = func(*xs)
+        if isinstance(z, (list, tuple)):
+            return np.array([out.val for out in z]), np.array([out.der for out in z])
+        return z.val, z.der
 
-    def jac_matrix(self, funcs):
-        pass
+    def compile(self, func, optimize = False):
+        """
+        Record func once on a Tape and return a Compiled_Tape that replays it at new input values, 
+        without calling func or allocating any nodes again.
+
+        INPUT
+        =======
+        func: a function written with operators and Tape_Var elementary functions;
+              it is traced at self.vals, so branches that depend on the input values are frozen
+        optimize: run Tape.optimize on the recorded tape first (the counts of removed rows are kept in .stats)
+        
+        RETURNS
+        =======
+        a Compiled_Tape, calling it with a list of input values returns the Var object with val and der
+        
+        EXAMPLES
+        =======
+        >>> f1 = lambda x, y: Tape_Var.log(x) ** Tape_Var.sin(y)
+        >>> ad = AD(np.array([2, 2]), np.array([1, 1]), AD_Mode.TAPE)
+        >>> f = ad.compile(f1)
+        >>> res = f([2, 2])
+        >>> print(res.val, res.der)
+        0.7165772257590739 [0.47001694 0.10929465]
+        >>> res = f([4.12, 5.13])
+        >>> print(res.val, res.der)
+        0.7277131447112022 [-0.11403015  0.10263124]
+        >>> f2 = lambda x, y: Tape_Var.sin(y) * x + Tape_Var.sin(y) * 1
+        >>> print(ad.compile(f2, optimize=True).stats['cse'])
+        1
+        """
+        tape = Tape()
+        xs = [tape.variable(val) for val in self.vals]
+        z = func(*xs)
+        if not optimize:
+            return Compiled_Tape(tape, xs, z)
+        tape, xs, z, stats = tape.optimize(xs, z)
+        compiled = Compiled_Tape(tape, xs, z)
+        compiled.stats = stats
+        return compiled
+
+    def generate(self, func, mode = 'reverse', optimize = True):
+        """
+        Record func once on a Tape and turn it into straight-line Python/NumPy source computing 
+        the value and the gradient, compiled with exec (and cached by source), 
+        so evaluating it needs no Var, Rev_Var or Tape_Var objects.
+
+        INPUT
+        =======
+        func: a function written with operators and Tape_Var elementary functions;
+              it is traced at self.vals, so branches that depend on the input values are frozen
+        mode: 'reverse' for an adjoint sweep, 'forward' for one tangent per input
+        optimize: run Tape.optimize on the recorded tape first
+        
+        RETURNS
+        =======
+        a Generated_Function, calling it with a list of input values (or a 2-D array of points) 
+        returns the Var object with val and der; its source is in .source
+        
+        EXAMPLES
+        =======
+        >>> f1 = lambda x, y: Tape_Var.log(x) ** Tape_Var.sin(y)
+        >>> ad = AD(np.array([2, 2]), np.array([1, 1]), AD_Mode.TAPE)
+        >>> f = ad.generate(f1)
+        >>> res = f([4.12, 5.13])
+        >>> print(res.val, res.der)
+        0.7277131447112022 [-0.11403015  0.10263124]
+        """
+        tape = Tape()
+        xs = [tape.variable(val) for val in self.vals]
+        z = func(*xs)
+        if optimize:
+            tape, xs, z, _ = tape.optimize(xs, z)
+        return Generated_Function(tape, xs, z, mode)
+
+    def jac_matrix(self, funcs, chunk = None):
         """
         Passing a list of functions to a AD object, and return the Jacobian Matrix.
 
         INPUT
         =======
-        a list of functions
+        funcs: a list of functions, or one function returning a list of outputs; in FORWARD mode that function 
+               is evaluated once (once per chunk), in REVERSE and TAPE mode it is recorded once and swept backward 
+               once per output
+        chunk: FORWARD mode only, build the Jacobian in blocks of chunk columns, 
+               evaluating every function ceil(n / chunk) times (defaults to the chunk given to AD)
         
         RETURNS
         =======
@@ -113,28 +487,299 @@ class AD():
         =======
         >>> f1 = lambda x, y: Var.log(x) ** Var.sin(y)
         >>> f2 = lambda x, y: Var.sqrt(x) / y
-        >>> ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_mode.FORWARD)
-        >>> print("jac_matrix: \n{}".format(ad.jac_matrix([f1, f2])))
-        jac_matrix: 
+        >>> ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_Mode.FORWARD)
+        >>> print(ad.jac_matrix([f1, f2]))
+        [[-0.11403015  0.10263124]
+         [ 0.048018   -0.07712832]]
+        >>> print(ad.jac_matrix([f1, f2], chunk=1))
+        [[-0.11403015  0.10263124]
+         [ 0.048018   -0.07712832]]
+        >>> print(ad.jac_matrix(lambda x, y: [f1(x, y), f2(x, y)]))
         [[-0.11403015  0.10263124]
          [ 0.048018   -0.07712832]]
         >>> f1 = lambda x, y: Rev_Var.log(x) ** Rev_Var.sin(y)
         >>> f2 = lambda x, y: Rev_Var.sqrt(x) / y
         >>> ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_Mode.REVERSE)
-        >>> print("jac_matrix: \n{}".format(ad.jac_matrix([f1, f2])))
-        jac_matrix: 
+        >>> print(ad.jac_matrix([f1, f2]))
+        [[-0.11403015  0.10263124]
+         [ 0.048018   -0.07712832]]
+        >>> print(ad.jac_matrix(lambda x, y: [f1(x, y), f2(x, y)]))
         [[-0.11403015  0.10263124]
-        [ 0.048018   -0.07712832]]
+         [ 0.048018   -0.07712832]]
         """
-        res = np.zeros(shape=(len(funcs), len(self.vars)))
+        with self._span('jac_matrix', n=len(self.vals), functions=1 if callable(funcs) else len(funcs)):
+            return self._cached('jac_matrix', funcs, lambda: self._jac_matrix(funcs, chunk))
+
+    def _jac_matrix(self, funcs, chunk = None):
+        """ jac_matrix without the cache """
+        if self.auto:
+            with self._span('select_mode'):
+                self.select_mode(funcs, chunk)
+        chunk = chunk or self.chunk
+        if callable(funcs):
+            if self.mode == AD_Mode.FORWARD:
+                return self._jac_matrix_single(funcs, chunk)
+            return self._jac_matrix_recorded(funcs)
+        res = np.zeros(shape=(len(funcs), len(self.vars)), dtype=self.dtype)
+        if self.mode == AD_Mode.FORWARD and chunk is not None and not self.sparse and not self._use_scalar(chunk):
+            # one block of Jacobian columns per pass, the seeds are shared by all functions
+            dimen = len(self.vals)
+            for start in range(0, dimen, chunk):
+                stop = min(start + chunk, dimen)
+                with self._span('seed', start=start):
+                    xs = self._block(start, stop)
+                for i, func in enumerate(funcs):
+                    with self._span('evaluate', function=i, start=start):
+                        z = func(*xs)
+                    if isinstance(z, Var): # a constant keeps its row of zeros
+                        res[i, start:stop] = z.der
+            return res
         for i, func in enumerate(funcs):
-            if self.mode == AD_Mode.REVERSE:
+            with self._span('function', function=i):
                 self.clear()
-            res_der = self.auto_diff(func).der
-            for j in range(len(self.vars)):
-                res[i][j] = res_der[j]
+                z = self._diff(func)
+                if isinstance(z, Var): # a constant keeps its row of zeros
+                    res[i] = np.asarray(z.der)
         return res
 
+    def _jac_matrix_single(self, func, chunk):
+        """ forward mode Jacobian of one vector-valued function: one evaluation per block of seeds """
+        if self._use_scalar(chunk):
+            with self._span('evaluate'):
+                outputs = self._scalar_eval(func)
+            if isinstance(outputs, (list, tuple)) and all(self._is_scalar(out) or self._is_constant(out) 
+                                                          for out in outputs):
+                with self._span('assemble'):
+                    return np.array([np.zeros(len(self.vals)) if self._is_constant(out) else out.der 
+                                     for out in outputs], dtype=self.dtype)
+        if chunk is None or self.sparse:
+            with self._span('evaluate'):
+                outputs = func(*self.vars)
+            with self._span('assemble'):
+                return self._jac_rows(outputs, len(self.vals))
+        dimen = len(self.vals)
+        blocks = []
+        for start in range(0, dimen, chunk):
+            with self._span('seed', start=start):
+                xs = self._block(start, min(start + chunk, dimen))
+            with self._span('evaluate', start=start):
+                outputs = func(*xs)
+            with self._span('assemble', start=start):
+                blocks.append(self._jac_rows(outputs, len(xs[0].der)))
+        return np.concatenate(blocks, axis=1)
+
+    def _jac_rows(self, outputs, width):
+        """ the der of every forward mode output as a row of width entries, zeros for a constant output """
+        return np.array([np.asarray(out.der) if isinstance(out, Var) else np.zeros(width) for out in outputs], 
+                        dtype=self.dtype)
+
+    def _jac_matrix_recorded(self, func):
+        """ reverse mode Jacobian of one vector-valued function: record it once, then one backward sweep per output """
+        with self._span('seed'):
+            self.clear()
+        with self._span('record'):
+            outputs = func(*self.vars)
+        res = np.zeros(shape=(len(outputs), len(self.vars)), dtype=self.dtype)
+        if self.mode == AD_Mode.TAPE:
+            indices = [x.index for x in self.vars]
+            for i, out in enumerate(outputs):
+                if not isinstance(out, Tape_Var): # a constant output keeps its row of zeros
+                    continue
+                with self._span('backward', output=i):
+                    res[i] = self.tape.gradient(out)[indices]
+            return res
+        with self._span('prune'):
+            Rev_Var.prune(self.vars, outputs) # every sweep below then skips the nodes no output depends on
+            order = Rev_Var.topological_sort(self.vars)
+        for i, out in enumerate(outputs):
+            with self._span('backward', output=i):
+                Rev_Var.sweep(order, {id(out): 1.0})
+                res[i] = [x.grad_value for x in self.vars]
+        return res
+
+    @staticmethod
+    def vjp(func, vals, cotangent):
+        """
+        Vector-Jacobian product in reverse mode: func is recorded once and the cotangents of all outputs 
+        are swept back through the same graph together.
+
+        INPUT
+        =======
+        func: a function of n inputs written with Rev_Var, returning a Rev_Var or a list of m Rev_Vars
+        vals: a list of n input values
+        cotangent: a vector u of length m (a number for a single output), 
+                   or an array of shape (k, m) with one cotangent per row
+        
+        RETURNS
+        =======
+        value: value of func at vals (an array of shape (m,) for a list of outputs)
+        product: u^T J, with shape (n,), or (k, n) for k cotangents (still one backward sweep)
+        
+        EXAMPLES
+        =======
+        >>> f = lambda x, y: [Rev_Var.log(x) ** Rev_Var.sin(y), Rev_Var.sqrt(x) / y]
+        >>> value, product = AD.vjp(f, [4.12, 5.13], [1, 0])
+        >>> print(product)
+        [-0.11403015  0.10263124]
+        >>> value, product = AD.vjp(f, [4.12, 5.13], np.eye(2))
+        >>> print(product)
+        [[-0.11403015  0.10263124]
+         [ 0.048018   -0.07712832]]
+        """
+        xs = [Rev_Var(val) for val in vals]
+        z = func(*xs)
+        outputs = z if isinstance(z, (list, tuple)) else [z]
+        cotangent = np.asarray(cotangent, dtype=float)
+        # a (k, m) cotangent seeds every output with a length-k adjoint, so one sweep gives all k products
+        columns = cotangent.T if cotangent.ndim == 2 else cotangent.reshape(len(outputs))
+        seeds = {}
+        for out, seed in zip(outputs, columns):
+            seeds[id(out)] = seeds.get(id(out), 0) + seed
+        Rev_Var.sweep(Rev_Var.topological_sort(xs), seeds)
+        product = [np.broadcast_to(x.grad_value, columns.shape[1:]) for x in xs]
+        if cotangent.ndim == 2:
+            product = np.stack(product, axis=-1)
+        value = np.array([out.value for out in outputs]) if isinstance(z, (list, tuple)) else z.value
+        return value, np.array(product)
+
+    def jac_matrix_batch(self, funcs, points):
+        """
+        Passing a list of functions and a 2-D array of evaluation points to a AD object, 
+        and return the values and Jacobian matrices at every point from one vectorized pass per function.
+
+        INPUT
+        =======
+        funcs: a list of functions
+        points: an array of shape (batch, n), one row of input values per evaluation point
+        
+        RETURNS
+        =======
+        values: an array of shape (batch, m) 
+        jacobians: an array of shape (batch, m, n)
+
+        EXAMPLES
+        =======
+        >>> f1 = lambda x, y: Var.log(x) ** Var.sin(y)
+        >>> f2 = lambda x, y: Var.sqrt(x) / y
+        >>> ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_Mode.FORWARD)
+        >>> values, jacobians = ad.jac_matrix_batch([f1, f2], np.array([[4.12, 5.13], [2, 2]]))
+        >>> print(jacobians.round(8))
+        [[[-0.11403015  0.10263124]
+          [ 0.048018   -0.07712832]]
+        <BLANKLINE>
+         [[ 0.47001694  0.10929465]
+          [ 0.1767767  -0.35355339]]]
+        >>> f1 = lambda x, y: Rev_Var.log(x) ** Rev_Var.sin(y)
+        >>> f2 = lambda x, y: Rev_Var.sqrt(x) / y
+        >>> ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_Mode.REVERSE)
+        >>> values, jacobians = ad.jac_matrix_batch([f1, f2], np.array([[4.12, 5.13], [2, 2]]))
+        >>> print(jacobians.round(8))
+        [[[-0.11403015  0.10263124]
+          [ 0.048018   -0.07712832]]
+        <BLANKLINE>
+         [[ 0.47001694  0.10929465]
+          [ 0.1767767  -0.35355339]]]
+        """
+        if self.auto:
+            self.select_mode(funcs, batch=True)
+        points = np.asarray(points, dtype=self.dtype)
+        batch, dimen = points.shape
+        assert(dimen == len(self.vals))
+
+        if self.mode == AD_Mode.FORWARD:
+            # every variable carries a (batch, n) der, seeded in its own column
+            xs = []
+            for cnt in range(dimen):
+                der = np.zeros((batch, dimen), dtype=self.dtype)
+                der[:, cnt] = self.ders[cnt]
+                xs.append(Var(points[:, cnt], der))
+
+        values = np.zeros((batch, len(funcs)), dtype=self.dtype)
+        jacobians = np.zeros((batch, len(funcs), dimen), dtype=self.dtype)
+        for i, func in enumerate(funcs):
+            if self.mode == AD_Mode.FORWARD:
+                z = func(*xs)
+                values[:, i] = z.val
+                jacobians[:, i, :] = z.der
+            elif self.mode == AD_Mode.REVERSE:
+                # nodes hold (batch,) values and weights, so one sweep gives every per-sample gradient
+                xs = [Rev_Var(points[:, cnt]) for cnt in range(dimen)]
+                z = func(*xs)
+                z.grad_value = 1.0
+                Rev_Var.backward(xs)
+                values[:, i] = z.value
+                for j, x in enumerate(xs):
+                    jacobians[:, i, j] = x.grad_value
+            else:
+                z = self.compile(func)(points)
+                values[:, i] = z.val
+                jacobians[:, i, :] = z.der
+        return values, jacobians
+
+    def jac_matrix_many(self, funcs, points, workers = None, batched = False):
+        """
+        Passing a list of functions and a 2-D array of evaluation points to a AD object, 
+        and return the Jacobian matrices at every point, computed in parallel by a pool of worker processes.
+        The points are split into shards, and every worker receives only the functions (pickled by reference) 
+        and its slice of points; the pool is kept alive for later calls with the same number of workers.
+
+        INPUT
+        =======
+        funcs: a list of functions, or one function returning a list of outputs, 
+               defined at the top level of a module so that the workers can import them
+        points: an array of shape (batch, n), one row of input values per evaluation point
+        workers: the number of worker processes (defaults to the number of CPUs), 
+                 with 1 the points are evaluated in this process
+        batched: evaluate every shard with one call to jac_matrix_batch instead of one jac_matrix per point 
+                 (funcs must then be a list of functions that work on a batch of values)
+        
+        RETURNS
+        =======
+        jacobians: an array of shape (batch, m, n), (0, m, n) for no points
+
+        EXAMPLES
+        =======
+        >>> ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_Mode.FORWARD)
+        >>> f1 = lambda x, y: Var.log(x) ** Var.sin(y)
+        >>> f2 = lambda x, y: Var.sqrt(x) / y
+        >>> jacobians = ad.jac_matrix_many([f1, f2], np.array([[4.12, 5.13], [2, 2], [3, 1.5]]), workers=1)
+        >>> print(jacobians.shape)
+        (3, 2, 2)
+        >>> print(jacobians[0])
+        [[-0.11403015  0.10263124]
+         [ 0.048018   -0.07712832]]
+        """
+        points = np.asarray(points)
+        if len(points) == 0: # nothing to split between the workers
+            outputs = len(funcs(*[self._cast(val) for val in self.vals])) if callable(funcs) else len(funcs)
+            return np.zeros((0, outputs, len(self.vals)), dtype=self.dtype)
+        mode = AD_Mode.AUTO if self.auto else self.mode
+        options = {'sparse': self.sparse, 'chunk': self.chunk, 'trace': self.trace, 'dtype': self.dtype, 'scalar': self.scalar}
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            return _jac_shard(mode, self.ders, options, funcs, points, batched)
+        if workers not in _POOLS:
+            # imported here, multiprocessing is slow to import and most programs never start a pool
+            from concurrent.futures import ProcessPoolExecutor
+            _POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+        # a few shards per worker keeps every worker busy when some points are slower than others
+        shards = np.array_split(points, min(len(points), 4 * workers))
+        args = [(mode, self.ders, options, funcs, shard, batched) for shard in shards]
+        return np.concatenate(list(_POOLS[workers].map(_jac_shard, *zip(*args))))
+
+    @staticmethod
+    def shutdown_workers():
+        """ stop the worker pools started by jac_matrix_many """
+        for pool in _POOLS.values():
+            pool.shutdown()
+        _POOLS.clear()
+
+def _jac_shard(mode, ders, options, funcs, points, batched):
+    """ Jacobian matrices at every row of points, run by the workers of AD.jac_matrix_many """
+    if batched:
+        return AD(points[0], ders, mode, **options).jac_matrix_batch(funcs, points)[1]
+    return np.array([AD(point, ders, mode, **options).jac_matrix(funcs) for point in points])
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod(verbose=True)
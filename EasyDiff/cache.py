@@ -0,0 +1,150 @@
+import os
+import types
+import pickle
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+def _global_names(code):
+    """ names a code object and the functions defined in it may read as globals """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+def _stable(part, seen=None):
+    """ a description of one key part that is the same in every run of the program: 
+    arrays by a hash of their bytes, functions by their bytecode, constants, closure values 
+    and the globals they read (helper functions are described the same way, recursively) """
+    seen = set() if seen is None else seen
+    if isinstance(part, np.ndarray): # repr shortens large arrays
+        part = np.ascontiguousarray(part)
+        return 'ndarray:{}:{}:{}'.format(part.dtype.str, part.shape, hashlib.sha256(part.tobytes()).hexdigest())
+    if isinstance(part, types.ModuleType):
+        return 'module:' + part.__name__
+    if isinstance(part, types.CodeType): # repr holds the address of nested functions
+        consts = ','.join(_stable(c, seen) for c in part.co_consts)
+        return '{}:({})'.format(part.co_code.hex(), consts)
+    if callable(part):
+        code = getattr(part, '__code__', None)
+        if code is None: # a builtin or numpy function
+            return repr(part)
+        name = '{}.{}'.format(part.__module__, part.__qualname__)
+        if id(part) in seen: # a recursive function
+            return name
+        seen.add(id(part))
+        closure = ','.join(_stable(cell.cell_contents, seen) for cell in (part.__closure__ or ()))
+        scope = part.__globals__
+        reads = ','.join('{}={}'.format(n, _stable(scope[n], seen)) for n in sorted(_global_names(code)) if n in scope)
+        bound = _stable(part.__self__, seen) if hasattr(part, '__self__') else ''
+        return '{}:{}:({}):({}):{}'.format(name, _stable(code, seen), closure, reads, bound)
+    if isinstance(part, (tuple, list)):
+        return '(' + ','.join(_stable(p, seen) for p in part) + ')'
+    return repr(part)
+
+def _nbytes(result):
+    """ approximate memory taken by a cached result """
+    try: # a Var
+        return np.asarray(result.val).nbytes + np.asarray(result.der).nbytes
+    except AttributeError: # an array
+        return np.asarray(result).nbytes
+
+class Result_Cache():
+    '''
+    This class defines an LRU cache of differentiation results, with a memory budget and an optional on-disk tier
+    '''
+    def __init__(self, budget=64 * 2 ** 20, path=None):
+        """ constructor for Result_Cache class
+
+        INPUT
+        =======
+        budget: the number of bytes the cached results may take in memory,
+                the least recently used ones are evicted beyond it
+        path: a directory for the on-disk tier, results are also written there
+              and read back on a memory miss, so they survive across runs (None keeps the cache in memory only);
+              on disk a function is identified by its code, closure values and the globals it reads, 
+              so a change elsewhere (an attribute of a global object, a file it loads) is not noticed
+
+        RETURNS
+        =======
+        Result_Cache object: self.entries, self.nbytes and self.stats (hits, misses, disk_hits, evictions)
+
+        EXAMPLES
+        =======
+        >>> cache = Result_Cache(budget=1024)
+        >>> key = Result_Cache.key('auto_diff', np.sin, np.array([1.0, 2.0]))
+        >>> print(cache.get(key))
+        None
+        >>> cache.put(key, np.array([0.5, 0.25]))
+        >>> print(cache.get(key), cache.stats['hits'], cache.stats['misses'])
+        [0.5  0.25] 1 1
+        """
+        self.budget = budget
+        self.path = path
+        self.entries = OrderedDict() # key -> (result, nbytes), least recently used first
+        self.nbytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'disk_hits': 0, 'evictions': 0}
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(*parts):
+        """ a hashable key from functions (by identity), lists of functions, modes and arrays (by value bytes) """
+        key = []
+        for part in parts:
+            if isinstance(part, (list, tuple)) and all(callable(p) for p in part): # a list of functions
+                part = tuple(part)
+            elif isinstance(part, np.ndarray) or np.ndim(part) != 0:
+                part = np.ascontiguousarray(part)
+                part = (part.dtype.str, part.shape, part.tobytes())
+            key.append(part)
+        return tuple(key)
+
+    def _file(self, key):
+        return os.path.join(self.path, hashlib.sha256(_stable(key).encode()).hexdigest() + '.pkl')
+
+    def get(self, key):
+        """ returns the cached result for key (most recently used from now on), or None """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return self.entries[key][0]
+        if self.path is not None and os.path.exists(self._file(key)):
+            with open(self._file(key), 'rb') as f:
+                result = pickle.load(f)
+            self.stats['disk_hits'] += 1
+            self._store(key, result)
+            return result
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key, result):
+        """ cache result for key, in memory and, with a path, on disk """
+        self._store(key, result)
+        if self.path is not None:
+            with open(self._file(key), 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _store(self, key, result):
+        size = _nbytes(result)
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        self.entries[key] = (result, size)
+        self.nbytes += size
+        while self.nbytes > self.budget and self.entries:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        """ drop the results kept in memory (the on-disk tier is kept) """
+        self.entries.clear()
+        self.nbytes = 0
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
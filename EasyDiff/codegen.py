@@ -0,0 +1,240 @@
+import numpy as np
+from EasyDiff.var import Var
+from EasyDiff.tape_var import Tape_Op
+
+# source templates of every op: (value, d value / d a, d value / d b)
+# {a} and {b} are the names of the two parents, {c} is the constant operand and {v} the name of the value
+_SOURCE = {
+    Tape_Op.ADD: ('{a} + {b}', '1', '1'),
+    Tape_Op.SUB: ('{a} - {b}', '1', '-1'),
+    Tape_Op.MUL: ('{a} * {b}', '{b}', '{a}'),
+    Tape_Op.DIV: ('{a} / {b}', '1 / {b}', '-{v} / {b}'),
+    Tape_Op.POW: ('{a} ** {b}', '{b} * {a} ** ({b} - 1)', '{v} * np.log({a})'),
+    Tape_Op.ADD_C: ('{a} + {c}', '1', None),
+    Tape_Op.RSUB_C: ('{c} - {a}', '-1', None),
+    Tape_Op.MUL_C: ('{a} * {c}', '{c}', None),
+    Tape_Op.RDIV_C: ('{c} / {a}', '-{v} / {a}', None),
+    Tape_Op.POW_C: ('{a} ** {c}', '{c} * {a} ** ({c} - 1)', None),
+    Tape_Op.RPOW_C: ('{c} ** {a}', '{v} * np.log({c})', None),
+    Tape_Op.NEG: ('-{a}', '-1', None),
+    Tape_Op.LOG: ('np.log({a})', '1 / {a}', None),
+    Tape_Op.LOGK: ('np.log({a}) / np.log({c})', '1 / ({a} * np.log({c}))', None),
+    Tape_Op.EXP: ('np.exp({a})', '{v}', None),
+    Tape_Op.LOGISTIC: ('1 / (1 + np.exp(-{a}))', '{v} * (1 - {v})', None),
+    Tape_Op.SQRT: ('np.sqrt({a})', '0.5 / {v}', None),
+    Tape_Op.SINH: ('np.sinh({a})', 'np.cosh({a})', None),
+    Tape_Op.COSH: ('np.cosh({a})', 'np.sinh({a})', None),
+    Tape_Op.TANH: ('np.tanh({a})', '1 - {v} * {v}', None),
+    Tape_Op.SIN: ('np.sin({a})', 'np.cos({a})', None),
+    Tape_Op.COS: ('np.cos({a})', '-np.sin({a})', None),
+    Tape_Op.TAN: ('np.tan({a})', '1 / np.cos({a}) ** 2', None),
+    Tape_Op.ARCSIN: ('np.arcsin({a})', '1 / (1 - {a} ** 2) ** 0.5', None),
+    Tape_Op.ARCCOS: ('np.arccos({a})', '-1 / (1 - {a} ** 2) ** 0.5', None),
+    Tape_Op.ARCTAN: ('np.arctan({a})', '1 / (1 + {a} ** 2)', None),
+}
+
+# compiled functions by source, so tracing the same function again does not exec it again
+_CACHE = {}
+
+def _literal(value):
+    """ source of a constant, in parentheses so that a negative constant can be an operand """
+    value = float(value)
+    if np.isfinite(value):
+        return '({!r})'.format(value)
+    return "float('{}')".format(value)
+
+def _scale(weight, adjoint):
+    """ source of adjoint * weight """
+    if weight == '1':
+        return adjoint
+    if weight == '-1':
+        return '-' + adjoint
+    return '{} * ({})'.format(adjoint, weight)
+
+def tape_source(tape, inputs, output, mode='reverse', name='generated'):
+    """ straight-line Python/NumPy source computing the value and the derivatives of a recorded tape
+
+    INPUT
+    =======
+    tape: the Tape the function was recorded on
+    inputs: a list of Tape_Var input variables
+    output: the Tape_Var returned by the function
+    mode: 'reverse' for a function of the inputs returning (value, adjoint of every input),
+          'forward' for a function of the inputs and one tangent per input returning (value, tangent)
+    name: the name of the generated function
+
+    RETURNS
+    =======
+    the source code, as a string; ValueError for a mode other than 'reverse' and 'forward'
+
+    EXAMPLES
+    =======
+    >>> from EasyDiff.tape_var import Tape, Tape_Var
+    >>> tape = Tape()
+    >>> x, y = tape.variable(0.5), tape.variable(4.2)
+    >>> print(tape_source(tape, [x, y], x * y + Tape_Var.sin(x)))
+    def generated(x0, x1):
+        v2 = x0 * x1
+        v3 = np.sin(x0)
+        v4 = v2 + v3
+        a4 = 1.0
+        a2 = a4
+        a3 = a4
+        a0 = a3 * (np.cos(x0))
+        a0 = a0 + a2 * (x1)
+        a1 = a2 * (x0)
+        return v4, (a0, a1)
+    >>> print(tape_source(tape, [x, y], y, mode='forward'))
+    def generated(x0, x1, t0, t1):
+        return x1, t1
+    """
+    if mode not in ('reverse', 'forward'):
+        raise ValueError("mode must be 'reverse' or 'forward', not {!r}".format(mode))
+    out = output.index
+    ops = tape.ops[:out + 1].tolist()
+    parents = tape.parents[:out + 1].tolist()
+    consts = tape.consts[:out + 1].tolist()
+    live = [False] * (out + 1)
+    live[out] = True
+    for i in range(out, -1, -1):
+        if live[i]:
+            for p in parents[i]:
+                if p >= 0:
+                    live[p] = True
+
+    names = {}
+    for cnt, x in enumerate(inputs):
+        names[x.index] = 'x{}'.format(cnt)
+    for i in range(out + 1):
+        if ops[i] == Tape_Op.CONST:
+            names[i] = _literal(tape.values[i])
+    rows = [i for i in range(out + 1) if live[i] and ops[i] not in (Tape_Op.INPUT, Tape_Op.CONST)]
+
+    args = [names[x.index] for x in inputs]
+    if mode == 'forward':
+        args += ['t{}'.format(cnt) for cnt in range(len(inputs))]
+    lines = ['def {}({}):'.format(name, ', '.join(args))]
+    partials = {}
+    for i in rows:
+        names[i] = 'v{}'.format(i)
+        p0, p1 = parents[i]
+        fields = {'a': names[p0], 'b': names.get(p1), 'c': _literal(consts[i]), 'v': names[i]}
+        value, w0, w1 = _SOURCE[ops[i]]
+        lines.append('    {} = {}'.format(names[i], value.format(**fields)))
+        partials[i] = [(p0, w0.format(**fields))]
+        if p1 >= 0:
+            partials[i].append((p1, w1.format(**fields)))
+
+    if mode == 'forward':
+        tangents = {x.index: 't{}'.format(cnt) for cnt, x in enumerate(inputs)}
+        for i in rows:
+            terms = [_scale(w, tangents[p]) for p, w in partials[i] if p in tangents]
+            if terms:
+                tangents[i] = 'd{}'.format(i)
+                lines.append('    {} = {}'.format(tangents[i], ' + '.join(terms)))
+        lines.append('    return {}, {}'.format(names[out], tangents.get(out, '0.0')))
+        return '\n'.join(lines)
+
+    adjoints = {out: 'a{}'.format(out)}
+    lines.append('    a{} = 1.0'.format(out))
+    for i in reversed(rows):
+        if i not in adjoints: # does not reach the output through a differentiable path
+            continue
+        for p, w in partials[i]:
+            if ops[p] == Tape_Op.CONST:
+                continue
+            term = _scale(w, adjoints[i])
+            if p in adjoints:
+                lines.append('    {0} = {0} + {1}'.format(adjoints[p], term))
+            else:
+                adjoints[p] = 'a{}'.format(p)
+                lines.append('    {} = {}'.format(adjoints[p], term))
+    grads = [adjoints.get(x.index, '0.0') for x in inputs]
+    lines.append('    return {}, ({}{})'.format(names[out], ', '.join(grads), ',' if len(grads) == 1 else ''))
+    return '\n'.join(lines)
+
+def _compile_source(source, name):
+    if source not in _CACHE:
+        namespace = {'np': np}
+        exec(compile(source, '<EasyDiff generated {}>'.format(name), 'exec'), namespace)
+        _CACHE[source] = namespace[name]
+    return _CACHE[source]
+
+class Generated_Function():
+    '''
+    This class defines a recorded Tape turned into a plain Python/NumPy function,
+    which evaluates without any EasyDiff objects
+    '''
+    def __init__(self, tape, inputs, output, mode='reverse'):
+        """ constructor for Generated_Function class
+
+        INPUT
+        =======
+        tape: the Tape the function was recorded on
+        inputs: a list of Tape_Var input variables of the function
+        output: the Tape_Var returned by the function
+        mode: 'reverse' (one adjoint sweep) or 'forward' (one tangent per input) straight-line code
+
+        RETURNS
+        =======
+        Generated_Function object: self.source and self.func, the compiled function
+        (compiled functions are cached by source)
+
+        EXAMPLES
+        =======
+        >>> from EasyDiff.tape_var import Tape, Tape_Var
+        >>> tape = Tape()
+        >>> x, y = tape.variable(1.0), tape.variable(2.0)
+        >>> f = Generated_Function(tape, [x, y], x * y + Tape_Var.sin(x))
+        >>> value, grad = f.func(0.5, 4.2)
+        >>> print(round(value, 6), round(grad[0], 6), grad[1])
+        2.579426 5.077583 0.5
+        """
+        self.mode = mode
+        self.n = len(inputs)
+        self.source = tape_source(tape, inputs, output, mode)
+        self.func = _compile_source(self.source, 'generated')
+
+    def __call__(self, vals):
+        """ evaluate the generated function
+
+        INPUT
+        =======
+        vals: a list of values for the input variables,
+              or a 2-D array with one row of input values per evaluation point
+
+        RETURNS
+        =======
+        a Var object with the value and the gradient at vals
+        (val has shape (batch,) and der has shape (batch, n) for a 2-D vals)
+
+        EXAMPLES
+        =======
+        >>> from EasyDiff.tape_var import Tape, Tape_Var
+        >>> tape = Tape()
+        >>> x, y = tape.variable(1.0), tape.variable(2.0)
+        >>> f = Generated_Function(tape, [x, y], x * y + Tape_Var.sin(x), mode='forward')
+        >>> res = f(np.array([[0.5, 4.2], [1.0, 2.0]]))
+        >>> print(res.val.round(6), res.der.round(6))
+        [2.579426 2.841471] [[5.077583 0.5     ]
+         [2.540302 1.      ]]
+        """
+        vals = np.asarray(vals, dtype=float)
+        batched = vals.ndim == 2
+        if self.mode == 'forward':
+            # a (batch, 1) column per input times the (n,) unit tangents gives (batch, n) derivatives
+            columns = [vals[:, [cnt]] for cnt in range(self.n)] if batched else vals.tolist()
+            value, der = self.func(*columns, *np.eye(self.n))
+            if batched: # a constant output has a scalar value and tangent
+                value = np.broadcast_to(np.ravel(value), (len(vals),))
+                der = np.broadcast_to(der, (len(vals), self.n))
+            return Var(np.array(value), np.array(der))
+        value, grads = self.func(*(vals.T if batched else vals.tolist()))
+        if batched: # inputs the output does not depend on have a scalar 0.0 adjoint, a constant a scalar value
+            return Var(np.array(np.broadcast_to(value, (len(vals),))), 
+                       np.column_stack([np.broadcast_to(g, (len(vals),)) for g in grads]))
+        return Var(value, np.array(grads))
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
@@ -0,0 +1,218 @@
+import sys
+import time
+import weakref
+import numpy as np
+from EasyDiff.rev_var import Rev_Var
+from EasyDiff.tape_var import Tape, Tape_Op
+
+# Rev_Var methods that do not record a new node
+_NOT_OPS = ('__init__', '__array_ufunc__', 'grad', 'topological_sort', 'backward', 'prune', 'sweep', '__eq__', '__ne__')
+
+def _nbytes(value):
+    """ memory of a value, weight or grad_value held by a node """
+    if value is None:
+        return 0
+    return sys.getsizeof(value) # includes the data of an array owning it
+
+def _node_bytes(node):
+    """ estimated memory of one Rev_Var: the object, its attribute dict, its children list and edges, and its values """
+    size = sys.getsizeof(node) + sys.getsizeof(node.__dict__) + sys.getsizeof(node.children)
+    size += _nbytes(node.value) + _nbytes(node.grad_value)
+    for edge in node.children:
+        size += sys.getsizeof(edge) + _nbytes(edge[0])
+    return size
+
+def _rev_order(leaves):
+    """ every node reachable from leaves, each one after all the nodes it is an operand of (like topological_sort,
+    but also through nodes whose grad_value is already set) """
+    order = []
+    visited = set()
+    stack = [(node, False) for node in reversed(leaves)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in visited:
+            continue
+        visited.add(id(node))
+        stack.append((node, True))
+        for _, child in node.children:
+            if id(child) not in visited:
+                stack.append((child, False))
+    return order
+
+def _summary(nodes, edges, depth, fanout, by_op):
+    """ the dict returned by graph_stats """
+    return {'nodes': nodes, 'edges': edges, 'max_depth': depth,
+            'fanout': dict(sorted(fanout.items())),
+            'bytes': sum(size for _, size in by_op.values()),
+            'by_op': dict(sorted(by_op.items(), key=lambda item: -item[1][1]))}
+
+def _rev_stats(leaves, ops):
+    order = _rev_order(leaves)
+    depth = {}
+    fanin = {}
+    for node in reversed(order): # operands first
+        for _, child in node.children:
+            depth[id(child)] = max(depth.get(id(child), 0), depth.get(id(node), 0) + 1)
+            fanin[id(child)] = fanin.get(id(child), 0) + 1
+    edges, fanout, by_op = 0, {}, {}
+    for node in order:
+        edges += len(node.children)
+        fanout[len(node.children)] = fanout.get(len(node.children), 0) + 1
+        tag = ops.get(id(node))
+        if tag is not None and tag[0]() is node:
+            name = tag[1]
+        else: # the op is unknown outside of a Graph_Monitor, only the number of operands is
+            name = ('input', 'unary', 'binary')[min(fanin.get(id(node), 0), 2)]
+        count, size = by_op.get(name, (0, 0))
+        by_op[name] = (count + 1, size + _node_bytes(node))
+    return _summary(len(order), edges, max(depth.values(), default=0), fanout, by_op)
+
+def _tape_stats(tape):
+    n = tape.size
+    ops = tape.ops[:n]
+    parents = tape.parents[:n]
+    linked = parents[parents >= 0]
+    depth = np.zeros(n, dtype=int)
+    for i, (p0, p1) in enumerate(parents.tolist()): # parents always come first on a tape
+        if p0 >= 0:
+            depth[i] = max(depth[p0], depth[p1] if p1 >= 0 else 0) + 1
+    fanout = np.bincount(linked, minlength=n) if n else np.zeros(0, dtype=int)
+    row = (tape.ops.itemsize + tape.parents[0].nbytes + tape.partials[0].nbytes
+           + tape.consts.itemsize + tape.values.itemsize)
+    counts = np.bincount(ops, minlength=len(Tape_Op.NAMES))
+    by_op = {Tape_Op.NAMES[op]: (int(c), int(c) * row) for op, c in enumerate(counts) if c}
+    stats = _summary(n, len(linked), int(depth.max()) if n else 0,
+                     dict(zip(*[k.tolist() for k in np.unique(fanout, return_counts=True)])), by_op)
+    stats['allocated'] = tape.ops.nbytes + tape.parents.nbytes + tape.partials.nbytes + tape.consts.nbytes + tape.values.nbytes
+    return stats
+
+def graph_stats(roots, ops=None):
+    """ size and shape of a recorded reverse-mode graph
+
+    INPUT
+    =======
+    roots: a list of Rev_Var leaves (the input variables), every node recorded from them is visited
+           (a Rev_Var only links to the nodes computed from it, so the walk can not start from the outputs),
+           or a Tape
+    ops: {id(node): (weakref to node, op name)} recorded by a Graph_Monitor, to break Rev_Var nodes down by op;
+         without it Rev_Var nodes are grouped into 'input', 'unary' and 'binary' by their number of operands
+
+    RETURNS
+    =======
+    a dict with 'nodes', 'edges', 'max_depth' (the longest path from a leaf),
+    'fanout' {number of nodes using a node: count of such nodes}, 'bytes' (estimated)
+    and 'by_op' {op name: (nodes, bytes)}, largest first; for a Tape also 'allocated', the bytes of its arrays
+
+    EXAMPLES
+    =======
+    >>> x = Rev_Var(0.5)
+    >>> y = Rev_Var(2.0)
+    >>> z = Rev_Var.sin(x * y) + x
+    >>> stats = graph_stats([x, y])
+    >>> print(stats['nodes'], stats['edges'], stats['max_depth'], stats['fanout'])
+    5 5 3 {0: 1, 1: 3, 2: 1}
+    >>> sorted((name, count) for name, (count, _) in stats['by_op'].items())
+    [('binary', 2), ('input', 2), ('unary', 1)]
+    >>> from EasyDiff.tape_var import Tape_Var
+    >>> tape = Tape()
+    >>> x, y = tape.variable(0.5), tape.variable(2.0)
+    >>> z = Tape_Var.sin(x * y) + x
+    >>> stats = graph_stats(tape)
+    >>> print(stats['nodes'], stats['edges'], stats['max_depth'], stats['bytes'], stats['by_op']['sin'])
+    5 5 3 205 (1, 41)
+    """
+    if isinstance(roots, Tape):
+        return _tape_stats(roots)
+    return _rev_stats(roots, ops or {})
+
+class Graph_Monitor():
+    '''
+    This class defines a context manager that tags every Rev_Var recorded inside it with its op,
+    and samples the graph grown from a set of leaves as the trace goes on
+    '''
+    def __init__(self, leaves, every=None):
+        """ constructor for Graph_Monitor class
+
+        INPUT
+        =======
+        leaves: a list of Rev_Var leaves (the input variables) of the traced function
+        every: take a sample automatically after every `every` recorded ops (None to only sample on request);
+               a sample walks the whole graph, so this costs O(nodes) each time
+
+        RETURNS
+        =======
+        Graph_Monitor object: self.ops {id(node): (weakref, op name)} and self.samples, a list of graph_stats dicts
+        with 'seconds' since the monitor started, 'recorded' ops so far and the 'label' of the sample
+
+        EXAMPLES
+        =======
+        >>> x = Rev_Var(0.5)
+        >>> with Graph_Monitor([x], every=2) as monitor:
+        ...     z = x
+        ...     for _ in range(4):
+        ...         z = Rev_Var.exp(z * 0.5)
+        >>> [sample['nodes'] for sample in monitor.samples]
+        [3, 5, 7, 9]
+        >>> sorted((name, count) for name, (count, _) in monitor.stats()['by_op'].items())
+        [('exp', 4), ('input', 1), ('mul', 4)]
+        """
+        self.leaves = leaves
+        self.every = every
+        self.ops = {}
+        self.samples = []
+        self.recorded = 0
+        self.originals = {}
+        self.start = time.perf_counter()
+
+    def _wrap(self, name, func):
+        ops = self.ops
+        def tagged(*args, **kwargs):
+            res = func(*args, **kwargs)
+            # an op called from another one (eg, __radd__ calling __add__) has already tagged the node, 
+            # and one returning its operand (eg, __pos__) records no node
+            if isinstance(res, Rev_Var) and id(res) not in ops and not any(res is a for a in args):
+                ops[id(res)] = (weakref.ref(res), name)
+                self.recorded += 1
+                if self.every and self.recorded % self.every == 0:
+                    self.sample()
+            return res
+        return tagged
+
+    def __enter__(self):
+        for attr, member in list(vars(Rev_Var).items()):
+            if attr in _NOT_OPS:
+                continue
+            name = attr.strip('_')
+            if isinstance(member, staticmethod):
+                wrapped = staticmethod(self._wrap(name, member.__func__))
+            elif callable(member):
+                wrapped = self._wrap(name, member)
+            else:
+                continue
+            self.originals[attr] = member
+            setattr(Rev_Var, attr, wrapped)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        for attr, member in self.originals.items():
+            setattr(Rev_Var, attr, member)
+        return False
+
+    def stats(self):
+        """ graph_stats of the graph grown from the leaves, with ops broken down by name """
+        return graph_stats(self.leaves, self.ops)
+
+    def sample(self, label=None):
+        """ append the current graph_stats to self.samples and return it """
+        stats = self.stats()
+        stats.update(seconds=time.perf_counter() - self.start, recorded=self.recorded, label=label)
+        self.samples.append(stats)
+        return stats
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
@@ -0,0 +1,120 @@
+import time
+from EasyDiff.var import Var
+from EasyDiff.rev_var import Rev_Var
+from EasyDiff.scalar_var import Scalar_Var
+
+# methods that are not operations of an expression
+_SKIP = ('__init__',)
+
+# the Profiler currently patching the classes, profilers do not nest
+_ACTIVE = []
+
+class Profiler():
+    '''
+    This class defines a context manager counting the calls and the wall time of every operator,
+    elementary function and reverse sweep of Var, Rev_Var and Scalar_Var while it is active;
+    the methods are only wrapped inside the with block, so there is no overhead outside of it
+    '''
+    def __init__(self, classes=(Var, Rev_Var, Scalar_Var)):
+        """ constructor for Profiler class
+
+        INPUT
+        =======
+        classes: the classes whose methods are profiled (Tape_Var can be added as well)
+
+        RETURNS
+        =======
+        Profiler object: self.stats {'Class.method': [calls, total seconds, self seconds]},
+        total time includes the methods called from it (eg, __radd__ calling __add__), self time does not
+
+        EXAMPLES
+        =======
+        >>> x = Rev_Var(0.5)
+        >>> with Profiler() as prof:
+        ...     z = Rev_Var.sin(x) * x + x
+        ...     z.grad_value = 1.0
+        ...     g = x.grad()
+        >>> print(prof.calls('Rev_Var.sin'), prof.calls('Rev_Var.__mul__'), prof.calls('Rev_Var.backward'))
+        1 1 1
+        >>> Rev_Var.__dict__['sin'] is prof.originals[(Rev_Var, 'sin')]
+        True
+        """
+        self.classes = classes
+        self.stats = {}
+        self.originals = {}
+        self._stack = [] # [name, seconds spent in callees] of the running profiled methods
+
+    def _wrap(self, name, func):
+        stats, stack = self.stats, self._stack
+        clock = time.perf_counter
+        def profiled(*args, **kwargs):
+            frame = [name, 0.0]
+            stack.append(frame)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stack.pop()
+                if stack:
+                    stack[-1][1] += elapsed
+                entry = stats.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] += elapsed - frame[1]
+        profiled.__name__ = getattr(func, '__name__', name)
+        profiled.__doc__ = func.__doc__
+        return profiled
+
+    def __enter__(self):
+        if _ACTIVE:
+            raise RuntimeError('a Profiler is already active')
+        _ACTIVE.append(self)
+        for cls in self.classes:
+            for attr, member in list(vars(cls).items()):
+                if attr in _SKIP:
+                    continue
+                name = '{}.{}'.format(cls.__name__, attr)
+                if isinstance(member, staticmethod):
+                    wrapped = staticmethod(self._wrap(name, member.__func__))
+                elif callable(member):
+                    wrapped = self._wrap(name, member)
+                else:
+                    continue
+                self.originals[(cls, attr)] = member
+                setattr(cls, attr, wrapped)
+        return self
+
+    def __exit__(self, *exc):
+        for (cls, attr), member in self.originals.items():
+            setattr(cls, attr, member)
+        self._stack.clear()
+        _ACTIVE.remove(self)
+        return False
+
+    def calls(self, name):
+        """ the number of calls of name, eg, 'Var.__add__' """
+        return self.stats.get(name, [0])[0]
+
+    def report(self, sort='self', limit=None):
+        """ the profile as a table, one row per method that was called
+
+        INPUT
+        =======
+        sort: 'self' (self time), 'total' (total time) or 'calls', in decreasing order
+        limit: the number of rows kept (None for all)
+
+        RETURNS
+        =======
+        a string with the calls, total and self seconds and the self microseconds per call of each method
+        """
+        column = {'calls': 0, 'total': 1, 'self': 2}[sort]
+        rows = sorted(self.stats.items(), key=lambda item: item[1][column], reverse=True)[:limit]
+        lines = ['{:<28} {:>10} {:>12} {:>12} {:>12}'.format('method', 'calls', 'total s', 'self s', 'self us/call')]
+        for name, (calls, total, own) in rows:
+            lines.append('{:<28} {:>10} {:>12.6f} {:>12.6f} {:>12.3f}'.format(name, calls, total, own, own / calls * 1e6))
+        return '\n'.join(lines)
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
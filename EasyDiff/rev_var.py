@@ -1,5 +1,5 @@
 import numpy as np
-import pytest
+from EasyDiff.var import _apply_ufunc, _log_base
 class Rev_Var():
     '''
     This class defines a multivariate reverse mode node
@@ -9,7 +9,8 @@ class Rev_Var():
 
         INPUT
         =======
-        value: value of the current variable
+        value: value of the current variable, or an array of shape (batch,) with one value per sample;
+               weights and grad_value then hold one entry per sample as well
         
         RETURNS
         =======
@@ -21,12 +22,30 @@ class Rev_Var():
         >>> a = Rev_Var(1)
         >>> print(a.value, a.children, a.grad_value)
         1 [] None
+        >>> x = Rev_Var(np.array([1.0, 2.0, 3.0]))
+        >>> z = x * x
+        >>> z.grad_value = 1.0
+        >>> print(x.grad())
+        [2. 4. 6.]
         
         """
         self.value = value
         self.children = [] # store the <weight, Rev_Var> tuple for all its child. 
         self.grad_value = None # store derivatives of final expression with respect to current variable
 
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """ numpy ufuncs on a Rev_Var dispatch to the elementary functions and operators of Rev_Var
+
+        EXAMPLES
+        =======
+        >>> x = Rev_Var(0.5)
+        >>> z = np.sin(x) * np.float64(2.0)
+        >>> z.grad_value = 1.0
+        >>> print(z.value, x.grad())
+        0.958851077208406 1.7551651237807455
+        """
+        return _apply_ufunc(Rev_Var, ufunc, method, inputs, kwargs)
+
     def grad(self):
         """ calculate partial derivatives of the final expression with respect to current variable
 
@@ -50,10 +69,140 @@ class Rev_Var():
         
         """
         if self.grad_value is None:
-            self.grad_value = sum(weight * var.grad()
-                                  for weight, var in self.children)
+            Rev_Var.backward([self])
         return self.grad_value
 
+    @staticmethod
+    def topological_sort(nodes):
+        """ order the recorded graph reachable from nodes without recursion
+
+        INPUT
+        =======
+        nodes: a list of Rev_Var objects to start from (usually the input variables)
+        
+        RETURNS
+        =======
+        a list of every reachable Rev_Var whose grad_value is not yet known, 
+        ordered so that each node comes after all of its children
+        
+        EXAMPLES
+        =======
+        >>> x = Rev_Var(2.0)
+        >>> y = x * 3
+        >>> z = y + 1
+        >>> [node.value for node in Rev_Var.topological_sort([x])]
+        [7.0, 6.0, 2.0]
+        """
+        order = []
+        visited = set()
+        stack = [(node, False) for node in reversed(nodes)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded: # all children of node are already in order
+                order.append(node)
+                continue
+            if id(node) in visited or node.grad_value is not None:
+                continue
+            visited.add(id(node))
+            stack.append((node, True))
+            for _, child in node.children:
+                if id(child) not in visited:
+                    stack.append((child, False))
+        return order
+
+    @staticmethod
+    def backward(nodes):
+        """ calculate grad_value for every node reachable from nodes in a single reverse sweep
+
+        INPUT
+        =======
+        nodes: a list of Rev_Var objects (usually the input variables); 
+               the final expression must have its grad_value set beforehand
+        
+        RETURNS
+        =======
+        None, grad_value of every visited node is updated in place
+        
+        EXAMPLES
+        =======
+        >>> x = Rev_Var(0.5)
+        >>> y = Rev_Var(4.2)
+        >>> z = x * y + y
+        >>> z.grad_value = 1.0
+        >>> Rev_Var.backward([x, y])
+        >>> print(x.grad_value, y.grad_value)
+        4.2 1.5
+        """
+        for node in Rev_Var.topological_sort(nodes):
+            node.grad_value = sum(weight * child.grad_value
+                                  for weight, child in node.children)
+
+    @staticmethod
+    def prune(nodes, outputs):
+        """ remove the edges to nodes that never reach any of outputs, so later sweeps skip them; 
+        Rev_Var records only the weights of an operation, so this is the only graph optimization that applies 
+        (see Tape.optimize for common subexpressions and constant folding)
+
+        INPUT
+        =======
+        nodes: a list of Rev_Var objects to start from (usually the input variables)
+        outputs: a list of Rev_Var objects the gradients are wanted for
+        
+        RETURNS
+        =======
+        the number of nodes removed from the graph
+        
+        EXAMPLES
+        =======
+        >>> x = Rev_Var(2.0)
+        >>> dead = Rev_Var.exp(x) * 3
+        >>> z = x * x
+        >>> Rev_Var.prune([x], [z])
+        2
+        >>> len(Rev_Var.topological_sort([x]))
+        2
+        """
+        order = Rev_Var.topological_sort(nodes)
+        reach = set(id(out) for out in outputs)
+        for node in order: # children come first
+            if any(id(child) in reach for _, child in node.children):
+                reach.add(id(node))
+        for node in order:
+            node.children = [edge for edge in node.children if id(edge[1]) in reach]
+        starts = set(id(node) for node in nodes)
+        return sum(1 for node in order if id(node) not in reach and id(node) not in starts)
+
+    @staticmethod
+    def sweep(order, seeds):
+        """ recompute grad_value of every node in order from a set of seeded adjoints
+
+        INPUT
+        =======
+        order: a list of Rev_Var objects as returned by topological_sort, taken before any grad_value was set
+        seeds: a dict {id(node): adjoint} for the seeded outputs, adjoints may be numbers or arrays
+        
+        RETURNS
+        =======
+        None, grad_value of every node in order is overwritten, so the same order can be swept again with new seeds
+        
+        EXAMPLES
+        =======
+        >>> x = Rev_Var(3.0)
+        >>> y = Rev_Var(2.0)
+        >>> u = x * y
+        >>> v = x + y
+        >>> order = Rev_Var.topological_sort([x, y])
+        >>> Rev_Var.sweep(order, {id(u): 1.0})
+        >>> print(x.grad_value, y.grad_value)
+        2.0 3.0
+        >>> Rev_Var.sweep(order, {id(u): 1.0, id(v): 2.0})
+        >>> print(x.grad_value, y.grad_value)
+        4.0 5.0
+        """
+        for node in order:
+            node.grad_value = seeds.get(id(node), 0) + sum(weight * child.grad_value
+                                                           for weight, child in node.children)
+
     def __add__(self, other):
         """ returns a Rev_Var as the result of self + other
 
@@ -83,12 +232,12 @@ class Rev_Var():
         
 
         """
-        try: # two Var objects
+        if isinstance(other, Rev_Var): # two Var objects
             z = Rev_Var(self.value + other.value)
             self.children.append((1.0, z)) # weight = dz/dself = 1
             other.children.append((1.0, z)) # weight = dz/dother = 1
             return z
-        except AttributeError: # Var + real number
+        else: # Var + real number
             z = Rev_Var(self.value + other)
             self.children.append((1.0, z))
             return z
@@ -114,7 +263,10 @@ class Rev_Var():
         5.0 None
         
         """
-        return self + other
+        # only called with a real number, Rev_Var + Rev_Var goes to __add__
+        z = Rev_Var(self.value + other)
+        self.children.append((1.0, z))
+        return z
 
     def __mul__(self, other):
         """ returns a Rev_Var as the result of self * other
@@ -151,12 +303,12 @@ class Rev_Var():
         {'value': 6.0, 'children': [], 'grad_value': None}
 
         """
-        try: # two Var objects
+        if isinstance(other, Rev_Var): # two Var objects
             z = Rev_Var(self.value * other.value)
             self.children.append((other.value, z)) # weight = dz/dself = other.value
             other.children.append((self.value, z)) # weight = dz/dother = self.value
             return z
-        except AttributeError: # Var * real number
+        else: # Var * real number
             z = Rev_Var(self.value * other)
             self.children.append((other, z))
             return z
@@ -182,7 +334,10 @@ class Rev_Var():
         6.0 None
         
         """
-        return self * other
+        # only called with a real number, Rev_Var * Rev_Var goes to __mul__
+        z = Rev_Var(self.value * other)
+        self.children.append((other, z))
+        return z
 
     def __sub__(self, other):
         """ returns a Rev_Var as the result of self - other
@@ -214,12 +369,12 @@ class Rev_Var():
 
         """
         
-        try: # two Var objects
+        if isinstance(other, Rev_Var): # two Var objects
             z = Rev_Var(self.value - other.value)
             self.children.append((1.0, z)) # weight = dz/dself = 1
             other.children.append((-1.0, z)) # weight = dz/dother = -1
             return z
-        except AttributeError: # Var - real number
+        else: # Var - real number
             z = Rev_Var(self.value - other)
             self.children.append((1.0, z))
             return z
@@ -243,9 +398,14 @@ class Rev_Var():
         >>> t = 3 - x
         >>> print(t.value, t.grad_value)
         1.0 None
-        
+        >>> t.grad_value = 1.0
+        >>> print(len(x.children), x.grad())
+        1 -1.0
         """
-        return -1 *(self - other)
+        # the only scenario using this is when other is a real number and self is a Rev_Var object
+        z = Rev_Var(other - self.value)
+        self.children.append((-1.0, z)) # weight = dz/dself = -1
+        return z
 
     def __pow__(self, other):
         """" returns a Rev_Var as the result of self**(other)
@@ -274,13 +434,13 @@ class Rev_Var():
         
 
         """
-        try: # two Rev_Var objects
+        if isinstance(other, Rev_Var): # two Rev_Var objects
             val = self.value**other.value
             z = Rev_Var(val)
             self.children.append((other.value*(self.value **(other.value - 1)), z)) # weight = dz/dself
             other.children.append((val*np.log(self.value), z))
             return z
-        except AttributeError: # Var ** real number
+        else: # Var ** real number
             z = Rev_Var(self.value ** other)
             self.children.append((other*(self.value**(other-1)), z))
             return z
@@ -326,7 +486,7 @@ class Rev_Var():
         """
         # the only scenario using this is when other is a real number and self is a Var object
         z = Rev_Var(other **self.value)
-        self.children.append(((other**self.value) * np.log(other), z))
+        self.children.append(((other**self.value) * _log_base(other, self.value), z))
         return z
 
     def __truediv__(self, other):
@@ -352,9 +512,19 @@ class Rev_Var():
         0.3333333333333333 0.3333333333333333
         >>> print(y.grad(),-2/(3**2))
         -0.2222222222222222 -0.2222222222222222
-    
+        >>> print(len(x.children), len(y.children))
+        1 1
         """
-        return self * (other ** (-1))
+        # np.divide gives inf with a warning for a zero divisor, like Var, where python floats raise
+        if isinstance(other, Rev_Var): # two Rev_Var objects
+            z = Rev_Var(np.divide(self.value, other.value))
+            self.children.append((np.divide(1.0, other.value), z)) # weight = dz/dself = 1/other
+            other.children.append((-np.divide(z.value, other.value), z)) # weight = dz/dother = -self/other**2
+            return z
+        else: # Rev_Var / real number
+            z = Rev_Var(np.divide(self.value, other))
+            self.children.append((np.divide(1.0, other), z))
+            return z
 
     def __rtruediv__(self, other):
         """ returns a Rev_Var as the result of other / self
@@ -371,14 +541,16 @@ class Rev_Var():
         
         EXAMPLES
         =======
-        >>> x = Rev_Var(3.0)
-        >>> y = Rev_Var(2.0)
-        >>> p = x * (y * (-1))
-        >>> print(p.value, p.grad_value)
-        -6.0 None
-        
+        >>> x = Rev_Var(2.0)
+        >>> p = 3 / x
+        >>> p.grad_value = 1.0
+        >>> print(p.value, x.grad())
+        1.5 -0.75
         """
-        return other*(self**(-1))
+        # the only scenario using this is when other is a real number and self is a Rev_Var object
+        z = Rev_Var(np.divide(other, self.value))
+        self.children.append((-np.divide(z.value, self.value), z)) # weight = dz/dself = -other/self**2
+        return z
     
     def __neg__(self):
         """ returns a Rev_Var as the result of - self
@@ -393,24 +565,15 @@ class Rev_Var():
         
         EXAMPLES
         =======
-        >>> z6 = x/2
-        >>> z7 = x/2
-        >>> print(z6 != z7)
-        False
         >>> x = Rev_Var(2.0)
-        >>> x2 = Rev_Var(2.0)
-        >>> print(x != x2)
-        False
-        >>> y = Rev_Var(3.0)
-        >>> print(x != y)
-        True
-        
+        >>> z = -x * 3
+        >>> z.grad_value = 1.0
+        >>> print(z.value, x.grad())
+        -6.0 -3.0
         """
-        ans= Rev_Var(-self.value)
-        ans.children = [(-1, self)]
-        if self.grad_value:
-            ans.grad_value = -self.grad_value
-        return ans
+        z = Rev_Var(-self.value)
+        self.children.append((-1.0, z)) # weight = dz/dself = -1
+        return z
 
     
     def __pos__(self):
@@ -422,19 +585,16 @@ class Rev_Var():
         
         RETURNS
         =======
-        Rev_Var object: a Rev_Var object
-        
+        Rev_Var object: self, + is the identity and records no node
+
         EXAMPLES
         =======
         >>> x = Rev_Var(3.0)
-        >>> y = Rev_Var(2.0)
-        >>> print(x.value, x.grad_value)
-        3.0 None
-        >>> print(y.value, y.grad_value)
-        2.0 None
-
+        >>> y = +x
+        >>> print(y is x, y.value, y.grad_value)
+        True 3.0 None
         """
-        return self.copy()
+        return self
 
     def __eq__(self, other):
         """ returns the result of self == other
@@ -459,7 +619,7 @@ class Rev_Var():
         False
         
         """
-        try:
+        if isinstance(other, Rev_Var):
             # check equal value, derivative, and number of children
             condition1 = (self.value == other.value) and (self.grad_value == other.grad_value) and (len(self.children) == len(other.children))
             condition2 = True
@@ -469,7 +629,7 @@ class Rev_Var():
                     condition2 =  False
                     break
             return (condition1 and condition2)
-        except AttributeError:
+        else:
             return False
 
     def __ne__(self, other):
@@ -494,9 +654,9 @@ class Rev_Var():
         >>> print(x != z)
         False
         """
-        try:
+        if isinstance(other, Rev_Var):
             return not (self == other)
-        except AttributeError:
+        else:
             return True
 
     @staticmethod
@@ -520,11 +680,11 @@ class Rev_Var():
         0.5 0.5
         
         """
-        try: # a Var object
+        if isinstance(var, Rev_Var): # a Var object
             z = Rev_Var(np.log(var.value))
             var.children.append((1/ var.value, z))
             return z
-        except AttributeError: # a real number
+        else: # a real number
             return np.log(var)
 
     @staticmethod
@@ -551,11 +711,12 @@ class Rev_Var():
 
 
         """
-        try: # a Var object
-            z = Rev_Var(np.log(var.value) / np.log(k))
-            var.children.append((1/ (var.value*np.log(k)), z))
+        if isinstance(var, Rev_Var): # a Var object
+            log_k = _log_base(k, var.value)
+            z = Rev_Var(np.log(var.value) / log_k)
+            var.children.append((1/ (var.value*log_k), z))
             return z
-        except AttributeError: # a real number
+        else: # a real number
             return np.log(var) / np.log(k)
     
     @staticmethod
@@ -581,11 +742,11 @@ class Rev_Var():
         7.38905609893065 7.38905609893065
 
         """
-        try:
+        if isinstance(var, Rev_Var):
             z = Rev_Var(np.exp(var.value))
-            var.children.append((np.exp(var.value), z))
+            var.children.append((z.value, z)) # weight = e^x, the value itself
             return z
-        except AttributeError: # two real numbers
+        else: # two real numbers
             return np.exp(var)
     
     @staticmethod
@@ -615,17 +776,17 @@ class Rev_Var():
         
         >>> z = Rev_Var.expk(x, 2)
         >>> z.grad_value = 1
-        >>> x.grad() == pytest.approx(2**3*np.log(2))
+        >>> np.allclose(x.grad(), 2**3*np.log(2))
         True
-        >>> z.value == pytest.approx(2**3)
+        >>> np.allclose(z.value, 2**3)
         True
 
         """
-        try:
+        if isinstance(var, Rev_Var):
             z = Rev_Var(k**var.value)
-            var.children.append((k**var.value * np.log(k), z))
+            var.children.append((z.value * _log_base(k, var.value), z))
             return z
-        except AttributeError: # two real numbers
+        else: # two real numbers
             return k**var
 
     @staticmethod
@@ -645,16 +806,16 @@ class Rev_Var():
         >>> x = Rev_Var(3.0)
         >>> z = Rev_Var.logistic(x)
         >>> z.grad_value = 1
-        >>> x.grad() == pytest.approx(np.exp(3) / ((1 + np.exp(3))**2))
+        >>> np.allclose(x.grad(), np.exp(3) / ((1 + np.exp(3))**2))
         True
-        >>> z.value == pytest.approx(1 / (1+np.exp(-3)))
+        >>> np.allclose(z.value, 1 / (1+np.exp(-3)))
         True
         """
-        try:
+        if isinstance(var, Rev_Var):
             z = Rev_Var(1 / (1 + np.exp(-var.value))) # logistic(x) = 1 / (1 + e^(-x))
-            var.children.append((np.exp(var.value) / ((1 + np.exp(var.value))**2), z)) # weight = dz/dvar = e^x/ ((1 + e^x)**2)
+            var.children.append((z.value * (1 - z.value), z)) # weight = dz/dvar = e^x/ ((1 + e^x)**2) = z (1 - z)
             return z
-        except AttributeError: # two real numbers
+        else: # two real numbers
             return 1 / (1 + np.exp(-var))
 
     @staticmethod
@@ -680,17 +841,17 @@ class Rev_Var():
         >>> x = Rev_Var(3.0)
         >>> z = Rev_Var.sinh(x)
         >>> z.grad_value = 1
-        >>> x.grad() == pytest.approx((np.exp(3)+np.exp(-3)) / 2)
+        >>> np.allclose(x.grad(), (np.exp(3)+np.exp(-3)) / 2)
         True
-        >>> z.value == pytest.approx((np.exp(3)-np.exp(-3)) / 2)
+        >>> np.allclose(z.value, (np.exp(3)-np.exp(-3)) / 2)
         True
 
         """
-        try:
-            z = Rev_Var((np.exp(var.value) - np.exp(-var.value)) / 2) # sinh(x) = (e^x - e^(-x)) / 2
-            var.children.append(((np.exp(var.value)+np.exp(-var.value)) / 2, z)) # weight = dz/dvar = (e^x + e^(-x)) / 2
+        if isinstance(var, Rev_Var):
+            z = Rev_Var(np.sinh(var.value))
+            var.children.append((np.cosh(var.value), z)) # weight = dz/dvar = cosh(x)
             return z
-        except: # two real numbers
+        else: # two real numbers
             return (np.exp(var) - np.exp(-var)) / 2
 
     @staticmethod
@@ -716,17 +877,17 @@ class Rev_Var():
         >>> x = Rev_Var(3.0)
         >>> z = Rev_Var.cosh(x)
         >>> z.grad_value = 1
-        >>> x.grad() == pytest.approx((np.exp(3)-np.exp(-3)) / 2)
+        >>> np.allclose(x.grad(), (np.exp(3)-np.exp(-3)) / 2)
         True
-        >>> z.value == pytest.approx((np.exp(3)+np.exp(-3)) / 2)
+        >>> np.allclose(z.value, (np.exp(3)+np.exp(-3)) / 2)
         True
 
         """
-        try:
-            z = Rev_Var((np.exp(var.value) + np.exp(-var.value)) / 2) # cosh(x) = (e^x + e^(-x)) / 2
-            var.children.append(((np.exp(var.value) - np.exp(-var.value)) / 2, z)) # weight = dz/dvar = (e^x - e^(-x)) / 2
+        if isinstance(var, Rev_Var):
+            z = Rev_Var(np.cosh(var.value))
+            var.children.append((np.sinh(var.value), z)) # weight = dz/dvar = sinh(x)
             return z
-        except: # two real numbers
+        else: # two real numbers
             return (np.exp(var) + np.exp(-var)) / 2
     
     @staticmethod
@@ -747,22 +908,24 @@ class Rev_Var():
         >>> x = Rev_Var(2.0)
         >>> z1 = Rev_Var.sqrt(x)
         >>> z1.grad_value = 1
-        >>> print(x.grad(), 0.5*(2**(-0.5)))
-        0.3535533905932738 0.3535533905932738
+        >>> np.allclose(x.grad(), 0.5*(2**(-0.5)))
+        True
         >>> print(z1.value, np.sqrt(2))
         1.4142135623730951 1.4142135623730951
         
         >>> x = Rev_Var(3.0)
         >>> z = Rev_Var.tanh(x)
         >>> z.grad_value = 1
-        >>> x.grad() == pytest.approx(4 / (np.exp(6) + np.exp(-6) + 2))
+        >>> np.allclose(x.grad(), 4 / (np.exp(6) + np.exp(-6) + 2))
         True
-        >>> z.value == pytest.approx((np.exp(3)-np.exp(-3)) / (np.exp(3)+np.exp(-3)))
+        >>> np.allclose(z.value, (np.exp(3)-np.exp(-3)) / (np.exp(3)+np.exp(-3)))
         True
         """
-        try:
-            return Rev_Var.sinh(var) / Rev_Var.cosh(var)
-        except: # two real numbers
+        if isinstance(var, Rev_Var):
+            z = Rev_Var(np.tanh(var.value))
+            var.children.append((1 - z.value * z.value, z)) # weight = dz/dvar = 1 - tanh(x)^2
+            return z
+        else: # two real numbers
             return (np.exp(var) - np.exp(-var)) / (np.exp(var) + np.exp(-var))
     
     @staticmethod
@@ -782,17 +945,17 @@ class Rev_Var():
         >>> x = Rev_Var(2.0)
         >>> z1 = Rev_Var.sqrt(x)
         >>> z1.grad_value = 1
-        >>> print(x.grad(), 0.5*(2**(-0.5)))
-        0.3535533905932738 0.3535533905932738
+        >>> np.allclose(x.grad(), 0.5*(2**(-0.5)))
+        True
         >>> print(z1.value, np.sqrt(2))
         1.4142135623730951 1.4142135623730951
 
         """
-        try:
+        if isinstance(var, Rev_Var):
             z = Rev_Var(np.sqrt(var.value))
-            var.children.append((1/2 * (var.value**(-1/2)), z))
+            var.children.append((0.5 / z.value, z))
             return z
-        except AttributeError:
+        else:
             return np.sqrt(var)
     
     @staticmethod
@@ -819,11 +982,11 @@ class Rev_Var():
         sin(y): {'value': 0.9092974268256817, 'children': [], 'grad_value': None}
         """
         
-        try:
+        if isinstance(var, Rev_Var):
             z = Rev_Var(np.sin(var.value))
             var.children.append((np.cos(var.value), z)) # weight = dz/dvar = cos(var.value)
             return z
-        except:
+        else:
             return np.sin(var)
         
 
@@ -851,11 +1014,11 @@ class Rev_Var():
         cos(y): {'value': -0.4161468365471424, 'children': [], 'grad_value': None}
         
         """
-        try:
+        if isinstance(var, Rev_Var):
             z = Rev_Var(np.cos(var.value))
             var.children.append((-np.sin(var.value), z)) # weight = dz/dvar = -sin(var.value)
             return z
-        except:
+        else:
             return np.cos(var)
     
     @staticmethod
@@ -882,11 +1045,11 @@ class Rev_Var():
         tan(y): {'value': -2.185039863261519, 'children': [], 'grad_value': None}
         """
         
-        try:
+        if isinstance(var, Rev_Var):
             z = Rev_Var(np.tan(var.value))
-            var.children.append((1 / (np.cos(var.value) ** 2), z)) # weight = dz/dvar = 1/(np.cos(var.value)^2)
+            var.children.append((1 + z.value * z.value, z)) # weight = dz/dvar = 1/cos(x)^2 = 1 + tan(x)^2
             return z
-        except:
+        else:
             return np.tan(var)
     @staticmethod
     def arcsin(var):
@@ -904,11 +1067,11 @@ class Rev_Var():
         =======
         """
         
-        try:
+        if isinstance(var, Rev_Var):
             z = Rev_Var(np.arcsin(var.value))
-            var.children.append((1 / ((1 - var.value ** 2) ** 0.5), z)) # weight = dz/dvar
+            var.children.append((1 / np.sqrt(1 - var.value * var.value), z)) # weight = dz/dvar
             return z
-        except:
+        else:
             return np.arcsin(var)
 
 
@@ -928,11 +1091,11 @@ class Rev_Var():
         =======
         """
         
-        try:
+        if isinstance(var, Rev_Var):
             z = Rev_Var(np.arccos(var.value))
-            var.children.append((-1 / ((1 - var.value ** 2) ** 0.5), z)) # weight = dz/dvar
+            var.children.append((-1 / np.sqrt(1 - var.value * var.value), z)) # weight = dz/dvar
             return z
-        except:
+        else:
             return np.arccos(var)
     
     @staticmethod
@@ -951,11 +1114,11 @@ class Rev_Var():
         =======
         """
     
-        try:
+        if isinstance(var, Rev_Var):
             z = Rev_Var(np.arctan(var.value))
-            var.children.append((1 / (1 + var.value ** 2), z)) # weight = dz/dvar
+            var.children.append((1 / (1 + var.value * var.value), z)) # weight = dz/dvar
             return z
-        except:
+        else:
             return np.arctan(var)
     
     
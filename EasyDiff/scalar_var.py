@@ -0,0 +1,458 @@
+import math
+import numpy as np
+from EasyDiff.var import Var, _apply_ufunc, _DELEGATES
+
+class Scalar_Var():
+    '''
+    This class defines a dual number for a single point and a few input variables: val is a python float,
+    der a tuple of floats, and the elementary functions use the math module, so no operation pays numpy's
+    per-call overhead on a der of a few entries. AD evaluates small FORWARD mode problems on it (see AD)
+    '''
+    __slots__ = ('val', 'der')
+
+    def __init__(self, val, der):
+        """ constructor for Scalar_Var class
+
+        INPUT
+        =======
+        val: value of the input variable, a float
+        der: partial derivatives with respect to each input variable, a tuple of floats
+
+        RETURNS
+        =======
+        Scalar_Var object: self.val and self.der
+
+        EXAMPLES
+        =======
+        >>> x = Scalar_Var(2.0, (1.0, 0.0))
+        >>> y = Scalar_Var(3.0, (0.0, 1.0))
+        >>> z = x * y + Scalar_Var.sin(x)
+        >>> print(z.val, z.der)
+        6.909297426825682 (2.5838531634528574, 2.0)
+        """
+        self.val = val
+        self.der = der
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """ numpy ufuncs on a Scalar_Var dispatch to the elementary functions and operators of Scalar_Var
+
+        EXAMPLES
+        =======
+        >>> x = Scalar_Var(0.5, (1.0, 0.0))
+        >>> z = np.sin(x) * np.float64(2.0)
+        >>> print(z.val, z.der == (1.7551651237807455, 0.0))
+        0.958851077208406 True
+        """
+        return _apply_ufunc(Scalar_Var, ufunc, method, inputs, kwargs)
+
+    def __add__(self, other):
+        """ returns a Scalar_Var as the result of self + other
+
+        EXAMPLES
+        =======
+        >>> x = Scalar_Var(3.0, (1.0, 0.0))
+        >>> y = Scalar_Var(2.0, (0.0, 1.0))
+        >>> print((x + y).der, (x + 1).val, (1 + x).der)
+        (1.0, 1.0) 4.0 (1.0, 0.0)
+        """
+        if isinstance(other, Scalar_Var): # two Scalar_Var objects
+            return Scalar_Var(self.val + other.val, tuple([a + b for a, b in zip(self.der, other.der)]))
+        else: # Scalar_Var + real number
+            return Scalar_Var(self.val + other, self.der)
+
+    def __radd__(self, other):
+        """ returns a Scalar_Var as the result of other + self """
+        # only called with a real number, Scalar_Var + Scalar_Var goes to __add__
+        return Scalar_Var(self.val + other, self.der)
+
+    def __mul__(self, other):
+        """ returns a Scalar_Var as the result of self * other
+
+        EXAMPLES
+        =======
+        >>> x = Scalar_Var(3.0, (1.0, 0.0))
+        >>> y = Scalar_Var(2.0, (0.0, 1.0))
+        >>> print((x * y).der, (x * 2).der, (2 * x).val)
+        (2.0, 3.0) (2.0, 0.0) 6.0
+        """
+        if isinstance(other, Scalar_Var): # two Scalar_Var objects
+            a, b = self.val, other.val
+            return Scalar_Var(a * b, tuple([a * db + b * da for da, db in zip(self.der, other.der)]))
+        else: # Scalar_Var * real number
+            return Scalar_Var(self.val * other, tuple([d * other for d in self.der]))
+
+    def __rmul__(self, other):
+        """ returns a Scalar_Var as the result of other * self """
+        # only called with a real number, Scalar_Var * Scalar_Var goes to __mul__
+        return Scalar_Var(self.val * other, tuple([d * other for d in self.der]))
+
+    def __sub__(self, other):
+        """ returns a Scalar_Var as the result of self - other
+
+        EXAMPLES
+        =======
+        >>> x = Scalar_Var(3.0, (1.0, 0.0))
+        >>> y = Scalar_Var(2.0, (0.0, 1.0))
+        >>> print((x - y).der, (x - 2).val, (2 - x).der)
+        (1.0, -1.0) 1.0 (-1.0, -0.0)
+        """
+        if isinstance(other, Scalar_Var): # two Scalar_Var objects
+            return Scalar_Var(self.val - other.val, tuple([a - b for a, b in zip(self.der, other.der)]))
+        else: # Scalar_Var - real number
+            return Scalar_Var(self.val - other, self.der)
+
+    def __rsub__(self, other):
+        """ returns a Scalar_Var as the result of other - self """
+        return Scalar_Var(other - self.val, tuple([-d for d in self.der]))
+
+    def __pow__(self, other):
+        """ returns a Scalar_Var as the result of self ** other
+
+        EXAMPLES
+        =======
+        >>> x = Scalar_Var(3.0, (1.0, 0.0))
+        >>> y = Scalar_Var(2.0, (0.0, 1.0))
+        >>> print((x ** y).der, (x ** 2).der)
+        (6.0, 9.887510598012987) (6.0, 0.0)
+        """
+        if isinstance(other, Scalar_Var): # two Scalar_Var objects
+            # d(a**c)/dx = c*(a**(c-1)) * (da / dx) + a**c*ln(a) * (dc / dx)
+            a, c = self.val, other.val
+            value = math.pow(a, c)
+            da, dc = c * math.pow(a, c - 1), value * math.log(a)
+            return Scalar_Var(value, tuple([da * x + dc * y for x, y in zip(self.der, other.der)]))
+        else: # Scalar_Var ** real number
+            scale = other * math.pow(self.val, other - 1)
+            return Scalar_Var(math.pow(self.val, other), tuple([scale * d for d in self.der]))
+
+    def __rpow__(self, other):
+        """ returns a Scalar_Var as the result of other ** self
+
+        EXAMPLES
+        =======
+        >>> x = Scalar_Var(3.0, (1.0, 0.0))
+        >>> z = 2 ** x
+        >>> print(z.val, z.der)
+        8.0 (5.545177444479562, 0.0)
+        """
+        # the only scenario using this is when other is a real number and self is a Scalar_Var object
+        value = math.pow(other, self.val)
+        scale = value * math.log(other) # d(o ** s)/dx = o**s *log(o)*( ds/dx)
+        return Scalar_Var(value, tuple([scale * d for d in self.der]))
+
+    def __truediv__(self, other):
+        """ returns a Scalar_Var as the result of self / other
+
+        EXAMPLES
+        =======
+        >>> x = Scalar_Var(3.0, (1.0, 0.0))
+        >>> y = Scalar_Var(2.0, (0.0, 1.0))
+        >>> print((x / y).der, (x / 2).der)
+        (0.5, -0.75) (0.5, 0.0)
+        """
+        if isinstance(other, Scalar_Var): # two Scalar_Var objects
+            b = other.val
+            value = self.val / b
+            # d(a/b)/dx = (da/dx - a/b * db/dx) / b
+            return Scalar_Var(value, tuple([(da - value * db) / b for da, db in zip(self.der, other.der)]))
+        else: # Scalar_Var / real number
+            return Scalar_Var(self.val / other, tuple([d / other for d in self.der]))
+
+    def __rtruediv__(self, other):
+        """ returns a Scalar_Var as the result of other / self
+
+        EXAMPLES
+        =======
+        >>> x = Scalar_Var(2.0, (1.0, 0.0))
+        >>> z = 2 / x
+        >>> print(z.val, z.der)
+        1.0 (-0.5, -0.0)
+        """
+        value = other / self.val
+        scale = -value / self.val # d(o/s)/dx = -o/s**2 * ds/dx
+        return Scalar_Var(value, tuple([scale * d for d in self.der]))
+
+    def __neg__(self):
+        """ returns a Scalar_Var as the result of - self """
+        return Scalar_Var(-self.val, tuple([-d for d in self.der]))
+
+    def __pos__(self):
+        """ returns a Scalar_Var as the result of + self """
+        return Scalar_Var(self.val, self.der)
+
+    def __eq__(self, other):
+        """ returns the result of self == other
+
+        EXAMPLES
+        =======
+        >>> x = Scalar_Var(3.0, (1.0, 0.0))
+        >>> print(x == Scalar_Var(3.0, (1.0, 0.0)), x == Scalar_Var(3.0, (0.0, 1.0)), x != 3.0)
+        True False True
+        """
+        if isinstance(other, Scalar_Var):
+            return self.val == other.val and self.der == other.der
+        else:
+            return False
+
+    def __ne__(self, other):
+        """ returns the result of self != other """
+        return not self == other
+
+    # the elementary functions below compute the same derivative as the one of Var, with the math module;
+    # anything that is not a Scalar_Var (a real number, a Var, a Rev_Var) is handed to the one of Var
+
+    @staticmethod
+    def log(var):
+        """ returns a Scalar_Var as the result of log(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.log(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(z.val, z.der)
+        1.0986122886681098 (0.3333333333333333, 0.0)
+        """
+        if isinstance(var, Scalar_Var):
+            val = var.val
+            return Scalar_Var(math.log(val), tuple([d / val for d in var.der]))
+        else:
+            return Var.log(var)
+
+    @staticmethod
+    def logk(var, k):
+        """ returns a Scalar_Var as the result of log(var) in base k
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.logk(Scalar_Var(3.0, (1.0, 0.0)), 3.0)
+        >>> print(z.val, z.der)
+        1.0 (0.30341307554227914, 0.0)
+        """
+        if isinstance(var, Scalar_Var):
+            log_k = math.log(k)
+            scale = 1 / (var.val * log_k)
+            return Scalar_Var(math.log(var.val) / log_k, tuple([scale * d for d in var.der]))
+        else:
+            return Var.logk(var, k)
+
+    @staticmethod
+    def exp(var):
+        """ returns a Scalar_Var as the result of e ** var
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.exp(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(z.val, z.der)
+        20.085536923187668 (20.085536923187668, 0.0)
+        """
+        if isinstance(var, Scalar_Var):
+            val = math.exp(var.val)
+            return Scalar_Var(val, tuple([d * val for d in var.der]))
+        else:
+            return Var.exp(var)
+
+    @staticmethod
+    def expk(var, k):
+        """ returns a Scalar_Var as the result of k ** var
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.expk(Scalar_Var(3.0, (1.0, 0.0)), 4)
+        >>> print(z.val, np.allclose(z.der, [4**3*np.log(4), 0]))
+        64.0 True
+        """
+        if isinstance(var, Scalar_Var):
+            val = math.pow(k, var.val)
+            scale = val * math.log(k)
+            return Scalar_Var(val, tuple([scale * d for d in var.der]))
+        else:
+            return Var.expk(var, k)
+
+    @staticmethod
+    def logistic(var):
+        """ returns a Scalar_Var as the result of 1 / (1 + e^(-var))
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.logistic(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(np.allclose(z.val, 1 / (1 + np.exp(-3))), np.allclose(z.der, [np.exp(3) / ((1 + np.exp(3))**2), 0]))
+        True True
+        """
+        if isinstance(var, Scalar_Var):
+            val = 1 / (1 + math.exp(-var.val))
+            scale = val * (1 - val)
+            return Scalar_Var(val, tuple([scale * d for d in var.der]))
+        else:
+            return Var.logistic(var)
+
+    @staticmethod
+    def sqrt(var):
+        """ returns a Scalar_Var as the result of sqrt(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.sqrt(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(z.val, np.allclose(z.der, [0.28867513, 0.]))
+        1.7320508075688772 True
+        """
+        if isinstance(var, Scalar_Var):
+            val = math.sqrt(var.val)
+            scale = 0.5 / val
+            return Scalar_Var(val, tuple([scale * d for d in var.der]))
+        else:
+            return Var.sqrt(var)
+
+    @staticmethod
+    def sinh(var):
+        """ returns a Scalar_Var as the result of sinh(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.sinh(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(np.allclose(z.val, np.sinh(3)), np.allclose(z.der, [np.cosh(3), 0]))
+        True True
+        """
+        if isinstance(var, Scalar_Var):
+            scale = math.cosh(var.val)
+            return Scalar_Var(math.sinh(var.val), tuple([scale * d for d in var.der]))
+        else:
+            return Var.sinh(var)
+
+    @staticmethod
+    def cosh(var):
+        """ returns a Scalar_Var as the result of cosh(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.cosh(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(np.allclose(z.val, np.cosh(3)), np.allclose(z.der, [np.sinh(3), 0]))
+        True True
+        """
+        if isinstance(var, Scalar_Var):
+            scale = math.sinh(var.val)
+            return Scalar_Var(math.cosh(var.val), tuple([scale * d for d in var.der]))
+        else:
+            return Var.cosh(var)
+
+    @staticmethod
+    def tanh(var):
+        """ returns a Scalar_Var as the result of tanh(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.tanh(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(np.allclose(z.val, np.tanh(3)), np.allclose(z.der, [4 / (np.exp(6) + np.exp(-6) + 2), 0]))
+        True True
+        """
+        if isinstance(var, Scalar_Var):
+            val = math.tanh(var.val)
+            scale = 1 - val * val
+            return Scalar_Var(val, tuple([scale * d for d in var.der]))
+        else:
+            return Var.tanh(var)
+
+    @staticmethod
+    def sin(var):
+        """ returns a Scalar_Var as the result of sin(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.sin(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(z.val, z.der)
+        0.1411200080598672 (-0.9899924966004454, -0.0)
+        """
+        if isinstance(var, Scalar_Var):
+            scale = math.cos(var.val)
+            return Scalar_Var(math.sin(var.val), tuple([scale * d for d in var.der]))
+        else:
+            return Var.sin(var)
+
+    @staticmethod
+    def cos(var):
+        """ returns a Scalar_Var as the result of cos(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.cos(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(z.val, z.der)
+        -0.9899924966004454 (-0.1411200080598672, -0.0)
+        """
+        if isinstance(var, Scalar_Var):
+            scale = -math.sin(var.val)
+            return Scalar_Var(math.cos(var.val), tuple([scale * d for d in var.der]))
+        else:
+            return Var.cos(var)
+
+    @staticmethod
+    def tan(var):
+        """ returns a Scalar_Var as the result of tan(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.tan(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(np.allclose(z.val, np.tan(3)), np.allclose(z.der, [1 / np.cos(3) ** 2, 0]))
+        True True
+        """
+        if isinstance(var, Scalar_Var):
+            val = math.tan(var.val)
+            scale = 1 + val * val # 1 / cos(x)^2 = 1 + tan(x)^2
+            return Scalar_Var(val, tuple([scale * d for d in var.der]))
+        else:
+            return Var.tan(var)
+
+    @staticmethod
+    def arcsin(var):
+        """ returns a Scalar_Var as the result of arcsin(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.arcsin(Scalar_Var(0.5, (1.0, 0.0)))
+        >>> print(np.allclose(z.val, np.pi / 6), np.allclose(z.der, [1.15470054, 0.]))
+        True True
+        """
+        if isinstance(var, Scalar_Var):
+            val = var.val
+            scale = 1 / math.sqrt(1 - val * val)
+            return Scalar_Var(math.asin(val), tuple([scale * d for d in var.der]))
+        else:
+            return Var.arcsin(var)
+
+    @staticmethod
+    def arccos(var):
+        """ returns a Scalar_Var as the result of arccos(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.arccos(Scalar_Var(0.5, (1.0, 0.0)))
+        >>> print(np.allclose(z.val, np.pi / 3), np.allclose(z.der, [-1.15470054, 0.]))
+        True True
+        """
+        if isinstance(var, Scalar_Var):
+            val = var.val
+            scale = -1 / math.sqrt(1 - val * val)
+            return Scalar_Var(math.acos(val), tuple([scale * d for d in var.der]))
+        else:
+            return Var.arccos(var)
+
+    @staticmethod
+    def arctan(var):
+        """ returns a Scalar_Var as the result of arctan(var)
+
+        EXAMPLES
+        =======
+        >>> z = Scalar_Var.arctan(Scalar_Var(3.0, (1.0, 0.0)))
+        >>> print(np.allclose(z.val, np.arctan(3)), np.allclose(z.der, [0.1, 0.]))
+        True True
+        """
+        if isinstance(var, Scalar_Var):
+            val = var.val
+            scale = 1 / (1 + val * val)
+            return Scalar_Var(math.atan(val), tuple([scale * d for d in var.der]))
+        else:
+            return Var.arctan(var)
+
+# Var.sin(x) and the other elementary functions of Var call the ones above directly
+_DELEGATES.add(Scalar_Var)
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
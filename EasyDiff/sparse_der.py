@@ -0,0 +1,119 @@
+import numpy as np
+
+class Sparse_Der():
+    '''
+    This class defines a sparse vector of partial derivatives: only the nonzero entries are stored
+    '''
+    # numpy scalars and arrays defer to the operators below instead of wrapping us in an object array
+    __array_ufunc__ = None
+
+    def __init__(self, entries, size, dtype=np.float64):
+        """ constructor for Sparse_Der class
+
+        INPUT
+        =======
+        entries: a dict {index of input variable: partial derivative}
+        size: the number of input variables (length of the dense vector)
+        dtype: the floating point type of the dense vector (AD passes its dtype)
+
+        RETURNS
+        =======
+        Sparse_Der object: self.entries, self.size and self.dtype
+
+        EXAMPLES
+        =======
+        >>> d = Sparse_Der({1: 2.0}, 4)
+        >>> print(d.nnz, d.toarray())
+        1 [0. 2. 0. 0.]
+        >>> print(Sparse_Der({1: 2.0}, 4, dtype=np.float32).toarray().dtype)
+        float32
+        """
+        self.entries = entries
+        self.size = size
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def nnz(self):
+        """ number of stored (nonzero) partial derivatives """
+        return len(self.entries)
+
+    def toarray(self):
+        """ returns the dense numpy array """
+        dense = np.zeros(self.size, dtype=self.dtype)
+        if self.entries:
+            dense[list(self.entries.keys())] = list(self.entries.values())
+        return dense
+
+    def __array__(self, dtype=None, copy=None):
+        return self.toarray() if dtype is None else self.toarray().astype(dtype)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.toarray())
+
+    def __getitem__(self, index):
+        return self.entries.get(index, 0.0)
+
+    def __repr__(self):
+        return 'Sparse_Der({}, {})'.format(self.entries, self.size)
+
+    def _merge(self, other, sign):
+        if not isinstance(other, Sparse_Der): # Sparse_Der and a dense array
+            return self.toarray() + sign * np.asarray(other)
+        entries = dict(self.entries) # two Sparse_Der objects
+        for index, value in other.entries.items():
+            entries[index] = entries.get(index, 0.0) + sign * value
+        return Sparse_Der(entries, self.size, self.dtype)
+
+    def __add__(self, other):
+        """ returns a Sparse_Der as the result of self + other
+
+        EXAMPLES
+        =======
+        >>> d = Sparse_Der({0: 1.0}, 3) + Sparse_Der({2: 1.0}, 3)
+        >>> print(d.entries)
+        {0: 1.0, 2: 1.0}
+        """
+        return self._merge(other, 1)
+
+    def __radd__(self, other):
+        return self._merge(other, 1)
+
+    def __sub__(self, other):
+        return self._merge(other, -1)
+
+    def __rsub__(self, other):
+        return -self._merge(other, -1)
+
+    def __mul__(self, other):
+        """ returns a Sparse_Der as the result of self * other, where other is a real number
+
+        EXAMPLES
+        =======
+        >>> d = np.float64(3.0) * Sparse_Der({1: 2.0}, 3)
+        >>> print({index: float(value) for index, value in d.entries.items()})
+        {1: 6.0}
+        """
+        if np.ndim(other) != 0: # scaling by an array densifies
+            return self.toarray() * other
+        return Sparse_Der({index: value * other for index, value in self.entries.items()}, self.size, self.dtype)
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __truediv__(self, other):
+        if np.ndim(other) != 0:
+            return self.toarray() / other
+        return Sparse_Der({index: value / other for index, value in self.entries.items()}, self.size, self.dtype)
+
+    def __neg__(self):
+        return self * -1
+
+    def __pos__(self):
+        return self
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
@@ -0,0 +1,707 @@
+import numpy as np
+from EasyDiff.var import Var, _apply_ufunc
+class Tape_Op:
+    '''
+    This class defines the op codes recorded on a Tape
+    '''
+    INPUT = 0
+    CONST = 1
+    ADD = 2      # a + b
+    SUB = 3      # a - b
+    MUL = 4      # a * b
+    DIV = 5      # a / b
+    POW = 6      # a ** b
+    ADD_C = 7    # a + c
+    RSUB_C = 8   # c - a
+    MUL_C = 9    # a * c
+    RDIV_C = 10  # c / a
+    POW_C = 11   # a ** c
+    RPOW_C = 12  # c ** a
+    NEG = 13
+    LOG = 14
+    LOGK = 15    # log(a) / log(c)
+    EXP = 16
+    LOGISTIC = 17
+    SQRT = 18
+    SINH = 19
+    COSH = 20
+    TANH = 21
+    SIN = 22
+    COS = 23
+    TAN = 24
+    ARCSIN = 25
+    ARCCOS = 26
+    ARCTAN = 27
+
+    NAMES = ['input', 'const', 'add', 'sub', 'mul', 'div', 'pow', 'add_c', 'rsub_c', 'mul_c', 'rdiv_c', 'pow_c', 'rpow_c',
+             'neg', 'log', 'logk', 'exp', 'logistic', 'sqrt', 'sinh', 'cosh', 'tanh', 'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan']
+
+# local rules of every op: (a, b, c) -> (value, d value / d a, d value / d b)
+# a and b are the values of the two parents, c is the constant operand of the op
+def _leaf(a, b, c):
+    raise ValueError("input and constant nodes have no local rule")
+
+def _div(a, b, c):
+    val = a / b
+    return val, 1 / b, -val / b
+
+def _pow(a, b, c):
+    val = a ** b
+    return val, b * (a ** (b - 1)), val * np.log(a)
+
+def _rdiv_c(a, b, c):
+    val = c / a
+    return val, -val / a, 0.0
+
+def _rpow_c(a, b, c):
+    val = c ** a
+    return val, val * np.log(c), 0.0
+
+def _exp(a, b, c):
+    val = np.exp(a)
+    return val, val, 0.0
+
+def _logistic(a, b, c):
+    val = 1 / (1 + np.exp(-a))
+    return val, val * (1 - val), 0.0
+
+def _sqrt(a, b, c):
+    val = np.sqrt(a)
+    return val, 0.5 / val, 0.0
+
+def _tanh(a, b, c):
+    val = np.tanh(a)
+    return val, 1 - val * val, 0.0
+
+def _tan(a, b, c):
+    cos = np.cos(a)
+    return np.tan(a), 1 / (cos * cos), 0.0
+
+_RULES = [
+    _leaf, # INPUT
+    _leaf, # CONST
+    lambda a, b, c: (a + b, 1.0, 1.0),
+    lambda a, b, c: (a - b, 1.0, -1.0),
+    lambda a, b, c: (a * b, b, a),
+    _div,
+    _pow,
+    lambda a, b, c: (a + c, 1.0, 0.0),
+    lambda a, b, c: (c - a, -1.0, 0.0),
+    lambda a, b, c: (a * c, c, 0.0),
+    _rdiv_c,
+    lambda a, b, c: (a ** c, c * (a ** (c - 1)), 0.0),
+    _rpow_c,
+    lambda a, b, c: (-a, -1.0, 0.0),
+    lambda a, b, c: (np.log(a), 1 / a, 0.0),
+    lambda a, b, c: (np.log(a) / np.log(c), 1 / (a * np.log(c)), 0.0),
+    _exp,
+    _logistic,
+    _sqrt,
+    lambda a, b, c: (np.sinh(a), np.cosh(a), 0.0),
+    lambda a, b, c: (np.cosh(a), np.sinh(a), 0.0),
+    _tanh,
+    lambda a, b, c: (np.sin(a), np.cos(a), 0.0),
+    lambda a, b, c: (np.cos(a), -np.sin(a), 0.0),
+    _tan,
+    lambda a, b, c: (np.arcsin(a), 1 / ((1 - a ** 2) ** 0.5), 0.0),
+    lambda a, b, c: (np.arccos(a), -1 / ((1 - a ** 2) ** 0.5), 0.0),
+    lambda a, b, c: (np.arctan(a), 1 / (1 + a ** 2), 0.0),
+]
+
+def _constant_operand(op, p0, p1, folded):
+    """ the op with a constant operand (and its other parent) equal to the binary op on rows p0 and p1, 
+    one of which is a constant row with value folded[row] """
+    if p1 in folded:
+        b = folded[p1]
+        if op == Tape_Op.SUB:
+            return Tape_Op.ADD_C, p0, -1, -b
+        if op == Tape_Op.DIV:
+            return Tape_Op.MUL_C, p0, -1, np.divide(1.0, b) # inf for a zero constant, like Tape_Var / 0
+        return {Tape_Op.ADD: Tape_Op.ADD_C, Tape_Op.MUL: Tape_Op.MUL_C, Tape_Op.POW: Tape_Op.POW_C}[op], p0, -1, b
+    return {Tape_Op.ADD: Tape_Op.ADD_C, Tape_Op.SUB: Tape_Op.RSUB_C, Tape_Op.MUL: Tape_Op.MUL_C, 
+            Tape_Op.DIV: Tape_Op.RDIV_C, Tape_Op.POW: Tape_Op.RPOW_C}[op], p1, -1, folded[p0]
+
+class Tape():
+    '''
+    This class defines a Wengert list: every operation appends one row to contiguous numpy arrays
+    '''
+    def __init__(self, capacity=1024):
+        """ constructor for Tape class
+
+        INPUT
+        =======
+        capacity: number of rows allocated up front, the arrays double when full
+
+        RETURNS
+        =======
+        Tape object: self.ops, self.parents, self.partials, self.consts, self.values and self.size
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(2.0)
+        >>> print(tape.size, x.index, x.value)
+        1 0 2.0
+        """
+        self.size = 0
+        self.ops = np.zeros(capacity, dtype=np.uint8)
+        self.parents = np.full((capacity, 2), -1, dtype=np.int32)
+        self.partials = np.zeros((capacity, 2))
+        self.consts = np.zeros(capacity)
+        self.values = np.zeros(capacity)
+
+    def __len__(self):
+        return self.size
+
+    def reset(self):
+        """ forget all recorded rows but keep the allocated arrays """
+        self.size = 0
+        self.parents[:] = -1
+
+    def _grow(self):
+        capacity = 2 * len(self.ops)
+        self.ops = np.resize(self.ops, capacity)
+        parents = np.full((capacity, 2), -1, dtype=np.int32)
+        parents[:self.size] = self.parents[:self.size]
+        self.parents = parents
+        self.partials = np.resize(self.partials, (capacity, 2))
+        self.consts = np.resize(self.consts, capacity)
+        self.values = np.resize(self.values, capacity)
+
+    def push(self, op, value, parent0=-1, partial0=0.0, parent1=-1, partial1=0.0, const=0.0):
+        """ append one row to the tape and return its index """
+        if self.size == len(self.ops):
+            self._grow()
+        i = self.size
+        self.ops[i] = op
+        self.values[i] = value
+        self.parents[i, 0] = parent0
+        self.parents[i, 1] = parent1
+        self.partials[i, 0] = partial0
+        self.partials[i, 1] = partial1
+        self.consts[i] = const
+        self.size = i + 1
+        return i
+
+    def record(self, op, parent0, parent1=-1, const=0.0):
+        """ evaluate op on the recorded values of its parents, append it and return a Tape_Var handle
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(3.0)
+        >>> y = tape.record(Tape_Op.MUL_C, x.index, const=2.0)
+        >>> print(y.value, tape.partials[y.index, 0])
+        6.0 2.0
+        """
+        a = self.values[parent0]
+        b = self.values[parent1] if parent1 >= 0 else 0.0
+        value, partial0, partial1 = _RULES[op](a, b, const)
+        return Tape_Var(self, self.push(op, value, parent0, partial0, parent1, partial1, const))
+
+    def variable(self, value):
+        """ record an input variable and return its Tape_Var handle """
+        return Tape_Var(self, self.push(Tape_Op.INPUT, value))
+
+    def constant(self, value):
+        """ record a constant and return its Tape_Var handle """
+        return Tape_Var(self, self.push(Tape_Op.CONST, value, const=value))
+
+    def gradient(self, output):
+        """ run the adjoint sweep over the tape arrays
+
+        INPUT
+        =======
+        output: a Tape_Var (or its index) holding the final expression
+
+        RETURNS
+        =======
+        a numpy array with the derivative of output with respect to every recorded row 
+        (0 for the rows recorded after it, eg, inputs when output is itself an input)
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(0.5)
+        >>> y = tape.variable(4.2)
+        >>> z = x * y + y
+        >>> adjoint = tape.gradient(z)
+        >>> print(adjoint[x.index], adjoint[y.index])
+        4.2 1.5
+        """
+        out = getattr(output, 'index', output)
+        adjoint = [0.0] * self.size # every input has a slot, also when it comes after output
+        adjoint[out] = 1.0
+        # one bulk conversion keeps the python loop off numpy scalar indexing
+        parents = self.parents[:out + 1].tolist()
+        partials = self.partials[:out + 1].tolist()
+        for i in range(out, -1, -1):
+            a = adjoint[i]
+            if a == 0.0:
+                continue
+            p0, p1 = parents[i]
+            if p0 >= 0:
+                w0, w1 = partials[i]
+                adjoint[p0] += a * w0
+                if p1 >= 0:
+                    adjoint[p1] += a * w1
+        return np.array(adjoint)
+
+    def optimize(self, inputs, outputs):
+        """ rewrite the rows that outputs depend on into a new, smaller tape: 
+        common subexpressions are merged, operations on constants are folded, 
+        identities (x + 0, x - 0, x * 1, x / 1, x ** 1, x * 0) are simplified 
+        and rows that never reach an output are removed
+
+        INPUT
+        =======
+        inputs: a list of Tape_Var input variables, they are kept even if unused
+        outputs: a Tape_Var or a list of Tape_Vars
+
+        RETURNS
+        =======
+        tape: the optimized Tape, values and partials are the ones recorded at the current input values
+        inputs: the input variables on the new tape
+        outputs: the outputs on the new tape (a Tape_Var, or a list for a list of outputs)
+        stats: a dict with the number of rows before and after, and of rows merged ('cse'), 
+               folded into constants ('folded'), simplified ('identities') and unreachable ('dead')
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x, y = tape.variable(0.5), tape.variable(4.2)
+        >>> dead = Tape_Var.exp(x)
+        >>> z = Tape_Var.sin(x) * y + Tape_Var.sin(x) * (y * 1 + 0)
+        >>> new_tape, (x, y), z, stats = tape.optimize([x, y], z)
+        >>> print(stats['before'], stats['after'], stats['cse'], stats['identities'], stats['dead'])
+        10 5 2 2 1
+        >>> adjoint = new_tape.gradient(z)
+        >>> print(round(z.value, 6), round(adjoint[x.index], 6), round(adjoint[y.index], 6))
+        4.027175 7.371694 0.958851
+        """
+        single = not isinstance(outputs, (list, tuple))
+        outs = [outputs.index] if single else [out.index for out in outputs]
+        last = max(outs + [x.index for x in inputs]) # inputs are kept, also when recorded after the outputs
+        ops = self.ops[:last + 1].tolist()
+        parents = self.parents[:last + 1].tolist()
+        consts = self.consts[:last + 1].tolist()
+        values = self.values[:last + 1].tolist()
+        stats = {'before': last + 1, 'cse': 0, 'folded': 0, 'identities': 0, 'dead': 0}
+
+        live = [False] * (last + 1)
+        for out in outs:
+            live[out] = True
+        for x in inputs:
+            live[x.index] = True
+        for i in range(last, -1, -1):
+            if live[i]:
+                for p in parents[i]:
+                    if p >= 0:
+                        live[p] = True
+
+        tape = Tape(len(self.ops))
+        new = [-1] * (last + 1) # row of the old tape -> row of the new tape
+        seen = {} # (op, parent0, parent1, const) -> row of the new tape
+        folded = {} # row of the new tape -> value, for constant rows
+
+        def constant(value):
+            key = (Tape_Op.CONST, -1, -1, value)
+            if key not in seen:
+                seen[key] = tape.push(Tape_Op.CONST, value, const=value)
+                folded[seen[key]] = value
+            return seen[key]
+
+        for i in range(last + 1):
+            if not live[i]:
+                stats['dead'] += 1
+                continue
+            op, c = ops[i], consts[i]
+            if op == Tape_Op.INPUT:
+                new[i] = tape.push(Tape_Op.INPUT, values[i])
+                continue
+            if op == Tape_Op.CONST:
+                new[i] = constant(values[i])
+                continue
+            p0, p1 = [new[p] if p >= 0 else -1 for p in parents[i]]
+            if p0 in folded and (p1 < 0 or p1 in folded): # every operand is a constant
+                stats['folded'] += 1
+                new[i] = constant(_RULES[op](folded[p0], folded.get(p1, 0.0), c)[0])
+                continue
+            if p1 >= 0 and (p0 in folded or p1 in folded): # one constant operand: use the op with a constant
+                stats['folded'] += 1
+                op, p0, p1, c = _constant_operand(op, p0, p1, folded)
+            if (op == Tape_Op.ADD_C and c == 0) or (op in (Tape_Op.MUL_C, Tape_Op.POW_C) and c == 1):
+                stats['identities'] += 1
+                new[i] = p0
+                continue
+            if op == Tape_Op.MUL_C and c == 0:
+                stats['identities'] += 1
+                new[i] = constant(0.0)
+                continue
+            if op in (Tape_Op.ADD, Tape_Op.MUL) and p1 < p0: # commutative: one key for a + b and b + a
+                p0, p1 = p1, p0
+            key = (op, p0, p1, c)
+            if key in seen:
+                stats['cse'] += 1
+                new[i] = seen[key]
+                continue
+            new[i] = seen[key] = tape.record(op, p0, p1, c).index
+
+        # constants absorbed into ops are left unused, drop them with a second pass
+        rewritten = len(tape)
+        tape, new_rows = tape._compact([new[x.index] for x in inputs], [new[out] for out in outs])
+        stats['dead'] += rewritten - len(tape)
+        stats['after'] = len(tape)
+        inputs = [Tape_Var(tape, new_rows[new[x.index]]) for x in inputs]
+        outputs = [Tape_Var(tape, new_rows[new[out]]) for out in outs]
+        return tape, inputs, outputs[0] if single else outputs, stats
+
+    def _compact(self, inputs, outputs):
+        """ copy the rows outputs depend on (and the inputs) to a new tape, 
+        returns the new tape and a dict {old row: new row} """
+        parents = self.parents[:self.size].tolist()
+        live = [False] * self.size
+        for i in inputs + outputs:
+            live[i] = True
+        for i in range(self.size - 1, -1, -1):
+            if live[i]:
+                for p in parents[i]:
+                    if p >= 0:
+                        live[p] = True
+        tape = Tape(max(self.size, 1))
+        rows = {}
+        for i in range(self.size):
+            if live[i]:
+                p0, p1 = [rows[p] if p >= 0 else -1 for p in parents[i]]
+                rows[i] = tape.push(self.ops[i], self.values[i], p0, self.partials[i, 0], 
+                                    p1, self.partials[i, 1], self.consts[i])
+        return tape, rows
+
+    @property
+    def nbytes(self):
+        """ bytes used by the recorded rows """
+        row = (self.ops.itemsize + self.parents.itemsize * 2 + self.partials.itemsize * 2
+               + self.consts.itemsize + self.values.itemsize)
+        return row * self.size
+
+class Tape_Var():
+    '''
+    This class defines a reverse mode node as a thin index handle into a Tape
+    '''
+    __slots__ = ('tape', 'index')
+
+    def __init__(self, tape, index):
+        """ constructor for Tape_Var class
+
+        INPUT
+        =======
+        tape: the Tape the node is recorded on
+        index: the row of the node on the tape
+
+        RETURNS
+        =======
+        Tape_Var object: self.tape and self.index
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> a = tape.variable(1.0)
+        >>> print(a.index, a.value)
+        0 1.0
+        """
+        self.tape = tape
+        self.index = index
+
+    @property
+    def value(self):
+        return float(self.tape.values[self.index])
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """ numpy ufuncs on a Tape_Var dispatch to the elementary functions and operators of Tape_Var, 
+        so that functions written with np.sin or Var.sin can be traced on a Tape
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(0.5)
+        >>> z = np.sin(x) * np.float64(2.0)
+        >>> print(round(z.value, 6), round(tape.gradient(z)[x.index], 6))
+        0.958851 1.755165
+        """
+        return _apply_ufunc(Tape_Var, ufunc, method, inputs, kwargs)
+
+    def _binary(self, op, const_op, other):
+        if isinstance(other, Tape_Var): # two Tape_Var objects
+            return self.tape.record(op, self.index, other.index)
+        else: # Tape_Var and a real number
+            return self.tape.record(const_op, self.index, const=other)
+
+    def __add__(self, other):
+        """ returns a Tape_Var as the result of self + other
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(2.0)
+        >>> y = tape.variable(3.0)
+        >>> print((x + y).value, (x + 1).value, (1 + x).value)
+        5.0 3.0 3.0
+        """
+        return self._binary(Tape_Op.ADD, Tape_Op.ADD_C, other)
+
+    def __radd__(self, other):
+        return self + other
+
+    def __sub__(self, other):
+        """ returns a Tape_Var as the result of self - other
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(3.0)
+        >>> y = tape.variable(2.0)
+        >>> print((x - y).value, (x - 2).value, (2 - x).value)
+        1.0 1.0 -1.0
+        """
+        if isinstance(other, Tape_Var): # two Tape_Var objects
+            return self.tape.record(Tape_Op.SUB, self.index, other.index)
+        else: # Tape_Var - real number
+            return self.tape.record(Tape_Op.ADD_C, self.index, const=-other)
+
+    def __rsub__(self, other):
+        return self.tape.record(Tape_Op.RSUB_C, self.index, const=other)
+
+    def __mul__(self, other):
+        """ returns a Tape_Var as the result of self * other
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(3.0)
+        >>> y = tape.variable(2.0)
+        >>> print((x * y).value, (2 * y).value)
+        6.0 4.0
+        """
+        return self._binary(Tape_Op.MUL, Tape_Op.MUL_C, other)
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __truediv__(self, other):
+        """ returns a Tape_Var as the result of self / other
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(2.0)
+        >>> y = tape.variable(4.0)
+        >>> print((x / y).value, (x / 4).value, (1 / y).value)
+        0.5 0.5 0.25
+        """
+        if isinstance(other, Tape_Var): # two Tape_Var objects
+            return self.tape.record(Tape_Op.DIV, self.index, other.index)
+        else: # Tape_Var / real number
+            # np.divide gives inf with a warning for a zero divisor, like Var and Rev_Var.__truediv__
+            return self.tape.record(Tape_Op.MUL_C, self.index, const=np.divide(1.0, other))
+
+    def __rtruediv__(self, other):
+        return self.tape.record(Tape_Op.RDIV_C, self.index, const=other)
+
+    def __pow__(self, other):
+        """ returns a Tape_Var as the result of self ** other
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(3.0)
+        >>> y = tape.variable(2.0)
+        >>> print((x ** y).value, (x ** 2).value, (2 ** x).value)
+        9.0 9.0 8.0
+        """
+        return self._binary(Tape_Op.POW, Tape_Op.POW_C, other)
+
+    def __rpow__(self, other):
+        return self.tape.record(Tape_Op.RPOW_C, self.index, const=other)
+
+    def __neg__(self):
+        return self.tape.record(Tape_Op.NEG, self.index)
+
+    def __pos__(self):
+        return self
+
+    @staticmethod
+    def _unary(op, var, func, const=0.0):
+        if isinstance(var, Tape_Var): # a Tape_Var object
+            return var.tape.record(op, var.index, const=const)
+        else: # a real number
+            return func(var)
+
+    @staticmethod
+    def log(var):
+        """ returns a Tape_Var as the result of var.log()
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(2.0)
+        >>> z = Tape_Var.log(x)
+        >>> print(tape.gradient(z)[x.index])
+        0.5
+        """
+        return Tape_Var._unary(Tape_Op.LOG, var, np.log)
+
+    @staticmethod
+    def logk(var, k):
+        return Tape_Var._unary(Tape_Op.LOGK, var, lambda x: np.log(x) / np.log(k), k)
+
+    @staticmethod
+    def exp(var):
+        return Tape_Var._unary(Tape_Op.EXP, var, np.exp)
+
+    @staticmethod
+    def expk(var, k):
+        """ returns a Tape_Var as the result of k ** (var) """
+        return Tape_Var._unary(Tape_Op.RPOW_C, var, lambda x: k ** x, k)
+
+    @staticmethod
+    def logistic(var):
+        return Tape_Var._unary(Tape_Op.LOGISTIC, var, lambda x: 1 / (1 + np.exp(-x)))
+
+    @staticmethod
+    def sqrt(var):
+        return Tape_Var._unary(Tape_Op.SQRT, var, np.sqrt)
+
+    @staticmethod
+    def sinh(var):
+        return Tape_Var._unary(Tape_Op.SINH, var, np.sinh)
+
+    @staticmethod
+    def cosh(var):
+        return Tape_Var._unary(Tape_Op.COSH, var, np.cosh)
+
+    @staticmethod
+    def tanh(var):
+        return Tape_Var._unary(Tape_Op.TANH, var, np.tanh)
+
+    @staticmethod
+    def sin(var):
+        return Tape_Var._unary(Tape_Op.SIN, var, np.sin)
+
+    @staticmethod
+    def cos(var):
+        return Tape_Var._unary(Tape_Op.COS, var, np.cos)
+
+    @staticmethod
+    def tan(var):
+        return Tape_Var._unary(Tape_Op.TAN, var, np.tan)
+
+    @staticmethod
+    def arcsin(var):
+        return Tape_Var._unary(Tape_Op.ARCSIN, var, np.arcsin)
+
+    @staticmethod
+    def arccos(var):
+        return Tape_Var._unary(Tape_Op.ARCCOS, var, np.arccos)
+
+    @staticmethod
+    def arctan(var):
+        return Tape_Var._unary(Tape_Op.ARCTAN, var, np.arctan)
+
+class Compiled_Tape():
+    '''
+    This class defines a recorded Tape that is replayed at new input values without calling the traced function
+    '''
+    def __init__(self, tape, inputs, output):
+        """ constructor for Compiled_Tape class
+
+        INPUT
+        =======
+        tape: the Tape the function was recorded on
+        inputs: a list of Tape_Var input variables of the function
+        output: the Tape_Var returned by the function
+
+        RETURNS
+        =======
+        Compiled_Tape object, only the rows the output depends on are kept
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x, y = tape.variable(1.0), tape.variable(2.0)
+        >>> dead = Tape_Var.exp(x)
+        >>> f = Compiled_Tape(tape, [x, y], x * y + 1)
+        >>> print(len(f.rows))
+        2
+        """
+        out = output.index
+        ops = tape.ops[:out + 1].tolist()
+        parents = tape.parents[:out + 1].tolist()
+        consts = tape.consts[:out + 1].tolist()
+        # rows that never reach the output can be skipped on replay
+        live = [False] * (out + 1)
+        live[out] = True
+        for i in range(out, -1, -1):
+            if live[i]:
+                for p in parents[i]:
+                    if p >= 0:
+                        live[p] = True
+        # an input recorded after the output (eg, the output is itself an input) still needs its row
+        self.size = max([out] + [x.index for x in inputs]) + 1
+        self.output = out
+        self.stats = None # the counts of Tape.optimize, for a tape compiled with AD.compile(func, optimize=True)
+        self.inputs = [x.index for x in inputs]
+        self.values = tape.values[:self.size].tolist() # constants keep their recorded value
+        self.rows = [(i, ops[i], parents[i][0], parents[i][1], consts[i]) for i in range(out + 1)
+                     if live[i] and ops[i] != Tape_Op.INPUT and ops[i] != Tape_Op.CONST]
+
+    def __call__(self, vals):
+        """ replay the tape at new input values
+
+        INPUT
+        =======
+        vals: a list of values for the input variables, 
+              or a 2-D array with one row of input values per evaluation point
+
+        RETURNS
+        =======
+        a Var object with the value and the gradient at vals 
+        (val has shape (batch,) and der has shape (batch, n) for a 2-D vals)
+
+        EXAMPLES
+        =======
+        >>> tape = Tape()
+        >>> x, y = tape.variable(1.0), tape.variable(2.0)
+        >>> f = Compiled_Tape(tape, [x, y], x * y + Tape_Var.sin(x))
+        >>> res = f([0.5, 4.2])
+        >>> print(round(res.val, 6), res.der.round(6))
+        2.579426 [5.077583 0.5     ]
+        >>> res = f(np.array([[0.5, 4.2], [1.0, 2.0]]))
+        >>> print(res.val.round(6), res.der.shape)
+        [2.579426 2.841471] (2, 2)
+        """
+        vals = np.asarray(vals)
+        columns = vals.T if vals.ndim == 2 else vals.tolist()
+        values = list(self.values)
+        for index, val in zip(self.inputs, columns):
+            values[index] = val
+        partials = [None] * self.size
+        for i, op, p0, p1, c in self.rows:
+            values[i], w0, w1 = _RULES[op](values[p0], values[p1] if p1 >= 0 else 0.0, c)
+            partials[i] = (w0, w1)
+
+        adjoint = [0.0] * self.size
+        adjoint[self.output] = 1.0
+        for i, op, p0, p1, c in reversed(self.rows):
+            a = adjoint[i]
+            w0, w1 = partials[i]
+            adjoint[p0] = adjoint[p0] + a * w0
+            if p1 >= 0:
+                adjoint[p1] = adjoint[p1] + a * w1
+        value = values[self.output]
+        der = [adjoint[i] for i in self.inputs]
+        if vals.ndim == 2: # inputs the output does not depend on keep a scalar 0.0 adjoint
+            der = np.column_stack([np.broadcast_to(d, (len(vals),)) for d in der])
+        return Var(value, np.array(der))
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import threading
+import contextlib
+import numpy as np
+from EasyDiff.var import Var
+from EasyDiff.rev_var import Rev_Var
+from EasyDiff.tape_var import Tape_Var
+from EasyDiff.scalar_var import Scalar_Var
+
+# a span that records nothing, for AD objects without a Timeline
+NO_SPAN = contextlib.nullcontext()
+
+class Timeline():
+    '''
+    This class defines a recorder of timed spans that are written as Chrome trace-event JSON,
+    which loads in chrome://tracing, Perfetto or speedscope
+    '''
+    def __init__(self, ops=False, classes=(Var, Rev_Var, Tape_Var, Scalar_Var)):
+        """ constructor for Timeline class
+
+        INPUT
+        =======
+        ops: also record one event per operator and elementary function call of classes,
+             while the outermost span is open (the methods are wrapped only then)
+        classes: the classes whose operations are recorded with ops=True
+
+        RETURNS
+        =======
+        Timeline object: self.events, a list of complete ('X') trace events with times in microseconds
+
+        EXAMPLES
+        =======
+        >>> timeline = Timeline(ops=True)
+        >>> with timeline.span('outer', n=2):
+        ...     with timeline.span('inner'):
+        ...         z = Var(1.0, np.array([1.0])) * 2.0
+        >>> [(event['name'], event['cat']) for event in timeline.events]
+        [('Var.__mul__', 'op'), ('inner', 'phase'), ('outer', 'phase')]
+        >>> print(timeline.events[-1]['args'], timeline.events[-1]['dur'] >= timeline.events[-2]['dur'])
+        {'n': 2} True
+        """
+        self.ops = ops
+        self.classes = classes
+        self.events = []
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+        self.originals = {}
+        self._depth = 0
+
+    def _add(self, name, cat, start, stop, args=None):
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': (start - self.origin) * 1e6, 'dur': (stop - start) * 1e6,
+                 'pid': self.pid, 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, cat='phase', **args):
+        """ a context manager recording one event from entering to leaving it, args are shown in the viewer """
+        if self._depth == 0 and self.ops:
+            self._patch()
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, cat, start, time.perf_counter(), args)
+            self._depth -= 1
+            if self._depth == 0 and self.ops:
+                self._unpatch()
+
+    def _wrap(self, name, func):
+        add, clock = self._add, time.perf_counter
+        def recorded(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(name, 'op', start, clock())
+        return recorded
+
+    def _patch(self):
+        for cls in self.classes:
+            for attr, member in list(vars(cls).items()):
+                if attr == '__init__':
+                    continue
+                name = '{}.{}'.format(cls.__name__, attr)
+                if isinstance(member, staticmethod):
+                    wrapped = staticmethod(self._wrap(name, member.__func__))
+                elif callable(member):
+                    wrapped = self._wrap(name, member)
+                else:
+                    continue
+                self.originals[(cls, attr)] = member
+                setattr(cls, attr, wrapped)
+
+    def _unpatch(self):
+        for (cls, attr), member in self.originals.items():
+            setattr(cls, attr, member)
+        self.originals = {}
+
+    def to_json(self):
+        """ the events as a Chrome trace-event JSON object """
+        return {'traceEvents': sorted(self.events, key=lambda event: event['ts']), 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        """ write the trace-event JSON to path """
+        with open(path, 'w') as f:
+            json.dump(self.to_json(), f)
+
+    def clear(self):
+        """ drop the recorded events """
+        self.events = []
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
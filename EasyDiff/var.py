@@ -1,16 +1,66 @@
 import numpy as np
-import pytest
+
+def _expand(val):
+    """ reshape a batch of values (batch,) to (batch, 1) so that it scales der of shape (batch, n) row by row;
+    a scalar is returned unchanged """
+    # branch on the type first, np.ndim on a python float costs more than the operation it scales
+    if isinstance(val, np.ndarray):
+        return val[..., np.newaxis] if val.ndim else val
+    if isinstance(val, (list, tuple)):
+        return np.expand_dims(val, -1)
+    return val
+
+def _log_base(k, val):
+    """ log of a constant base k in the floating point type of val, so that a float32 val is not promoted to float64 """
+    return np.log(k, dtype=np.result_type(val, 1.0))
+
+# classes whose objects the elementary functions of Var hand to their own elementary function of the same name;
+# Scalar_Var registers itself, so that Var.sin(x) in a function evaluated on it costs no more than Scalar_Var.sin(x)
+_DELEGATES = set()
+
+# numpy ufuncs that map onto an elementary function or an operator of Var and Rev_Var
+_UNARY_UFUNCS = {
+    np.log: 'log', np.exp: 'exp', np.sqrt: 'sqrt',
+    np.sinh: 'sinh', np.cosh: 'cosh', np.tanh: 'tanh',
+    np.sin: 'sin', np.cos: 'cos', np.tan: 'tan',
+    np.arcsin: 'arcsin', np.arccos: 'arccos', np.arctan: 'arctan',
+    np.negative: '__neg__', np.positive: '__pos__',
+}
+_BINARY_UFUNCS = {
+    np.add: ('__add__', '__radd__'), np.subtract: ('__sub__', '__rsub__'),
+    np.multiply: ('__mul__', '__rmul__'), np.true_divide: ('__truediv__', '__rtruediv__'),
+    np.power: ('__pow__', '__rpow__'),
+}
+
+def _apply_ufunc(cls, ufunc, method, inputs, kwargs):
+    """ evaluate a numpy ufunc on cls objects with the methods of cls, so that np.sin(x), np.float64(2.0) * x, ...
+    give a cls object; returns NotImplemented for anything else """
+    if method != '__call__' or kwargs:
+        return NotImplemented
+    if len(inputs) == 1 and ufunc in _UNARY_UFUNCS:
+        return getattr(cls, _UNARY_UFUNCS[ufunc])(inputs[0])
+    if len(inputs) == 2 and ufunc in _BINARY_UFUNCS:
+        forward, reflected = _BINARY_UFUNCS[ufunc]
+        if isinstance(inputs[0], cls):
+            return getattr(inputs[0], forward)(inputs[1])
+        return getattr(inputs[1], reflected)(inputs[0])
+    return NotImplemented
+
 class Var():
     '''
     This class defines a multivariate dual number
     '''
-    def __init__(self, val, dual_paras):
+    def __init__(self, val, dual_paras, dtype=None):
         """ constructor for Var class
 
         INPUT
         =======
-        val: value of the input variable
-        dual_paras: partial derivatives with respect to each input variable
+        val: value of the input variable, or an array of shape (batch,) with one value per evaluation point
+        dual_paras: partial derivatives with respect to each input variable, 
+                    an array of shape (n,), or (batch, n) for a batched val
+        dtype: cast val and dual_paras to this floating point type (None keeps them as given); 
+               every operator and elementary function keeps the type of its operands, 
+               as long as constants are python numbers
         
         RETURNS
         =======
@@ -21,9 +71,33 @@ class Var():
         >>> a = Var(1, np.array([1]))
         >>> print(a.val, a.der)
         1 [1]
+        >>> b = Var(np.array([1., 2., 3.]), np.array([[1., 0.], [1., 0.], [1., 0.]]))
+        >>> print((b * b).der)
+        [[2. 0.]
+         [4. 0.]
+         [6. 0.]]
+        >>> c = Var(2, [1, 0], dtype=np.float32)
+        >>> print((Var.logk(c, 10) * 3.0 + 2 ** c).der.dtype)
+        float32
         """
+        if dtype is not None:
+            val = np.asarray(val, dtype=dtype)[()]
+            if not hasattr(dual_paras, 'toarray'): # a Sparse_Der keeps its entries
+                dual_paras = np.asarray(dual_paras, dtype=dtype)
         self.val = val
         self.der = dual_paras
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """ numpy ufuncs on a Var dispatch to the elementary functions and operators of Var
+
+        EXAMPLES
+        =======
+        >>> x = Var(0.5, np.array([1., 0.]))
+        >>> z = np.sin(x) * np.float64(2.0)
+        >>> print(z.val, z.der)
+        0.958851077208406 [1.75516512 0.        ]
+        """
+        return _apply_ufunc(Var, ufunc, method, inputs, kwargs)
     
     def __add__(self, other):
         """ returns a Var as the result of self + other
@@ -58,11 +132,11 @@ class Var():
         1 + x: {'val': 4, 'der': array([1, 0])}
         
         """
-        try: # two Var objects
+        if isinstance(other, Var): # two Var objects
             value = self.val + other.val
             der = self.der + other.der
             return Var(value, der)
-        except AttributeError: # Var + real number
+        else: # Var + real number
             return Var(self.val + other, self.der)
     
     def __radd__(self, other):
@@ -84,7 +158,8 @@ class Var():
         >>> print(t.val, t.der)
         5 [1]
         """
-        return self + other
+        # only called with a real number, Var + Var goes to __add__
+        return Var(self.val + other, self.der)
 
     def __mul__(self, other):
         """ returns a Var as the result of self * other
@@ -118,12 +193,12 @@ class Var():
         >>> print(vars(z8))  
         {'val': 6, 'der': array([2, 3])}
         """
-        try: # two Var objects
+        if isinstance(other, Var): # two Var objects
             value = self.val * other.val
-            der = self.val*other.der + other.val * self.der # dz / dx1 = dz/dx * dx/dx1 + dz/dy * dy/dx1
+            der = _expand(self.val)*other.der + _expand(other.val) * self.der # dz / dx1 = dz/dx * dx/dx1 + dz/dy * dy/dx1
             return Var(value, der)
-        except AttributeError: # Var * real number
-            return Var(self.val*other, self.der * other)
+        else: # Var * real number
+            return Var(self.val*other, self.der * _expand(other))
 
     def __rmul__(self, other):
         """ returns a Var as the result of other * self
@@ -144,7 +219,8 @@ class Var():
         >>> print(t.val, t.der)
         6 [3]
         """
-        return self * other
+        # only called with a real number, Var * Var goes to __mul__
+        return Var(self.val * other, self.der * _expand(other))
     
     def __sub__(self, other):
         """ returns a Var as the result of self - other
@@ -172,11 +248,11 @@ class Var():
         >>> print('2 - x: {}'.format(vars(z3)))
         2 - x: {'val': -1, 'der': array([-1,  0])}
         """
-        try: # two Var objects
+        if isinstance(other, Var): # two Var objects
             value = self.val - other.val
             der = self.der - other.der
             return Var(value, der)
-        except AttributeError: # Var - real number
+        else: # Var - real number
             return Var(self.val-other, self.der)
 
     def __rsub__(self, other):
@@ -198,7 +274,7 @@ class Var():
         >>> print(t.val, t.der)
         1 [-1]
         """
-        return -1 *(self-other)
+        return Var(other - self.val, -self.der) # one new der instead of three
 
     def __pow__(self, other):
         """ returns a Var as the result of self**(other)
@@ -225,14 +301,14 @@ class Var():
         x ** 2: {'val': 9, 'der': array([6, 0])}
         """
         
-        try: # two Var objects 
+        if isinstance(other, Var): # two Var objects 
         # d(a**c)/dx = d(a**c)/da * (da / dx) + d(a**c)/dc * (dc / dx) 
         # = c*(a**(c-1)) * (da / dx) + a**c*ln(a) * (dc / dx) 
             value = self.val**other.val
-            der = other.val * (self.val ** (other.val - 1)) * self.der + value * np.log(self.val) * other.der
+            der = _expand(other.val * (self.val ** (other.val - 1))) * self.der + _expand(value * np.log(self.val)) * other.der
             return Var(value, der)
-        except AttributeError: # Var ** real number
-            return Var(self.val**other, other * (self.val ** (other-1)) * self.der)
+        else: # Var ** real number
+            return Var(self.val**other, _expand(other * (self.val ** (other-1))) * self.der)
 
     def __rpow__(self, other):
         """ returns a Var as the result of other**(self)
@@ -268,7 +344,7 @@ class Var():
         # the only scenario using this is when other is a real number and self is a Var object
         value = other **self.val
         # d(o ** s)/dx = o**s *log(o)*( ds/dx)
-        der = value * np.log(other) * self.der
+        der = _expand(value * _log_base(other, self.val)) * self.der
         return Var(value, der)
 
     def __truediv__(self, other):
@@ -287,12 +363,20 @@ class Var():
         ======= 
         >>> x = Var(3, np.array([1,0]))
         >>> y = Var(2, np.array([0,1]))
-        >>> p = x * (y * (-1))
+        >>> p = x / y
         >>> print(p.val, p.der)
-        -6 [-2 -3]
-        
+        1.5 [ 0.5  -0.75]
+        >>> p = x / 2
+        >>> print(p.val, p.der)
+        1.5 [0.5 0. ]
         """
-        return self * (other ** (-1))
+        if isinstance(other, Var): # two Var objects
+            value = self.val / other.val
+            # d(a/b)/dx = (da/dx - a/b * db/dx) / b
+            der = (self.der - _expand(value) * other.der) / _expand(other.val)
+            return Var(value, der)
+        else: # Var / real number
+            return Var(self.val / other, self.der / _expand(other))
     
     def __rtruediv__(self, other):
         """ returns a Var as the result of other / self
@@ -309,12 +393,14 @@ class Var():
         EXAMPLES
         =======
         >>> x = Var(2, np.array([1,0]))
-        >>> y = 2
-        >>> v = y*(x**(-1))
+        >>> v = 2 / x
         >>> print(v.val, v.der)
         1.0 [-0.5 -0. ]
         """
-        return other*(self**(-1))
+        # the only scenario using this is when other is a real number and self is a Var object
+        value = other / self.val
+        # d(o/s)/dx = -o/s**2 * ds/dx
+        return Var(value, _expand(-value / self.val) * self.der)
     
     def __neg__(self):
         """ returns a Var as the result of - self
@@ -334,7 +420,7 @@ class Var():
         >>> print(p.val, p.der)
         -2 [-1]
         """
-        return (-1)*self
+        return Var(-self.val, -self.der)
 
     def __pos__(self):
         """ returns a Var as the result of + self
@@ -377,9 +463,9 @@ class Var():
         >>> print(x == z)
         True
         """
-        try:
+        if isinstance(other, Var):
             return (self.val == other.val) & (list(self.der) == list(other.der))
-        except AttributeError:
+        else:
             return False
 
     def __ne__(self, other):
@@ -404,9 +490,9 @@ class Var():
         >>> print(x != z)
         False
         """
-        try:
+        if isinstance(other, Var):
             return (self.val != other.val) | (list(self.der) != list(other.der))
-        except AttributeError:
+        else:
             return True
 
     @staticmethod
@@ -428,11 +514,13 @@ class Var():
         >>> print('log(x): {}'.format(vars(z1)))
         log(x): {'val': 1.0986122886681098, 'der': array([0.33333333, 0.        ])}
         """
-        try:
+        if isinstance(var, Var):
             val = np.log(var.val)
-            der = np.array(list(map(lambda x: x / var.val, var.der)))
+            der = var.der / _expand(var.val)
             return Var(val, der)
-        except AttributeError:
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).log(var)
+        else:
             return np.log(var)
         
     @staticmethod
@@ -455,11 +543,14 @@ class Var():
         >>> print('logk(x, 3.0): {}'.format(vars(z1)))
         logk(x, 3.0): {'val': 1.0, 'der': array([0.30341308, 0.        ])}
         """
-        try:
-            val = np.log(var.val) / np.log(k)
-            der = np.array(list(map(lambda x: x / var.val * (1/np.log(k)), var.der)))
+        if isinstance(var, Var):
+            log_k = _log_base(k, var.val)
+            val = np.log(var.val) / log_k
+            der = _expand(1 / (var.val * log_k)) * var.der # one pass over der
             return Var(val, der)
-        except AttributeError:
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).logk(var, k)
+        else:
             return np.log(var) / np.log(k)
         
     @staticmethod
@@ -481,11 +572,13 @@ class Var():
         >>> print('exp(x): {}'.format(vars(z1)))
         exp(x): {'val': 20.085536923187668, 'der': array([20.08553692,  0.        ])}
         """
-        try:
+        if isinstance(var, Var):
             val = np.exp(var.val)
-            der = np.array(list(map(lambda x: x * val, var.der)))
+            der = var.der * _expand(val)
             return Var(val, der)
-        except AttributeError:
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).exp(var)
+        else:
             return np.exp(var)
     
     @staticmethod
@@ -505,16 +598,18 @@ class Var():
         =======
         >>> x = Var(3, np.array([1,0]))
         >>> z = Var.expk(x, 4)
-        >>> z.val == pytest.approx(4**3)
+        >>> np.allclose(z.val, 4**3)
         True
-        >>> z.der== pytest.approx([4**3*np.log(4), 0])
+        >>> np.allclose(z.der, [4**3*np.log(4), 0])
         True
         """
-        try: # var is a Var variable
+        if isinstance(var, Var): # var is a Var variable
             val = k ** var.val
-            der = val * np.log(k) * var.der
+            der = _expand(val * _log_base(k, var.val)) * var.der
             return Var(val, der)
-        except AttributeError: # var is a real number
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).expk(var, k)
+        else: # var is a real number
             return k ** var
         
     @staticmethod
@@ -533,16 +628,18 @@ class Var():
         =======
         >>> x = Var(3.0, np.array([1,0]))
         >>> z = Var.logistic(x)
-        >>> z.val == pytest.approx(1 / (1 + np.exp(-3)))
+        >>> np.allclose(z.val, 1 / (1 + np.exp(-3)))
         True
-        >>> z.der == pytest.approx([np.exp(3) / ((1 + np.exp(3))**2), 0])
+        >>> np.allclose(z.der, [np.exp(3) / ((1 + np.exp(3))**2), 0])
         True
         """
-        try:
+        if isinstance(var, Var):
             val = 1 / (1 + np.exp(-var.val)) # logistic(x) = 1 / (1 + e^(-x))
-            der =  val * (1-val) * var.der# dz/x1 = dz/dx * dx/dx1 = (e^x/ ((1 + e^x)**2)) * dx/dx1
+            der =  _expand(val * (1-val)) * var.der# dz/x1 = dz/dx * dx/dx1 = (e^x/ ((1 + e^x)**2)) * dx/dx1
             return Var(val, der)
-        except AttributeError: # var is a real number
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).logistic(var)
+        else: # var is a real number
             return 1 / (1 + np.exp(-var))
 
     @staticmethod
@@ -564,11 +661,13 @@ class Var():
         >>> print('sqrt(x): {}'.format(vars(z1)))
         sqrt(x): {'val': 1.7320508075688772, 'der': array([0.28867513, 0.        ])}
         """
-        try:
+        if isinstance(var, Var):
             val = np.sqrt(var.val)
-            der = np.array(list(map(lambda x: 0.5 * (var.val ** (-0.5)) * x, var.der)))
+            der = _expand(0.5 / val) * var.der
             return Var(val, der)
-        except AttributeError:
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).sqrt(var)
+        else:
             return np.sqrt(var)
 
     @staticmethod
@@ -587,17 +686,19 @@ class Var():
         =======
         >>> x = Var(3, np.array([1,0])) 
         >>> z = Var.sinh(x)
-        >>> z.val == pytest.approx((np.exp(3)-np.exp(-3)) / 2)
+        >>> np.allclose(z.val, (np.exp(3)-np.exp(-3)) / 2)
         True
-        >>> z.der == pytest.approx([(np.exp(3)+np.exp(-3)) / 2, 0])
+        >>> np.allclose(z.der, [(np.exp(3)+np.exp(-3)) / 2, 0])
         True
         """
-        try:
-            val = (np.exp(var.val) - np.exp(-var.val)) / 2 # sinh(x) = (e^x - e^(-x)) / 2
-            # df/dx1 = df/dx * dx/dx1 = (e^x + e^(-x)) / 2 * dx/dx1
-            der = ((np.exp(var.val) + np.exp(-var.val)) / 2) * var.der
+        if isinstance(var, Var):
+            val = np.sinh(var.val)
+            # df/dx1 = cosh(x) * dx/dx1; the sinh and cosh ufuncs are cheaper and more accurate than e^x and e^(-x)
+            der = _expand(np.cosh(var.val)) * var.der
             return Var(val, der)
-        except: # var is a real number
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).sinh(var)
+        else: # var is a real number
             return (np.exp(var) - np.exp(-var)) / 2
     
     @staticmethod
@@ -616,17 +717,18 @@ class Var():
         =======
         >>> x = Var(3, np.array([1,0])) 
         >>> z = Var.cosh(x)
-        >>> z.val == pytest.approx((np.exp(3)+np.exp(-3)) / 2)
+        >>> np.allclose(z.val, (np.exp(3)+np.exp(-3)) / 2)
         True
-        >>> z.der == pytest.approx([(np.exp(3)-np.exp(-3)) / 2, 0])
+        >>> np.allclose(z.der, [(np.exp(3)-np.exp(-3)) / 2, 0])
         True
         """
-        try:
-            val = (np.exp(var.val) + np.exp(-var.val)) / 2 # # cosh(x) = (e^x + e^(-x)) / 2
-            # df/dx1 = df/dx * dx/dx1 = (e^x - e^(-x)) / 2 * dx/dx1
-            der = ((np.exp(var.val) - np.exp(-var.val)) / 2) * var.der
+        if isinstance(var, Var):
+            val = np.cosh(var.val)
+            der = _expand(np.sinh(var.val)) * var.der # df/dx1 = sinh(x) * dx/dx1
             return Var(val, der)
-        except: # var is a real number
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).cosh(var)
+        else: # var is a real number
             return (np.exp(var) + np.exp(-var)) / 2
 
     @staticmethod
@@ -645,14 +747,18 @@ class Var():
         =======
         >>> x = Var(3, np.array([1,0])) 
         >>> z = Var.tanh(x)
-        >>> z.val == pytest.approx((np.exp(3)-np.exp(-3)) / (np.exp(3)+np.exp(-3)))
+        >>> np.allclose(z.val, (np.exp(3)-np.exp(-3)) / (np.exp(3)+np.exp(-3)))
         True
-        >>> z.der == pytest.approx([4 / (np.exp(6) + np.exp(-6) + 2), 0])
+        >>> np.allclose(z.der, [4 / (np.exp(6) + np.exp(-6) + 2), 0])
         True
         """
-        try:
-            return Var.sinh(var) / Var.cosh(var)
-        except: # var is a real number
+        if isinstance(var, Var):
+            val = np.tanh(var.val)
+            der = _expand(1 - val * val) * var.der # df/dx1 = (1 - tanh(x)^2) * dx/dx1
+            return Var(val, der)
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).tanh(var)
+        else: # var is a real number
             return (np.exp(var) - np.exp(-var)) / (np.exp(var) + np.exp(-var))
     
     @staticmethod
@@ -674,11 +780,13 @@ class Var():
         >>> print('sin(x): {}'.format(vars(z1)))
         sin(x): {'val': 0.1411200080598672, 'der': array([-0.9899925, -0.       ])}
         """
-        try:
+        if isinstance(var, Var):
             val = np.sin(var.val)
-            der = np.array(list(map(lambda x: np.cos(var.val) * x, var.der)))
+            der = _expand(np.cos(var.val)) * var.der
             return Var(val, der)
-        except AttributeError:
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).sin(var)
+        else:
             return np.sin(var)
 
     @staticmethod
@@ -700,11 +808,13 @@ class Var():
         >>> print('cos(x): {}'.format(vars(z1)))
         cos(x): {'val': -0.9899924966004454, 'der': array([-0.14112001, -0.        ])}
         """
-        try:
+        if isinstance(var, Var):
             val = np.cos(var.val)
-            der = np.array(list(map(lambda x: -np.sin(var.val) * x, var.der)))
+            der = _expand(-np.sin(var.val)) * var.der
             return Var(val, der)
-        except AttributeError:
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).cos(var)
+        else:
             return np.cos(var)
         
 
@@ -728,11 +838,13 @@ class Var():
         tan(x): {'val': -0.1425465430742778, 'der': array([1.02031952, 0.        ])}
     
         """
-        try:
+        if isinstance(var, Var):
             val = np.tan(var.val)
-            der = np.array(list(map(lambda x: 1 / (np.cos(var.val) ** 2) * x, var.der)))
+            der = _expand(1 + val * val) * var.der # 1 / cos(x)^2 = 1 + tan(x)^2
             return Var(val, der)
-        except AttributeError:
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).tan(var)
+        else:
             return np.tan(var)
 
     @staticmethod
@@ -754,11 +866,13 @@ class Var():
         >>> print('arcsin(x): {}'.format(vars(z1)))
         arcsin(x): {'val': 0.5235987755982988, 'der': array([1.15470054, 0.        ])}
         """
-        try:
+        if isinstance(var, Var):
             val = np.arcsin(var.val)
-            der = np.array(list(map(lambda x: 1 / ((1 - var.val ** 2) ** 0.5) * x, var.der)))
+            der = _expand(1 / np.sqrt(1 - var.val * var.val)) * var.der
             return Var(val, der)
-        except AttributeError:
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).arcsin(var)
+        else:
             return np.arcsin(var)
 
     @staticmethod
@@ -780,11 +894,13 @@ class Var():
         >>> print('arccos(x): {}'.format(vars(z1)))
         arccos(x): {'val': 1.0471975511965976, 'der': array([-1.15470054, -0.        ])}
         """
-        try:
+        if isinstance(var, Var):
             val = np.arccos(var.val)
-            der = np.array(list(map(lambda x: -1 / ((1 - var.val ** 2) ** 0.5) * x, var.der)))
+            der = _expand(-1 / np.sqrt(1 - var.val * var.val)) * var.der
             return Var(val, der)
-        except AttributeError:
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).arccos(var)
+        else:
             return np.arccos(var)
 
     @staticmethod
@@ -806,11 +922,13 @@ class Var():
         >>> print('arctan(x): {}'.format(vars(z1)))
         arctan(x): {'val': 1.2490457723982544, 'der': array([0.1, 0. ])}
         """
-        try:
+        if isinstance(var, Var):
             val = np.arctan(var.val)
-            der = np.array(list(map(lambda x: 1 / (1 + var.val ** 2) * x, var.der)))
+            der = _expand(1 / (1 + var.val * var.val)) * var.der
             return Var(val, der)
-        except AttributeError:
+        elif type(var) in _DELEGATES: # a Scalar_Var
+            return type(var).arctan(var)
+        else:
             return np.arctan(var)
 
 if __name__ == "__main__":
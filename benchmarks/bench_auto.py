@@ -0,0 +1,43 @@
+"""
+Cost per operation of forward and reverse mode, which the AUTO mode cost model in ad.py is calibrated on,
+and the time of AUTO mode against both fixed modes: for one function returning m outputs 
+(recorded once, swept once per output) and for a list of m functions (recorded and swept one by one), 
+with the same number of operations in total. The Var backend is timed (scalar=False).
+
+    python -m benchmarks.bench_auto
+"""
+import numpy as np
+from EasyDiff.ad import AD, AD_Mode
+from benchmarks.common import best_time, result, report
+
+def system(m, ops):
+    def func(*xs):
+        z, outputs = 0, []
+        for i in range(ops):
+            x = xs[i % len(xs)]
+            z = z + np.sin(x) * x
+            if (i + 1) % (ops // m) == 0:
+                outputs.append(z)
+        return outputs[:m]
+    return func
+
+def functions(m, ops):
+    # m single-output functions, with ops operations in total
+    parts = [system(1, ops // m) for _ in range(m)]
+    return [lambda *xs, part=part: part(*xs)[0] for part in parts]
+
+def run(quick=False):
+    ops = 100 if quick else 400
+    res = []
+    for n, m in [(2, 1), (2, 20), (100, 1), (100, 20), (2000, 1), (2000, 20)]:
+        vals = np.linspace(1.0, 2.0, n)
+        for kind, funcs in [('system', system(m, ops)), ('list', functions(m, ops))]:
+            case = '{} n={} m={}'.format(kind, n, m)
+            for name, mode in [('forward', AD_Mode.FORWARD), ('reverse', AD_Mode.REVERSE), ('auto', AD_Mode.AUTO)]:
+                ad = AD(vals, np.ones(n), mode, scalar=False)
+                t = best_time(lambda: ad.jac_matrix(funcs), repeat=1 if quick else 3)
+                res.append(result('auto', case, name + ' time per op', t / (3 * ops), 's'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
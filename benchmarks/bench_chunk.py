@@ -0,0 +1,30 @@
+"""
+Chunked forward mode: time and peak memory of AD.auto_diff for different chunk sizes.
+
+    python -m benchmarks.bench_chunk
+"""
+import numpy as np
+from EasyDiff.ad import AD
+from EasyDiff.var import Var
+from benchmarks.common import best_time, peak_memory, result, report
+
+def objective(*xs):
+    z = 0
+    for a, b in zip(xs[:-1], xs[1:]):
+        z = z + Var.sin(a) * b
+    return z
+
+def run(quick=False):
+    n = 200 if quick else 2000
+    vals = np.linspace(0.1, 1.0, n)
+    res = []
+    for chunk in (None, 16, 64, 256, n):
+        case = 'n={} chunk={}'.format(n, chunk or 'none')
+        run_once = lambda: AD(vals, np.ones(n), chunk=chunk).auto_diff(objective)
+        _, peak = peak_memory(run_once)
+        res.append(result('chunk', case, 'time', best_time(run_once, repeat=3), 's'))
+        res.append(result('chunk', case, 'peak memory', peak, 'B'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,33 @@
+"""
+Per-call cost of generated straight-line code against replaying a compiled tape and AD.auto_diff.
+
+    python -m benchmarks.bench_codegen
+"""
+import numpy as np
+from EasyDiff.ad import AD, AD_Mode
+from EasyDiff.tape_var import Tape_Var
+from benchmarks.bench_compile import objective
+from benchmarks.common import best_time, result, report
+
+def run(quick=False):
+    number = 20 if quick else 200
+    vals = np.array([0.5, 1.5, 2.5, 3.5, 4.5])
+    ad = AD(vals, np.ones(5), AD_Mode.TAPE)
+    f = objective(Tape_Var)
+    compiled = ad.compile(f)
+    reverse, forward = ad.generate(f), ad.generate(f, mode='forward')
+    res = [
+        result('codegen', 'auto_diff tape', 'per call', best_time(lambda: ad.auto_diff(f), number=number), 's'),
+        result('codegen', 'compiled replay', 'per call', best_time(lambda: compiled(vals), number=number), 's'),
+        result('codegen', 'generated reverse', 'per call', best_time(lambda: reverse(vals), number=number), 's'),
+        result('codegen', 'generated forward', 'per call', best_time(lambda: forward(vals), number=number), 's'),
+        result('codegen', 'generated reverse, raw function', 'per call', best_time(lambda: reverse.func(*vals), number=number), 's'),
+    ]
+    points = np.random.RandomState(0).uniform(0.5, 2.0, size=(1000, 5))
+    for name, f in (('compiled replay', compiled), ('generated reverse', reverse)):
+        res.append(result('codegen', name + ' 1000 points', 'per point',
+                          best_time(lambda: f(points), number=max(1, number // 20)) / len(points), 's'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
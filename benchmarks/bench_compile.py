@@ -0,0 +1,38 @@
+"""
+Per-call overhead of AD.auto_diff versus replaying a compiled tape.
+
+    python -m benchmarks.bench_compile
+"""
+import numpy as np
+from EasyDiff.ad import AD, AD_Mode
+from EasyDiff.var import Var
+from EasyDiff.rev_var import Rev_Var
+from EasyDiff.tape_var import Tape_Var
+from benchmarks.common import best_time, result, report
+
+def objective(cls):
+    def f(a, b, c, d, e):
+        s = a * b + cls.sin(c) * d - e / a
+        return cls.exp(s * 0.01) + cls.log(b * b + 1) * cls.sqrt(d * d + e * e) + s ** 2
+    return f
+
+def run(quick=False):
+    number = 20 if quick else 200
+    vals = np.array([0.5, 1.5, 2.5, 3.5, 4.5])
+    ders = np.ones(5)
+    res = []
+    for name, mode, cls in (('forward', AD_Mode.FORWARD, Var), ('reverse', AD_Mode.REVERSE, Rev_Var), ('tape', AD_Mode.TAPE, Tape_Var)):
+        ad = AD(vals, ders, mode)
+        f = objective(cls)
+        res.append(result('compile', 'auto_diff ' + name, 'per call', best_time(lambda: ad.auto_diff(f), number=number), 's'))
+
+    compiled = AD(vals, ders, AD_Mode.TAPE).compile(objective(Tape_Var))
+    res.append(result('compile', 'compiled replay', 'per call', best_time(lambda: compiled(vals), number=number), 's'))
+
+    points = np.random.RandomState(0).uniform(0.5, 2.0, size=(1000, 5))
+    res.append(result('compile', 'compiled replay 1000 points', 'per point',
+                      best_time(lambda: compiled(points), number=max(1, number // 20)) / len(points), 's'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,41 @@
+"""
+Operators on a mix of variables and constants (python floats and ints, numpy scalars, constant arrays),
+the way objectives are usually written: time per evaluation in forward and reverse mode.
+
+    python -m benchmarks.bench_dispatch
+"""
+import numpy as np
+from EasyDiff.var import Var
+from EasyDiff.rev_var import Rev_Var
+from benchmarks.common import best_time, result, report
+
+WEIGHT = np.float64(0.75)
+
+def objective(x, y, z):
+    # 20 operations, 14 of them with a constant operand
+    u = 3.0 * x + 2 - y / 4.0 + WEIGHT * z
+    v = (x - 1.5) * (y + 0.5) - 2.0 / z + z ** 2
+    w = 1 - u * 0.1 + v / 3 + x * y
+    return w * w - 0.5 * u + v
+
+def batched(x, y, z):
+    # constant arrays of one entry per sample as well
+    scale = np.linspace(0.5, 1.5, 64)
+    return objective(x, y, z) * scale + scale - x
+
+def run(quick=False):
+    number = 200 if quick else 2000
+    res = []
+    x, y, z = Var(0.5, np.array([1., 0., 0.])), Var(1.5, np.array([0., 1., 0.])), Var(2.5, np.array([0., 0., 1.]))
+    res.append(result('dispatch', 'Var scalars', 'per evaluation', best_time(lambda: objective(x, y, z), number=number), 's'))
+    def reverse():
+        a, b, c = Rev_Var(0.5), Rev_Var(1.5), Rev_Var(2.5)
+        objective(a, b, c)
+    res.append(result('dispatch', 'Rev_Var scalars', 'per evaluation', best_time(reverse, number=number), 's'))
+    vals = [np.linspace(0.5, 1.5, 64) + i for i in range(3)]
+    xs = [Var(v, np.tile(np.eye(3)[i], (64, 1))) for i, v in enumerate(vals)]
+    res.append(result('dispatch', 'Var batch=64', 'per evaluation', best_time(lambda: batched(*xs), number=number // 4), 's'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,37 @@
+"""
+Division, reciprocal, negation and reverse subtraction on a division-heavy objective:
+time per evaluation, Rev_Var graph size and peak memory in both modes.
+
+    python -m benchmarks.bench_division
+"""
+import numpy as np
+from EasyDiff.ad import AD, AD_Mode
+from EasyDiff.rev_var import Rev_Var
+from EasyDiff.graph_stats import graph_stats
+from benchmarks.common import best_time, peak_memory, result, report
+
+def ratios(*xs):
+    z = 0.0
+    for a, b in zip(xs[:-1], xs[1:]):
+        z = z + a / b - 1.0 / a + (2.0 - b) * -a
+    return z
+
+def run(quick=False):
+    res = []
+    for n in ([10, 100] if quick else [10, 100, 1000]):
+        vals = np.linspace(1.0, 2.0, n)
+        for name, mode in (('forward', AD_Mode.FORWARD), ('reverse', AD_Mode.REVERSE)):
+            ad = AD(vals, np.ones(n), mode)
+            case = '{} n={}'.format(name, n)
+            res.append(result('division', case, 'auto_diff', best_time(lambda: ad.auto_diff(ratios), repeat=3), 's'))
+            _, peak = peak_memory(lambda: AD(vals, np.ones(n), mode).auto_diff(ratios))
+            res.append(result('division', case, 'peak memory', peak, 'B'))
+        xs = [Rev_Var(val) for val in vals]
+        ratios(*xs)
+        stats = graph_stats(xs)
+        res.append(result('division', 'reverse n={}'.format(n), 'graph nodes', stats['nodes'], ''))
+        res.append(result('division', 'reverse n={}'.format(n), 'graph bytes', stats['bytes'], 'B'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
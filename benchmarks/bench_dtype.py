@@ -0,0 +1,37 @@
+"""
+float32 against float64 ders: forward mode work on large der arrays is bound by memory traffic,
+so halving the bytes per entry shows up in both the time and the peak memory.
+
+    python -m benchmarks.bench_dtype
+"""
+import numpy as np
+from EasyDiff.ad import AD, AD_Mode
+from benchmarks.common import best_time, peak_memory, result, report
+
+def objective(*xs):
+    z = xs[0]
+    for x in xs[1:]:
+        z = z * np.sin(x) + x ** 2 / (1.0 + np.exp(z * 0.1))
+    return z
+
+def run(quick=False):
+    res = []
+    n = 8
+    batch = 20000 if quick else 200000
+    points = np.random.RandomState(0).uniform(0.5, 1.5, size=(batch, n))
+    width = 500 if quick else 4000
+    vals = np.linspace(0.5, 1.5, width)
+    for dtype in (np.float64, np.float32):
+        name = np.dtype(dtype).name
+        ad = AD(points[0], np.ones(n), AD_Mode.FORWARD, dtype=dtype)
+        case = 'batch={} n={} {}'.format(batch, n, name)
+        res.append(result('dtype', case, 'jac_matrix_batch', best_time(lambda: ad.jac_matrix_batch([objective], points), repeat=3), 's'))
+        _, peak = peak_memory(lambda: ad.jac_matrix_batch([objective], points))
+        res.append(result('dtype', case, 'peak memory', peak, 'B'))
+        wide = AD(vals, np.ones(width), AD_Mode.FORWARD, dtype=dtype)
+        case = 'n={} {}'.format(width, name)
+        res.append(result('dtype', case, 'auto_diff', best_time(lambda: wide.auto_diff(objective), repeat=3), 's'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
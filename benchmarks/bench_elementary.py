@@ -0,0 +1,42 @@
+"""
+Cost of every elementary function of Var for der widths 1, 100 and 10^4, and of Rev_Var
+(one node, whose weight does not depend on the number of inputs).
+
+    python -m benchmarks.bench_elementary
+"""
+import numpy as np
+from EasyDiff.var import Var
+from EasyDiff.rev_var import Rev_Var
+from benchmarks.bench_ops import ELEMENTARY
+from benchmarks.common import best_time, result, report
+
+FUNCTIONS = ELEMENTARY + ['logk', 'expk']
+
+def call(cls, name):
+    """ the elementary function name of cls as a function of one operand """
+    if name == 'logk':
+        return lambda x: cls.logk(x, 3.0)
+    if name == 'expk':
+        return lambda x: cls.expk(x, 3.0)
+    return getattr(cls, name)
+
+def run(quick=False):
+    number = 200 if quick else 2000
+    res = []
+    for width in (1, 100, 10000):
+        x = Var(0.3, np.linspace(0.5, 1.5, width))
+        for name in FUNCTIONS:
+            func = call(Var, name)
+            res.append(result('elementary', 'Var {} width={}'.format(name, width), 'per call',
+                              best_time(lambda: func(x), number=number // 10 if width == 10000 else number), 's'))
+    for name in FUNCTIONS:
+        func = call(Rev_Var, name)
+        def trial():
+            x = Rev_Var(0.3) # a fresh operand per trial, so its children list does not keep growing
+            for _ in range(number):
+                func(x)
+        res.append(result('elementary', 'Rev_Var ' + name, 'per call', best_time(trial) / number, 's'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,64 @@
+"""
+Import time of EasyDiff, measured with python -X importtime in a fresh interpreter, against the budget
+in benchmarks/import_budget.json: the time spent on top of importing numpy, and modules that must not be imported.
+
+    python -m benchmarks.bench_import
+"""
+import os
+import sys
+import json
+import subprocess
+from benchmarks.common import result, report
+
+BUDGET = os.path.join(os.path.dirname(__file__), 'import_budget.json')
+
+def importtime(statement):
+    """ returns {module: cumulative microseconds} for a fresh interpreter running statement,
+    the top level imports are also summed up under 'total' """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None) # measure imports from cached bytecode, as installed packages are
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=root, env=env,
+                          stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {'total': 0}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+        if name[1:3] != '  ': # a top level import
+            times['total'] += int(cumulative)
+    return times
+
+def run(quick=False):
+    with open(BUDGET) as f:
+        budget = json.load(f)
+    best, times = None, None
+    for _ in range(2 if quick else 5): # the fastest of a few fresh interpreters, the first one may compile bytecode
+        trial = importtime(budget['statement'])
+        overhead = (trial['total'] - trial.get('numpy', 0)) / 1000
+        if best is None or overhead < best:
+            best, times = overhead, trial
+    res = [result('import', budget['statement'], 'total', times['total'] / 1000, 'ms'),
+           result('import', budget['statement'], 'numpy', times.get('numpy', 0) / 1000, 'ms'),
+           result('import', budget['statement'], 'overhead', best, 'ms'),
+           result('import', budget['statement'], 'budget', budget['overhead_ms'], 'ms')]
+    for module in budget['forbidden']:
+        res.append(result('import', budget['statement'], 'imports ' + module, int(module in times), 'bool'))
+    return res
+
+def check(results):
+    """ returns the list of broken budget entries """
+    values = {r['metric']: r['value'] for r in results}
+    broken = [m for m, v in values.items() if m.startswith('imports ') and v]
+    if values['overhead'] > values['budget']:
+        broken.append('overhead')
+    return broken
+
+if __name__ == "__main__":
+    results = run()
+    report(results)
+    broken = check(results)
+    if broken:
+        print('over budget: ' + ', '.join(broken))
+        sys.exit(1)
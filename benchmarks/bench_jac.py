@@ -0,0 +1,30 @@
+"""
+Forward mode Jacobian of a 50-output system: a list of 50 functions against one function returning all outputs.
+
+    python -m benchmarks.bench_jac
+"""
+import numpy as np
+from EasyDiff.ad import AD
+from EasyDiff.var import Var
+from benchmarks.common import best_time, result, report
+
+def system(*xs):
+    # every output reuses the same (expensive) shared term
+    shared = 0
+    for x in xs:
+        shared = shared + Var.exp(Var.sin(x)) * x
+    return [shared * x + Var.log(x) for x in xs]
+
+def run(quick=False):
+    m = 50
+    vals = np.linspace(1.0, 2.0, m)
+    ad = AD(vals, np.ones(m))
+    funcs = [lambda *xs, i=i: system(*xs)[i] for i in range(m)]
+    repeat = 1 if quick else 3
+    return [
+        result('jac', 'm=n={} list of functions'.format(m), 'time', best_time(lambda: ad.jac_matrix(funcs), repeat=repeat), 's'),
+        result('jac', 'm=n={} one function'.format(m), 'time', best_time(lambda: ad.jac_matrix(system), repeat=repeat), 's'),
+    ]
+
+if __name__ == "__main__":
+    report(run())
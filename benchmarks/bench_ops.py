@@ -0,0 +1,58 @@
+"""
+Per-operation cost of every Var and Rev_Var operator and elementary function.
+Var operands carry a der of width 10; Rev_Var times include recording the node, not the backward sweep.
+
+    python -m benchmarks.bench_ops
+"""
+import numpy as np
+from EasyDiff.var import Var
+from EasyDiff.rev_var import Rev_Var
+from benchmarks.common import best_time, result, report
+
+# name -> operation on two operands x, y in (0, 1) of the same class
+OPERATIONS = {
+    'add': lambda x, y: x + y,
+    'add real': lambda x, y: x + 2.0,
+    'radd': lambda x, y: 2.0 + x,
+    'sub': lambda x, y: x - y,
+    'rsub': lambda x, y: 2.0 - x,
+    'mul': lambda x, y: x * y,
+    'mul real': lambda x, y: x * 2.0,
+    'rmul': lambda x, y: 2.0 * x,
+    'truediv': lambda x, y: x / y,
+    'truediv real': lambda x, y: x / 2.0,
+    'rtruediv': lambda x, y: 2.0 / x,
+    'pow': lambda x, y: x ** y,
+    'pow real': lambda x, y: x ** 2.0,
+    'rpow': lambda x, y: 2.0 ** x,
+    'neg': lambda x, y: -x,
+}
+ELEMENTARY = ['log', 'exp', 'logistic', 'sqrt', 'sinh', 'cosh', 'tanh', 'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan']
+
+def operations(cls):
+    ops = dict(OPERATIONS)
+    for name in ELEMENTARY:
+        ops[name] = (lambda f: lambda x, y: f(x))(getattr(cls, name))
+    ops['logk'] = lambda x, y: cls.logk(x, 3.0)
+    ops['expk'] = lambda x, y: cls.expk(x, 3.0)
+    return ops
+
+def run(quick=False):
+    number = 200 if quick else 2000
+    res = []
+    width = 10
+    x = Var(0.3, np.eye(width)[0])
+    y = Var(0.6, np.eye(width)[1])
+    for name, op in operations(Var).items():
+        res.append(result('ops', 'Var ' + name, 'per op', best_time(lambda: op(x, y), number=number), 's'))
+    # fresh operands for every trial, so children lists do not keep growing
+    for name, op in operations(Rev_Var).items():
+        def trial():
+            a, b = Rev_Var(0.3), Rev_Var(0.6)
+            for _ in range(number):
+                op(a, b)
+        res.append(result('ops', 'Rev_Var ' + name, 'per op', best_time(trial) / number, 's'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,37 @@
+"""
+Scaling of AD.jac_matrix_many with the number of worker processes.
+Run it on a multi-core machine, the speedup is bounded by the number of CPUs.
+
+    python -m benchmarks.bench_parallel
+"""
+import os
+import numpy as np
+from EasyDiff.ad import AD
+from EasyDiff.var import Var
+from benchmarks.common import best_time, result, report
+
+def f1(x, y, z):
+    return Var.log(x) ** Var.sin(y) + Var.exp(z * 0.1) * x
+
+def f2(x, y, z):
+    return Var.sqrt(x * x + y * y) / z - Var.tanh(x * y)
+
+def run(quick=False):
+    points = np.random.RandomState(0).uniform(1.5, 3.0, size=(500 if quick else 20000, 3))
+    ad = AD(points[0], np.ones(3))
+    cpus = os.cpu_count() or 1
+    res, serial = [], None
+    for workers in sorted(set([1, 2, 4, 8, cpus])):
+        if workers > cpus:
+            continue
+        ad.jac_matrix_many([f1, f2], points[:4 * workers], workers=workers) # start the pool outside the timing
+        t = best_time(lambda: ad.jac_matrix_many([f1, f2], points, workers=workers), repeat=1 if quick else 3)
+        serial = serial or t
+        case = '{} points workers={}'.format(len(points), workers)
+        res.append(result('parallel', case, 'time', t, 's'))
+        res.append(result('parallel', case, 'speedup', serial / t, 'x'))
+    AD.shutdown_workers()
+    return res
+
+if __name__ == "__main__":
+    report(run())
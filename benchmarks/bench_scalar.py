@@ -0,0 +1,51 @@
+"""
+FORWARD mode auto_diff and jac_matrix of small functions, on Scalar_Var (the default for up to 8 inputs)
+against Var (scalar=False), for 1 to 16 inputs, and the cost of every elementary function of both.
+Scalar_Var stops being faster somewhere between 16 and 24 inputs; _SCALAR_MAX_DIMEN in EasyDiff/ad.py
+stays well below that.
+
+    python -m benchmarks.bench_scalar
+"""
+import numpy as np
+from EasyDiff.ad import AD, AD_Mode
+from EasyDiff.var import Var
+from EasyDiff.scalar_var import Scalar_Var
+from benchmarks.bench_elementary import FUNCTIONS, call
+from benchmarks.common import best_time, result, report
+
+def objective(*xs):
+    # a dozen operations per input, mixing operators, constants and elementary functions
+    z = 0.0
+    for x in xs:
+        z = z + Var.sin(x) * x - Var.exp(x / 4.0) + Var.sqrt(x * x + 1.0) ** 2 / (1.5 + Var.logistic(x))
+    return z
+
+def outputs(*xs):
+    # one output per input
+    total = sum(xs)
+    return [Var.log(x + 2.0) * total for x in xs]
+
+def run(quick=False):
+    number = 50 if quick else 500
+    res = []
+    for dimen in (1, 2, 4, 8, 16):
+        vals, ders = np.linspace(0.5, 1.5, dimen), np.ones(dimen)
+        for scalar in (True, False):
+            ad = AD(vals, ders, AD_Mode.FORWARD, scalar=scalar)
+            if scalar: # also above _SCALAR_MAX_DIMEN, to show where it stops paying off
+                ad.scalar_vars = [Scalar_Var(float(x.val), tuple(x.der.tolist())) for x in ad.vars]
+            backend = 'Scalar_Var' if scalar else 'Var'
+            res.append(result('scalar', 'auto_diff {} n={}'.format(backend, dimen), 'per call',
+                              best_time(lambda: ad.auto_diff(objective), number=number), 's'))
+            res.append(result('scalar', 'jac_matrix {} n={}'.format(backend, dimen), 'per call',
+                              best_time(lambda: ad.jac_matrix(outputs), number=number), 's'))
+    x, s = Var(0.3, np.array([1.0, 0.0])), Scalar_Var(0.3, (1.0, 0.0))
+    for name in FUNCTIONS:
+        for cls, operand in ((Var, x), (Scalar_Var, s)):
+            func = call(cls, name)
+            res.append(result('scalar', '{} {} n=2'.format(cls.__name__, name), 'per call',
+                              best_time(lambda: func(operand), number=number * 4), 's'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
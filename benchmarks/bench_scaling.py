@@ -0,0 +1,64 @@
+"""
+Scaling of AD.auto_diff and AD.jac_matrix with the number of inputs (1 to 10^4) in forward and reverse mode,
+of the backward sweep with the graph depth, and the peak memory of each.
+Forward mode at n = 10^4 runs with chunk=500, a dense der of width 10^4 on every input would take 800 MB.
+
+    python -m benchmarks.bench_scaling
+"""
+import numpy as np
+from EasyDiff.ad import AD, AD_Mode
+from EasyDiff.var import Var
+from EasyDiff.rev_var import Rev_Var
+from benchmarks.common import best_time, peak_memory, result, report
+
+# written with numpy functions so that they run in both modes
+def chain(*xs):
+    z = xs[0]
+    for a, b in zip(xs[:-1], xs[1:]):
+        z = z + np.sin(a) * b
+    return z
+
+def spread(*xs):
+    z = xs[-1]
+    for x in xs[:-1]:
+        z = z + np.exp(x * 0.01)
+    return z
+
+def run(quick=False):
+    dims = [1, 10, 100, 1000] if quick else [1, 10, 100, 1000, 10000]
+    res = []
+    for n in dims:
+        vals = np.linspace(0.1, 1.0, n)
+        for name, mode in (('forward', AD_Mode.FORWARD), ('reverse', AD_Mode.REVERSE)):
+            chunk = 500 if mode == AD_Mode.FORWARD and n > 1000 else None
+            case = '{} n={}'.format(name, n)
+            ad = AD(vals, np.ones(n), mode, chunk=chunk)
+            repeat = 1 if n >= 1000 else 3
+            res.append(result('scaling', case, 'auto_diff', best_time(lambda: ad.auto_diff(chain), repeat=repeat), 's'))
+            res.append(result('scaling', case, 'jac_matrix m=2', best_time(lambda: ad.jac_matrix([chain, spread]), repeat=repeat), 's'))
+            _, peak = peak_memory(lambda: AD(vals, np.ones(n), mode, chunk=chunk).auto_diff(chain))
+            res.append(result('scaling', case, 'auto_diff peak memory', peak, 'B'))
+
+    depths = [100, 1000, 10000] if quick else [100, 1000, 10000, 100000]
+    for depth in depths:
+        def rev_chain():
+            x = Rev_Var(0.5)
+            z = x
+            for _ in range(depth):
+                z = z * 0.999 + x
+            z.grad_value = 1.0
+            Rev_Var.backward([x])
+        def var_chain():
+            x = Var(0.5, np.array([1.0]))
+            z = x
+            for _ in range(depth):
+                z = z * 0.999 + x
+        case = 'depth={}'.format(depth)
+        res.append(result('scaling', 'reverse ' + case, 'build+backward', best_time(rev_chain, repeat=1), 's'))
+        res.append(result('scaling', 'forward ' + case, 'evaluate', best_time(var_chain, repeat=1), 's'))
+        _, peak = peak_memory(rev_chain)
+        res.append(result('scaling', 'reverse ' + case, 'peak memory', peak, 'B'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
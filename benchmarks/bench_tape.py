@@ -0,0 +1,49 @@
+"""
+Rev_Var object graph versus the flat Tape backend: bytes per node and backward time.
+
+    python -m benchmarks.bench_tape
+"""
+from EasyDiff.rev_var import Rev_Var
+from EasyDiff.tape_var import Tape
+from benchmarks.common import best_time, peak_memory, result, report
+
+def chain(x, y, depth):
+    z = x
+    for _ in range(depth):
+        z = z * y + x
+    return z
+
+def run(quick=False):
+    depth = 2000 if quick else 50000
+    nodes = 2 * depth
+    res = []
+
+    def build_rev():
+        x, y = Rev_Var(0.5), Rev_Var(0.999)
+        return x, y, chain(x, y, depth)
+
+    def build_tape():
+        tape = Tape(capacity=nodes + 2)
+        x, y = tape.variable(0.5), tape.variable(0.999)
+        return tape, chain(x, y, depth)
+
+    (x, y, z), rev_bytes = peak_memory(build_rev)
+    (tape, out), tape_bytes = peak_memory(build_tape)
+    res.append(result('tape', 'rev_var depth={}'.format(depth), 'bytes/node', rev_bytes / nodes, 'B'))
+    res.append(result('tape', 'tape depth={}'.format(depth), 'bytes/node', tape_bytes / nodes, 'B'))
+
+    def rev_backward():
+        x, y, z = build_rev()
+        z.grad_value = 1.0
+        Rev_Var.backward([x, y])
+
+    def tape_backward():
+        tape.gradient(out)
+
+    res.append(result('tape', 'rev_var depth={}'.format(depth), 'build+backward', best_time(rev_backward, repeat=3), 's'))
+    res.append(result('tape', 'tape depth={}'.format(depth), 'build', best_time(build_tape, repeat=3), 's'))
+    res.append(result('tape', 'tape depth={}'.format(depth), 'backward', best_time(tape_backward, repeat=3), 's'))
+    return res
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,42 @@
+import time
+import tracemalloc
+
+def best_time(func, repeat=5, number=1):
+    """ returns the best wall time in seconds of one call to func
+
+    INPUT
+    =======
+    func: a function without arguments
+    repeat: number of trials, the fastest one is kept
+    number: number of calls per trial
+
+    RETURNS
+    =======
+    seconds per call
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+def peak_memory(func):
+    """ returns (result of func, peak bytes allocated by python while running it) """
+    tracemalloc.start()
+    try:
+        res = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return res, peak
+
+def result(benchmark, case, metric, value, unit):
+    """ one flat, json friendly measurement """
+    return {'benchmark': benchmark, 'case': case, 'metric': metric, 'value': value, 'unit': unit}
+
+def report(results):
+    """ print measurements as an aligned table """
+    for r in results:
+        print('{:<18} {:<36} {:<14} {:>14.6g} {}'.format(r['benchmark'], r['case'], r['metric'], r['value'], r['unit']))
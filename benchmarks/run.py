@@ -0,0 +1,112 @@
+"""
+Runs every benchmarks/bench_*.py module, writes the measurements as JSON and compares them with a stored baseline.
+
+    python -m benchmarks.run --quick --json results.json
+    python -m benchmarks.run --only ops scaling --baseline baseline.json --tolerance 0.25
+
+With --baseline, every time measurement (unit 's') that is more than --tolerance slower than the baseline
+is reported as a regression and the exit status is 1. Memory and other measurements are only reported.
+Times depend on the machine, so no baseline is committed: write one with --json on the machine 
+(and with the same --quick setting) the comparison runs on, eg, before a change:
+
+    python -m benchmarks.run --quick --json baseline.json
+
+A --baseline file that does not exist stops the run before any benchmark, with exit status 2, 
+and a baseline without any matching measurement exits with status 1.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import platform
+import importlib
+import numpy as np
+from benchmarks.common import report
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def modules():
+    """ names of the benchmark modules, eg, 'ops' for bench_ops.py """
+    return sorted(os.path.basename(path)[len('bench_'):-len('.py')] for path in glob.glob(os.path.join(HERE, 'bench_*.py')))
+
+def machine():
+    """ where the measurements were taken """
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'processor': platform.processor(), 'cpus': os.cpu_count(), 'date': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+def compare(results, baseline, tolerance):
+    """ returns (rows, regressions) for the measurements found in both results and baseline
+
+    INPUT
+    =======
+    results, baseline: lists of result dicts (see common.result)
+    tolerance: the relative slowdown of a time measurement reported as a regression
+
+    RETURNS
+    =======
+    rows: (benchmark, case, metric, baseline value, value, value / baseline value)
+    regressions: the rows of time measurements with a ratio above 1 + tolerance
+
+    EXAMPLES
+    =======
+    >>> old = [{'benchmark': 'ops', 'case': 'Var add', 'metric': 'per op', 'value': 1.0, 'unit': 's'}]
+    >>> new = [{'benchmark': 'ops', 'case': 'Var add', 'metric': 'per op', 'value': 1.5, 'unit': 's'}]
+    >>> rows, regressions = compare(new, old, 0.25)
+    >>> print(rows[0][-1], len(regressions))
+    1.5 1
+    """
+    old = {(r['benchmark'], r['case'], r['metric']): r for r in baseline}
+    rows, regressions = [], []
+    for r in results:
+        key = (r['benchmark'], r['case'], r['metric'])
+        if key not in old or not old[key]['value']:
+            continue
+        row = key + (old[key]['value'], r['value'], r['value'] / old[key]['value'])
+        rows.append(row)
+        if r['unit'] == 's' and row[-1] > 1 + tolerance:
+            regressions.append(row)
+    return rows, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='run the EasyDiff benchmarks')
+    parser.add_argument('--quick', action='store_true', help='smaller sizes, for a fast check')
+    parser.add_argument('--only', nargs='+', choices=modules(), help='benchmark modules to run (default: all)')
+    parser.add_argument('--json', help='write the machine description and the results to this file')
+    parser.add_argument('--baseline', help='a JSON file written by --json to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+    if args.baseline and not os.path.exists(args.baseline):
+        parser.error('baseline {} not found, write one first with: python -m benchmarks.run{} --json {}'.format(
+            args.baseline, ' --quick' if args.quick else '', args.baseline))
+
+    results = []
+    for name in args.only or modules():
+        res = importlib.import_module('benchmarks.bench_' + name).run(quick=args.quick)
+        report(res)
+        results += res
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'machine': machine(), 'quick': args.quick, 'results': results}, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline['results'], args.tolerance)
+        print('\ncompared with {} ({} matching measurements)'.format(args.baseline, len(rows)))
+        if baseline.get('quick') != args.quick:
+            print('WARNING {} was written {} --quick'.format(args.baseline, 'with' if baseline.get('quick') else 'without'))
+        if not rows:
+            print('ERROR no measurement of this run is in {}'.format(args.baseline))
+            return 1
+        for row in rows:
+            print('{:<18} {:<36} {:<14} {:>12.4g} -> {:<12.4g} x{:.2f}'.format(*row))
+        for row in regressions:
+            print('REGRESSION {} {} {}: x{:.2f}'.format(row[0], row[1], row[2], row[-1]))
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import pytest
 import numpy as np
 from EasyDiff.var import Var
-from EasyDiff.ad import AD
+from EasyDiff.ad import AD, AD_Mode
 
 x = Var(3, np.array([1,0]))
 y = Var(2, np.array([0,1]))
@@ -22,3 +22,217 @@ def test_jac_matrix():
 	ad = AD(np.array([4.12, 5.13]), np.array([1, 1]))
 	assert np.array_equal(ad.jac_matrix([f1, f2]), np.array([[pytest.approx(-0.11403015), pytest.approx(0.10263124)], [pytest.approx(0.048018), pytest.approx(-0.07712832)]]))
         
+
+def test_jac_matrix_batch():
+	f1 = lambda x, y: Var.log(x) ** Var.sin(y)
+	f2 = lambda x, y: Var.sqrt(x) / y
+	points = np.array([[4.12, 5.13], [2.0, 2.0], [1.5, 0.3]])
+	ad = AD(np.array([4.12, 5.13]), np.array([1, 1]))
+	values, jacobians = ad.jac_matrix_batch([f1, f2], points)
+	assert values.shape == (3, 2)
+	assert jacobians.shape == (3, 2, 2)
+	for i, point in enumerate(points):
+		single = AD(point, np.array([1, 1]))
+		assert values[i] == pytest.approx([single.auto_diff(f1).val, single.auto_diff(f2).val])
+		assert jacobians[i] == pytest.approx(single.jac_matrix([f1, f2]))
+
+def test_chunked_auto_diff():
+	f1 = lambda a, b, c, d, e: Var.log(a) ** Var.sin(b) + c * d / e
+	vals = np.array([2.0, 2.0, 1.5, 0.5, 3.0])
+	full = AD(vals, np.ones(5)).auto_diff(f1)
+	for chunk in (1, 2, 3, 5, 8):
+		res = AD(vals, np.ones(5)).auto_diff(f1, chunk=chunk)
+		assert res.val == pytest.approx(full.val)
+		assert res.der == pytest.approx(full.der)
+	ad = AD(vals, np.ones(5), chunk=2)
+	assert len(ad.vars[0].der) == 2
+	assert ad.auto_diff(f1).der == pytest.approx(full.der)
+
+def test_chunked_constant_output():
+	# a constant is returned unchanged and has a row of zeros, with or without chunks
+	vals = np.array([2.0, 2.0, 1.5])
+	for chunk in (None, 1, 2):
+		ad = AD(vals, np.ones(3), chunk=chunk, scalar=False)
+		assert ad.auto_diff(lambda x, y, z: 3.0) == 3.0
+		assert ad.jac_matrix([lambda x, y, z: 3.0, lambda x, y, z: x * z]).tolist() == [[0.0, 0.0, 0.0], [1.5, 0.0, 2.0]]
+
+def test_chunked_jac_matrix():
+	f1 = lambda x, y, z: Var.log(x) ** Var.sin(y)
+	f2 = lambda x, y, z: Var.sqrt(x) / y * z
+	ad = AD(np.array([4.12, 5.13, 2.0]), np.array([1, 1, 1]))
+	full = ad.jac_matrix([f1, f2])
+	assert ad.jac_matrix([f1, f2], chunk=2) == pytest.approx(full)
+	assert AD(np.array([4.12, 5.13, 2.0]), np.array([1, 1, 1]), chunk=1).jac_matrix([f1, f2]) == pytest.approx(full)
+
+def test_jvp():
+	f1 = lambda x, y, z: Var.log(x) ** Var.sin(y) + Var.sqrt(x) / y * Var.exp(z)
+	vals = np.array([4.12, 5.13, 0.3])
+	v = np.array([0.5, -1.0, 2.0])
+	grad = AD(vals, np.ones(3)).auto_diff(f1)
+	value, tangent = AD.jvp(f1, vals, v)
+	assert value == pytest.approx(grad.val)
+	assert tangent == pytest.approx(np.dot(grad.der, v))
+
+def test_jvp_batch_and_vector_output():
+	f1 = lambda x, y: Var.log(x) ** Var.sin(y)
+	f2 = lambda x, y: Var.sqrt(x) / y
+	vals = np.array([4.12, 5.13])
+	jac = AD(vals, np.ones(2)).jac_matrix([f1, f2])
+	directions = np.array([[1.0, 0.0], [0.0, 1.0], [0.3, -0.7]])
+	value, tangent = AD.jvp(lambda x, y: [f1(x, y), f2(x, y)], vals, directions)
+	assert value.shape == (2,)
+	assert tangent.shape == (2, 3)
+	assert tangent == pytest.approx(jac.dot(directions.T))
+
+def test_jac_matrix_single_callable():
+	calls = []
+	def f(x, y, z):
+		calls.append(1)
+		shared = Var.log(x) * y
+		return [shared ** Var.sin(y), Var.sqrt(x) / y * z, shared + z]
+	vals = np.array([4.12, 5.13, 2.0])
+	ad = AD(vals, np.ones(3))
+	jac = ad.jac_matrix(f)
+	assert len(calls) == 1
+	expected = ad.jac_matrix([lambda x, y, z, i=i: f(x, y, z)[i] for i in range(3)])
+	assert jac == pytest.approx(expected)
+	assert ad.jac_matrix(f, chunk=2) == pytest.approx(expected)
+	assert AD(vals, np.ones(3), sparse=True).jac_matrix(f) == pytest.approx(expected)
+
+@pytest.mark.parametrize("options", [{}, {'scalar': False}, {'chunk': 1}, {'sparse': True}, 
+	{'mode': AD_Mode.REVERSE}, {'mode': AD_Mode.TAPE}])
+def test_jac_matrix_constant_outputs(options):
+	# a constant output has a row of zeros in every mode
+	f = lambda x, y: [x * y, 3.0, y - 1]
+	jac = AD(np.array([2.0, 5.0]), np.ones(2), **options).jac_matrix(f)
+	assert jac.tolist() == [[5.0, 2.0], [0.0, 0.0], [0.0, 1.0]]
+
+def test_auto_mode_selection():
+	f1 = lambda x, y: np.log(x) ** np.sin(y)
+	f2 = lambda x, y: Var.sqrt(x) / y
+	vals = np.array([4.12, 5.13])
+	expected = AD(vals, np.ones(2)).jac_matrix([f1, f2])
+	# many outputs of few inputs: forward mode
+	ad = AD(vals, np.ones(2), AD_Mode.AUTO)
+	jac = ad.jac_matrix(lambda x, y: [f1(x, y), f2(x, y), x * y, x - y])
+	assert ad.mode == AD_Mode.FORWARD
+	assert ad.selection[0] == AD_Mode.FORWARD
+	assert 'n=2 inputs, m=4 outputs' in ad.selection[1]
+	assert jac[:2] == pytest.approx(expected)
+	# one output of few inputs: seeding and sweeping reverse mode costs more than one forward pass
+	z = ad.auto_diff(f1)
+	assert ad.mode == AD_Mode.FORWARD
+	assert z.val == pytest.approx(np.log(4.12) ** np.sin(5.13))
+	assert z.der == pytest.approx(expected[0])
+	assert ad.jac_matrix([f1, f2]) == pytest.approx(expected)
+
+@pytest.mark.parametrize("trace", [False, True])
+def test_auto_mode_casts_inputs(trace):
+	# integer vals are cast to the dtype before the cost probe, like in FORWARD and REVERSE mode
+	f = lambda x, y: [x ** -1, y]
+	ad = AD(np.array([2, 2]), np.ones(2), AD_Mode.AUTO, trace=trace)
+	assert ad.jac_matrix(f) == pytest.approx(np.array([[-0.25, 0.0], [0.0, 1.0]]))
+	assert ad.auto_diff(lambda x, y: x ** -1 * y).der == pytest.approx([-0.5, 0.5])
+
+def test_auto_mode_batch_runs_on_var():
+	f = lambda x, y: x * y
+	ad = AD(np.array([1.0, 2.0]), np.ones(2), AD_Mode.AUTO)
+	ad.select_mode([f])
+	single = ad.selection[1]
+	ad.select_mode([f], batch=True)
+	assert single.endswith('forward ~ 60.00, reverse ~ 102.40')
+	assert ad.selection[1].endswith('forward ~ 100.07, reverse ~ 102.40')
+	values, jacobians = ad.jac_matrix_batch([f], np.array([[1.0, 2.0], [3.0, 4.0]]))
+	assert ad.selection[1] == 'n=2 inputs, m=1 outputs, operation count not traced: forward ~ 100.07, reverse ~ 102.40'
+	assert jacobians.tolist() == [[[2.0, 1.0]], [[4.0, 3.0]]]
+	ad.select_mode([f], chunk=1) # a narrower chunk keeps Var as well
+	assert ad.selection[1].endswith('forward ~ 100.07, reverse ~ 102.40')
+
+def test_auto_mode_traced():
+	def f(*xs):
+		z = 0
+		for x in xs:
+			z = z + np.sin(x) * x
+		return z
+	vals = np.linspace(1.0, 2.0, 20)
+	ad = AD(vals, np.ones(20), AD_Mode.AUTO, trace=True)
+	z = ad.auto_diff(f)
+	assert ad.mode == AD_Mode.FORWARD
+	assert '60 traced operations' in ad.selection[1]
+	assert z.der == pytest.approx(np.sin(vals) + vals * np.cos(vals))
+	# reverse mode pays off once der gets wide: one output of 2000 inputs
+	vals = np.linspace(1.0, 2.0, 2000)
+	ad = AD(vals, np.ones(2000), AD_Mode.AUTO, trace=True)
+	z = ad.auto_diff(f)
+	assert ad.mode == AD_Mode.REVERSE
+	assert '6000 traced operations' in ad.selection[1]
+	assert z.der == pytest.approx(np.sin(vals) + vals * np.cos(vals))
+	# an untraced list of single-output functions is not sent to reverse mode by default
+	ad = AD(vals[:3], np.ones(3), AD_Mode.AUTO)
+	ad.jac_matrix([f, f])
+	assert ad.mode == AD_Mode.FORWARD
+
+def _many_f1(x, y, z):
+	return Var.log(x) ** Var.sin(y) + z
+
+def _many_f2(x, y, z):
+	return Var.sqrt(x) / y * z
+
+def _many_system(x, y, z):
+	return [_many_f1(x, y, z), _many_f2(x, y, z)]
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_jac_matrix_many(workers):
+	points = np.random.RandomState(0).uniform(1.5, 3.0, size=(11, 3))
+	ad = AD(points[0], np.ones(3))
+	expected = np.array([AD(p, np.ones(3)).jac_matrix([_many_f1, _many_f2]) for p in points])
+	jacobians = ad.jac_matrix_many([_many_f1, _many_f2], points, workers=workers)
+	assert jacobians.shape == (11, 2, 3)
+	assert jacobians == pytest.approx(expected)
+	assert ad.jac_matrix_many(_many_system, points, workers=workers) == pytest.approx(expected)
+	assert ad.jac_matrix_many([_many_f1, _many_f2], points, workers=workers, batched=True) == pytest.approx(expected)
+	AD.shutdown_workers()
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_jac_matrix_many_no_points(workers):
+	ad = AD(np.array([2.0, 2.0, 2.0]), np.ones(3))
+	points = np.zeros((0, 3))
+	assert ad.jac_matrix_many([_many_f1, _many_f2], points, workers=workers).shape == (0, 2, 3)
+	assert ad.jac_matrix_many(_many_system, points, workers=workers).shape == (0, 2, 3)
+	assert ad.jac_matrix_many([_many_f1], points, workers=workers, batched=True).shape == (0, 1, 3)
+	# the number of outputs is counted on inputs cast to the dtype
+	ad = AD(np.array([2, 2]), np.ones(2))
+	assert ad.jac_matrix_many(lambda x, y: [x ** -1, y], np.zeros((0, 2)), workers=workers).shape == (0, 2, 2)
+
+def test_fractional_seeds():
+	f = lambda x, y: x * y
+	ad = AD(np.array([2, 3]), np.array([0.5, 0.25]))
+	assert ad.vars[0].der.dtype == np.float64
+	assert ad.auto_diff(f).der == pytest.approx([1.5, 0.5])
+	assert ad.auto_diff(f, chunk=1).der == pytest.approx([1.5, 0.5])
+
+@pytest.mark.parametrize("mode", [AD_Mode.FORWARD, AD_Mode.REVERSE])
+def test_dtype_float32(mode):
+	f1 = lambda x, y: np.sin(x) * y ** 2
+	f2 = lambda x, y: np.exp(x) / y
+	ad32 = AD(np.array([0.5, 1.5]), np.ones(2), mode, dtype=np.float32)
+	ad64 = AD(np.array([0.5, 1.5]), np.ones(2), mode)
+	assert ad32.auto_diff(f1).der.dtype == np.float32
+	jac = ad32.jac_matrix([f1, f2])
+	assert jac.dtype == np.float32
+	assert jac == pytest.approx(ad64.jac_matrix([f1, f2]), rel=1e-5)
+	values, jacobians = ad32.jac_matrix_batch([f1, f2], np.array([[0.5, 1.5], [1.0, 2.0]]))
+	assert values.dtype == jacobians.dtype == np.float32
+	assert jacobians[0] == pytest.approx(jac, rel=1e-5)
+
+@pytest.mark.parametrize("mode", [AD_Mode.FORWARD, AD_Mode.REVERSE, AD_Mode.TAPE, AD_Mode.AUTO])
+def test_divide_by_zero_constant(mode):
+	# every mode gives inf with a warning, like numpy
+	ad = AD(np.array([2.0, 3.0]), np.ones(2), mode)
+	with pytest.warns(RuntimeWarning):
+		z = ad.auto_diff(lambda x, y: x / 0 + y)
+	assert z.val == np.inf
+	assert z.der[0] == np.inf
+	with pytest.warns(RuntimeWarning):
+		jac = ad.jac_matrix(lambda x, y: [x / 0.0, y * 2])
+	assert jac[0, 0] == np.inf and jac[1, 1] == 2.0
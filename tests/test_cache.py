@@ -0,0 +1,91 @@
+import pytest
+import numpy as np
+from EasyDiff.var import Var
+from EasyDiff.ad import AD, AD_Mode
+from EasyDiff.cache import Result_Cache, _stable
+
+
+def test_lru_eviction():
+	cache = Result_Cache(budget=3 * 80)
+	keys = [Result_Cache.key('jac_matrix', np.sin, np.array([float(i)])) for i in range(4)]
+	for key in keys[:3]:
+		cache.put(key, np.zeros(10))
+	assert cache.get(keys[0]) is not None # keys[1] is now the least recently used
+	cache.put(keys[3], np.zeros(10))
+	assert len(cache) == 3
+	assert cache.nbytes == 240
+	assert cache.get(keys[1]) is None
+	assert cache.stats == {'hits': 1, 'misses': 1, 'disk_hits': 0, 'evictions': 1}
+
+def test_key_uses_value_bytes():
+	a = Result_Cache.key('auto_diff', np.sin, AD_Mode.FORWARD, np.array([1.0, 2.0]))
+	b = Result_Cache.key('auto_diff', np.sin, AD_Mode.FORWARD, [1.0, 2.0])
+	c = Result_Cache.key('auto_diff', np.sin, AD_Mode.REVERSE, np.array([1.0, 2.0]))
+	assert a == b
+	assert a != c
+
+@pytest.mark.parametrize("mode", [AD_Mode.FORWARD, AD_Mode.REVERSE])
+def test_ad_cache(mode):
+	calls = []
+	def f(x, y):
+		calls.append(1)
+		return np.log(x) ** np.sin(y)
+	cache = Result_Cache()
+	ad = AD(np.array([4.12, 5.13]), np.ones(2), mode, cache=cache)
+	first = ad.auto_diff(f)
+	first.der[0] = 100.0 # changing a returned result does not change the cached one
+	second = ad.auto_diff(f)
+	assert len(calls) == 1
+	assert second.der == pytest.approx([-0.11403015, 0.10263124])
+	assert cache.stats['hits'] == 1
+	# a new point and jac_matrix are separate entries
+	AD(np.array([2.0, 2.0]), np.ones(2), mode, cache=cache).auto_diff(f)
+	ad.jac_matrix([f])
+	assert len(calls) == 3
+	assert len(cache) == 3
+
+def test_key_uses_dtype():
+	f = lambda x, y: np.log(x) ** np.sin(y)
+	cache = Result_Cache()
+	vals = np.array([4.12, 5.13])
+	res64 = AD(vals, np.ones(2), cache=cache).auto_diff(f)
+	res32 = AD(vals, np.ones(2), dtype=np.float32, cache=cache).auto_diff(f)
+	assert (res64.der.dtype, res32.der.dtype) == (np.float64, np.float32)
+	assert len(cache) == 2
+	assert cache.stats['hits'] == 0
+	assert AD(vals, np.ones(2), dtype=np.float32, cache=cache).jac_matrix([f]).dtype == np.float32
+
+def test_disk_tier(tmp_path):
+	f = lambda x, y: Var.sqrt(x) / y
+	jac = AD(np.array([4.12, 5.13]), np.ones(2), cache=Result_Cache(path=str(tmp_path))).jac_matrix([f])
+	cache = Result_Cache(path=str(tmp_path)) # a new run: empty memory tier
+	ad = AD(np.array([4.12, 5.13]), np.ones(2), cache=cache)
+	assert ad.jac_matrix([f]) == pytest.approx(jac)
+	assert cache.stats['disk_hits'] == 1
+	assert ad.jac_matrix([f]) == pytest.approx(jac)
+	assert cache.stats['hits'] == 1
+
+SCALE = 2.0
+
+def _scaled(x):
+	return SCALE * x
+
+def _uses_helper(x, y):
+	return _scaled(x) * y
+
+def test_disk_key_hashes_arrays():
+	# repr shortens large arrays, the bytes tell them apart
+	scale = lambda v: (lambda x: x * v)
+	a = np.zeros(5000)
+	b = a.copy()
+	b[2500] = 1.0
+	assert _stable(scale(a)) != _stable(scale(b))
+	assert _stable(scale(a)) == _stable(scale(a.copy()))
+	assert _stable(('jac_matrix', a)) != _stable(('jac_matrix', b))
+
+def test_disk_key_reads_globals(monkeypatch):
+	before = _stable(_uses_helper)
+	monkeypatch.setitem(_uses_helper.__globals__, 'SCALE', 3.0) # a global read by the helper function
+	assert _stable(_uses_helper) != before
+	monkeypatch.undo()
+	assert _stable(_uses_helper) == before
@@ -0,0 +1,74 @@
+import pytest
+import numpy as np
+from EasyDiff.tape_var import Tape, Tape_Var
+from EasyDiff.codegen import Generated_Function, tape_source
+from EasyDiff.ad import AD, AD_Mode
+
+
+funcs = [
+	lambda x, y: x * y + 3 * x - y / 2 - (x - y),
+	lambda x, y: x ** y + y ** 2 + 2 ** x + (-2.0) ** 2 * x,
+	lambda x, y: 1 / x - y / x + (2 - y) * 3 - x,
+	lambda x, y: Tape_Var.log(x) ** Tape_Var.sin(y),
+	lambda x, y: Tape_Var.logk(x, 3.0) + Tape_Var.exp(y) + Tape_Var.expk(x, 4) + Tape_Var.logistic(y),
+	lambda x, y: Tape_Var.sqrt(x) * Tape_Var.sinh(y) + Tape_Var.cosh(x) - Tape_Var.tanh(y),
+	lambda x, y: Tape_Var.cos(x) * Tape_Var.tan(y) + Tape_Var.arctan(x),
+	lambda x, y: Tape_Var.arcsin(y / 4) + Tape_Var.arccos(y / 4) + x,
+	lambda x, y: y * 2,
+]
+
+@pytest.mark.parametrize("mode", ['reverse', 'forward'])
+@pytest.mark.parametrize("func", funcs)
+def test_generated_matches_tape(func, mode):
+	tape = Tape()
+	x, y = tape.variable(1.2), tape.variable(0.7)
+	z = func(x, y)
+	adjoint = tape.gradient(z)
+	f = Generated_Function(tape, [x, y], z, mode)
+	res = f([1.2, 0.7])
+	assert res.val == pytest.approx(z.value)
+	assert res.der == pytest.approx([adjoint[x.index], adjoint[y.index]])
+
+@pytest.mark.parametrize("mode", ['reverse', 'forward'])
+def test_generated_batch(mode):
+	f1 = lambda x, y: Tape_Var.log(x) ** Tape_Var.sin(y) + x
+	ad = AD(np.array([2.0, 2.0]), np.array([1, 1]), AD_Mode.TAPE)
+	f = ad.generate(f1, mode=mode)
+	compiled = ad.compile(f1)
+	points = np.array([[1.5, 0.2], [2.0, 2.0], [4.12, 5.13]])
+	res, expected = f(points), compiled(points)
+	assert res.val.shape == (3,)
+	assert res.der.shape == (3, 2)
+	assert res.val == pytest.approx(expected.val)
+	assert res.der == pytest.approx(expected.der)
+
+def test_generated_source_is_cached():
+	f1 = lambda x, y: Tape_Var.sin(x) * y
+	ad = AD(np.array([2.0, 2.0]), np.array([1, 1]), AD_Mode.TAPE)
+	f, g = ad.generate(f1), ad.generate(f1)
+	assert f.source == g.source
+	assert f.func is g.func
+	assert 'Tape_Var' not in f.source and 'np.sin(x0)' in f.source
+
+def test_source_output_is_an_input():
+	tape = Tape()
+	x, y = tape.variable(1.2), tape.variable(0.7)
+	assert tape_source(tape, [x, y], x).splitlines()[1:] == ['    a0 = 1.0', '    return x0, (a0, 0.0)']
+	assert tape_source(tape, [x, y], y, mode='forward').splitlines()[1:] == ['    return x1, t1']
+	points = np.array([[1.5, 0.2], [2.0, 2.0], [4.12, 5.13]])
+	for mode in ['reverse', 'forward']:
+		res = Generated_Function(tape, [x, y], y, mode)(points)
+		assert res.val.tolist() == [0.2, 2.0, 5.13]
+		assert res.der.tolist() == [[0.0, 1.0]] * 3
+		# optimized to a constant output
+		res = AD(np.array([1.2, 0.7]), np.array([1, 1]), AD_Mode.TAPE).generate(lambda x, y: x * 0 + 1, mode)(points)
+		assert res.val.tolist() == [1.0] * 3
+		assert res.der.tolist() == [[0.0, 0.0]] * 3
+
+def test_invalid_mode():
+	tape = Tape()
+	x = tape.variable(1.2)
+	with pytest.raises(ValueError):
+		tape_source(tape, [x], x * 2, mode='backward')
+	with pytest.raises(ValueError):
+		Generated_Function(tape, [x], x * 2, mode='Reverse')
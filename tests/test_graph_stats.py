@@ -0,0 +1,63 @@
+import numpy as np
+from EasyDiff.rev_var import Rev_Var
+from EasyDiff.tape_var import Tape
+from EasyDiff.graph_stats import graph_stats, Graph_Monitor
+
+
+def chain(x, depth):
+	z = x
+	for _ in range(depth):
+		z = z * 0.5 + x
+	return z
+
+def test_rev_chain():
+	x = Rev_Var(0.5)
+	chain(x, 10)
+	stats = graph_stats([x])
+	assert stats['nodes'] == 21
+	assert stats['edges'] == 30
+	assert stats['max_depth'] == 20
+	assert stats['fanout'] == {0: 1, 1: 19, 11: 1}
+	assert stats['by_op']['binary'][0] == 10
+	assert stats['bytes'] == sum(size for _, size in stats['by_op'].values())
+
+def test_rev_after_backward():
+	# the walk also goes through nodes whose grad_value is already set
+	x = Rev_Var(0.5)
+	z = chain(x, 5)
+	z.grad_value = 1.0
+	x.grad()
+	assert graph_stats([x])['nodes'] == 11
+
+def test_tape_matches_rev():
+	x = Rev_Var(0.5)
+	chain(x, 10)
+	tape = Tape()
+	chain(tape.variable(0.5), 10)
+	rev, tap = graph_stats([x]), graph_stats(tape)
+	for key in ('nodes', 'edges', 'max_depth', 'fanout'):
+		assert rev[key] == tap[key]
+	assert tap['by_op'] == {'mul_c': (10, 410), 'add': (10, 410), 'input': (1, 41)}
+	assert tap['allocated'] >= tap['bytes']
+	assert tap['bytes'] < rev['bytes']
+
+def test_monitor_samples():
+	x = Rev_Var(np.linspace(0.1, 1.0, 10))
+	with Graph_Monitor([x], every=5) as monitor:
+		z = chain(x, 10)
+		monitor.sample('end')
+	assert vars(Rev_Var)['__mul__'] is monitor.originals['__mul__']
+	assert [s['recorded'] for s in monitor.samples] == [5, 10, 15, 20, 20]
+	assert monitor.samples[-1]['label'] == 'end'
+	nbytes = [s['bytes'] for s in monitor.samples]
+	assert nbytes == sorted(nbytes)
+	assert monitor.stats()['by_op']['mul'][0] == 10
+	assert monitor.stats()['by_op']['add'][0] == 10
+	# +x returns x itself and records no node, -(-x) records two
+	x = Rev_Var(0.5)
+	with Graph_Monitor([x]) as monitor:
+		z = +x * 2
+		w = -(-x)
+	assert monitor.recorded == 3
+	assert sorted((name, count) for name, (count, _) in monitor.stats()['by_op'].items()) == [
+		('input', 1), ('mul', 1), ('neg', 2)]
@@ -0,0 +1,25 @@
+import sys
+import subprocess
+
+
+def run_python(statement):
+	return subprocess.run([sys.executable, '-c', statement], stdout=subprocess.PIPE,
+						  universal_newlines=True, check=True).stdout.split()
+
+def test_import_is_lazy():
+	# the package itself imports no submodule and not numpy
+	assert run_python("import sys, EasyDiff; print('numpy' in sys.modules, 'EasyDiff.ad' in sys.modules)") == ['False', 'False']
+
+def test_no_test_dependencies_at_runtime():
+	statement = ("import sys, numpy as np; from EasyDiff import AD, Var; "
+				 "AD(np.array([1.0]), np.array([1])).auto_diff(lambda x: Var.sin(x)); "
+				 "print('pytest' in sys.modules)")
+	assert run_python(statement) == ['False']
+
+def test_lazy_names():
+	import EasyDiff
+	from EasyDiff.ad import AD
+	from EasyDiff.tape_var import Tape_Var
+	assert EasyDiff.AD is AD
+	assert EasyDiff.Tape_Var is Tape_Var
+	assert 'Result_Cache' in dir(EasyDiff)
@@ -0,0 +1,48 @@
+import pytest
+import numpy as np
+from EasyDiff.var import Var
+from EasyDiff.rev_var import Rev_Var
+from EasyDiff.ad import AD, AD_Mode
+from EasyDiff.profiler import Profiler
+
+
+def test_counts_forward():
+	x = Var(0.5, np.array([1.0, 0.0]))
+	y = Var(2.0, np.array([0.0, 1.0]))
+	with Profiler() as prof:
+		z = Var.log(x * y) + 3 * x + np.sin(y)
+	assert prof.calls('Var.log') == 1
+	assert prof.calls('Var.__mul__') == 1
+	assert prof.calls('Var.__rmul__') == 1
+	assert prof.calls('Var.sin') == 1
+	calls, total, own = prof.stats['Var.__rmul__']
+	assert total >= own >= 0
+
+def test_counts_reverse_ad():
+	f = lambda x, y: x * y + Rev_Var.exp(x)
+	with Profiler() as prof:
+		AD([1.0, 2.0], [1, 1], AD_Mode.REVERSE).auto_diff(f)
+	assert prof.calls('Rev_Var.exp') == 1
+	assert prof.calls('Rev_Var.__mul__') == 1
+	assert prof.calls('Rev_Var.sweep') + prof.calls('Rev_Var.backward') >= 1
+
+def test_methods_restored():
+	before = dict(vars(Var)), dict(vars(Rev_Var))
+	with pytest.raises(ValueError):
+		with Profiler():
+			assert vars(Var)['__add__'] is not before[0]['__add__']
+			raise ValueError
+	assert dict(vars(Var)) == before[0]
+	assert dict(vars(Rev_Var)) == before[1]
+
+def test_not_nested():
+	with Profiler():
+		with pytest.raises(RuntimeError):
+			Profiler().__enter__()
+
+def test_report():
+	with Profiler() as prof:
+		Var.exp(Var(1.0, np.array([1.0]))) + 1
+	lines = prof.report(sort='calls', limit=2).splitlines()
+	assert len(lines) == 3
+	assert lines[0].split()[0] == 'method'
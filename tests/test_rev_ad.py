@@ -26,3 +26,59 @@ def test_jac_matrix():
 	ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_Mode.REVERSE)
 	assert np.array_equal(ad.jac_matrix([f1, f2]), np.array([[pytest.approx(-0.11403015), pytest.approx(0.10263124)], [pytest.approx(0.048018), pytest.approx(-0.07712832)]]))
         
+
+def test_deep_graph():
+	def f(x, y):
+		z = x
+		for i in range(5000):
+			z = z * y
+		return z
+	ad = AD(np.array([2.0, 1.0]), np.array([1, 1]), AD_Mode.REVERSE)
+	res = ad.auto_diff(f)
+	assert res.val == pytest.approx(2.0)
+	assert res.der[0] == pytest.approx(1.0)
+	assert res.der[1] == pytest.approx(10000.0)
+
+def test_jac_matrix_batch():
+	f1 = lambda x, y, z: Rev_Var.log(x) ** Rev_Var.sin(y)
+	f2 = lambda x, y, z: Rev_Var.sqrt(x) / y
+	points = np.array([[4.12, 5.13, 1.0], [2.0, 2.0, 1.0], [1.5, 0.3, 1.0]])
+	ad = AD(np.array([4.12, 5.13, 1.0]), np.array([1, 1, 1]), AD_Mode.REVERSE)
+	values, jacobians = ad.jac_matrix_batch([f1, f2], points)
+	assert values.shape == (3, 2)
+	assert jacobians.shape == (3, 2, 3)
+	for i, point in enumerate(points):
+		single = AD(point, np.array([1, 1, 1]), AD_Mode.REVERSE)
+		assert values[i] == pytest.approx([single.auto_diff(f1).val, single.auto_diff(f2).val])
+		assert jacobians[i] == pytest.approx(single.jac_matrix([f1, f2]))
+
+def test_jac_matrix_recorded_once():
+	calls = []
+	def f(x, y):
+		calls.append(1)
+		shared = Rev_Var.log(x) * y
+		return [shared ** Rev_Var.sin(y), Rev_Var.sqrt(x) / y + shared, shared]
+	ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_Mode.REVERSE)
+	jac = ad.jac_matrix(f)
+	assert len(calls) == 1
+	expected = ad.jac_matrix([lambda x, y, i=i: f(x, y)[i] for i in range(3)])
+	assert jac == pytest.approx(expected)
+
+def test_vjp():
+	f = lambda x, y, z: [Rev_Var.log(x) ** Rev_Var.sin(y), Rev_Var.sqrt(x) / y * z]
+	vals = np.array([4.12, 5.13, 2.0])
+	jac = AD(vals, np.ones(3), AD_Mode.REVERSE).jac_matrix(f)
+	u = np.array([0.3, -2.0])
+	value, product = AD.vjp(f, vals, u)
+	assert value.shape == (2,)
+	assert product == pytest.approx(u.dot(jac))
+	cotangents = np.array([[1.0, 0.0], [0.0, 1.0], [0.3, -2.0]])
+	value, product = AD.vjp(f, vals, cotangents)
+	assert product.shape == (3, 3)
+	assert product == pytest.approx(cotangents.dot(jac))
+
+def test_vjp_single_output():
+	f = lambda x, y: x * y + Rev_Var.sin(x)
+	value, product = AD.vjp(f, [0.5, 4.2], 2.0)
+	assert value == pytest.approx(2.579425538604203)
+	assert product == pytest.approx([2 * (4.2 + np.cos(0.5)), 1.0])
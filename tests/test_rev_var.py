@@ -1,6 +1,7 @@
 import pytest
 import numpy as np
 from EasyDiff.rev_var import Rev_Var
+from EasyDiff.var import Var
 
 
 def test_rev_grad():
@@ -266,3 +267,109 @@ def test_arctan():
 
 
 
+
+def test_deep_graph_grad():
+	x = Rev_Var(0.5)
+	z = x
+	for i in range(20000):
+		z = z + 0.001 * x
+	z.grad_value = 1.0
+	assert z.value == pytest.approx(10.5)
+	assert x.grad() == pytest.approx(21.0)
+
+def test_backward_all_inputs():
+	x = Rev_Var(0.5)
+	y = Rev_Var(4.2)
+	z = x * y + Rev_Var.sin(x)
+	z.grad_value = 1.0
+	Rev_Var.backward([x, y])
+	assert x.grad_value == pytest.approx(4.2 + np.cos(0.5))
+	assert y.grad_value == pytest.approx(0.5)
+
+# every operator and elementary function, on a batch of values
+BATCHED_FUNCS = [
+	lambda x, y: x * y + 3 * x - y / 2,
+	lambda x, y: x ** y + y ** 2 + 2 ** x,
+	lambda x, y: 1 / x - y / x + (2 - y) * (-x),
+	lambda x, y: Rev_Var.log(x) ** Rev_Var.sin(y),
+	lambda x, y: Rev_Var.logk(x, 3.0) + Rev_Var.exp(y) + Rev_Var.expk(x, 4) + Rev_Var.logistic(y),
+	lambda x, y: Rev_Var.sqrt(x) * Rev_Var.sinh(y) + Rev_Var.cosh(x) - Rev_Var.tanh(y),
+	lambda x, y: Rev_Var.cos(x) * Rev_Var.tan(y) + Rev_Var.arctan(x),
+	lambda x, y: Rev_Var.arcsin(y / 4) + Rev_Var.arccos(y / 4),
+]
+BATCHED_XS, BATCHED_YS = [1.2, 1.5, 3.0], [0.2, 1.0, 2.5]
+
+@pytest.mark.parametrize("func", BATCHED_FUNCS)
+def test_batched_sweep(func):
+	# one graph over the batch, swept once, gives every per-sample gradient of every input
+	x, y = Rev_Var(np.array(BATCHED_XS)), Rev_Var(np.array(BATCHED_YS))
+	z = func(x, y)
+	xi, yi = Rev_Var(BATCHED_XS[0]), Rev_Var(BATCHED_YS[0])
+	func(xi, yi)
+	# the batch lives in the values and weights, not in the graph
+	assert len(Rev_Var.topological_sort([x, y])) == len(Rev_Var.topological_sort([xi, yi]))
+	z.grad_value = 1.0
+	Rev_Var.backward([x, y])
+	for i in range(3):
+		xi, yi = Rev_Var(BATCHED_XS[i]), Rev_Var(BATCHED_YS[i])
+		zi = func(xi, yi)
+		zi.grad_value = 1.0
+		Rev_Var.backward([xi, yi])
+		assert z.value[i] == pytest.approx(zi.value)
+		# a variable the function does not use keeps a scalar 0 gradient
+		assert np.broadcast_to(x.grad_value, (3,))[i] == pytest.approx(xi.grad_value)
+		assert np.broadcast_to(y.grad_value, (3,))[i] == pytest.approx(yi.grad_value)
+
+def test_numpy_ufuncs():
+	x = Rev_Var(0.5)
+	y = Rev_Var(2.0)
+	z = np.exp(np.sin(x)) * y - np.float64(3.0) / x + Var.sqrt(x)
+	z.grad_value = 1.0
+	assert isinstance(z, Rev_Var)
+	assert x.grad() == pytest.approx(np.exp(np.sin(0.5)) * np.cos(0.5) * 2.0 + 3.0 / 0.25 + 0.5 / np.sqrt(0.5))
+	assert y.grad() == pytest.approx(np.exp(np.sin(0.5)))
+
+def test_prune():
+	x = Rev_Var(0.5)
+	y = Rev_Var(4.2)
+	dead = Rev_Var.exp(x) * y + 1
+	z = x * y + Rev_Var.sin(x)
+	assert Rev_Var.prune([x, y], [z]) == 3
+	assert len(Rev_Var.topological_sort([x, y])) == 5
+	z.grad_value = 1.0
+	Rev_Var.backward([x, y])
+	assert x.grad_value == pytest.approx(4.2 + np.cos(0.5))
+	assert y.grad_value == pytest.approx(0.5)
+
+def test_fused_kernels():
+	x = Rev_Var(1e-10)
+	z = Rev_Var.sinh(x) + Rev_Var.tanh(x)
+	assert z.value == pytest.approx(2e-10, rel=1e-12) # no cancellation between e^x and e^(-x)
+	assert len(x.children) == 2 # tanh records one node
+	z.grad_value = 1.0
+	assert x.grad() == pytest.approx(2.0)
+	big = Rev_Var(800.0)
+	z = Rev_Var.logistic(big)
+	z.grad_value = 1.0
+	assert big.grad() == 0.0 # e^x / (1 + e^x)^2 overflowed to nan
+
+def test_division_negation_nodes():
+	x = Rev_Var(1.0)
+	y = Rev_Var(2.0)
+	w = Rev_Var(3.0)
+	z = x / y - 2 / w + (3 - x) * -y + (+x)
+	assert len(Rev_Var.topological_sort([x, y, w])) == 11 # one node per operation
+	z.grad_value = 1.0
+	Rev_Var.backward([x, y, w])
+	assert x.grad_value == pytest.approx(1 / 2.0 + 2.0 + 1.0)
+	assert y.grad_value == pytest.approx(-1.0 / 4.0 - 2.0)
+	assert w.grad_value == pytest.approx(2 / 9.0)
+
+def test_divide_by_zero():
+	x, y = Rev_Var(2.0), Rev_Var(0.0)
+	with pytest.warns(RuntimeWarning):
+		z = x / 0 + x / y
+	z.grad_value = 1.0
+	assert z.value == np.inf
+	assert x.grad() == np.inf
+	assert y.grad() == -np.inf
@@ -0,0 +1,154 @@
+import pytest
+import warnings
+import numpy as np
+from EasyDiff.var import Var
+from EasyDiff.scalar_var import Scalar_Var
+from EasyDiff.ad import AD, AD_Mode
+from EasyDiff.sparse_der import Sparse_Der
+
+
+FUNCTIONS = ['log', 'exp', 'logistic', 'sqrt', 'sinh', 'cosh', 'tanh', 'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan',
+             'logk', 'expk']
+
+def call(cls, name):
+	if name == 'logk':
+		return lambda x: cls.logk(x, 3.0)
+	if name == 'expk':
+		return lambda x: cls.expk(x, 3.0)
+	return getattr(cls, name)
+
+def both(vals, func, **options):
+	""" auto_diff of func on Scalar_Var and on Var """
+	ders = np.ones(len(vals))
+	fast = AD(np.array(vals), ders, **options)
+	slow = AD(np.array(vals), ders, scalar=False, **options)
+	return fast, fast.auto_diff(func), slow.auto_diff(func)
+
+def assert_same(fast, slow):
+	assert type(fast) is Var and type(fast.der) is np.ndarray
+	assert type(fast.val) is type(slow.val) and fast.der.dtype == slow.der.dtype
+	# the math module and numpy may round the last bit of an elementary function differently
+	assert fast.val == pytest.approx(slow.val, rel=1e-13, abs=0)
+	assert fast.der == pytest.approx(slow.der, rel=1e-12, abs=1e-300)
+
+@pytest.mark.parametrize("name", FUNCTIONS)
+def test_elementary(name):
+	for cls in (Var, Scalar_Var): # Var.sin of a Scalar_Var calls Scalar_Var.sin
+		func = call(cls, name)
+		ad, fast, slow = both([0.3, 0.6], lambda x, y: func(x * y + 0.1) * y)
+		assert ad.scalar_vars is not None
+		assert_same(fast, slow)
+
+def test_operators():
+	f = lambda a, b, c, d: ((a * b - c / d) ** 2 + 2.0 ** a - 3 / b + c ** d) / (1 - d) + -a + np.sin(b) * np.float64(2.0)
+	_, fast, slow = both([0.5, 1.5, 2.5, 0.25], f)
+	assert_same(fast, slow)
+	assert len(fast.der) == 4
+
+def test_jac_matrix():
+	f1 = lambda x, y: Var.log(x) ** Var.sin(y)
+	f2 = lambda x, y: Var.sqrt(x) / y
+	ad = AD(np.array([4.12, 5.13]), np.array([1, 1]))
+	expected = AD(np.array([4.12, 5.13]), np.array([1, 1]), scalar=False).jac_matrix([f1, f2])
+	assert ad.jac_matrix([f1, f2]) == pytest.approx(expected, rel=1e-12)
+	assert ad.jac_matrix(lambda x, y: [f1(x, y), f2(x, y)]) == pytest.approx(expected, rel=1e-12)
+
+def test_seeds():
+	ad = AD(np.array([2, 3]), np.array([0.5, 2]))
+	assert [(x.val, x.der) for x in ad.scalar_vars] == [(2.0, (0.5, 0.0)), (3.0, (0.0, 2.0))]
+	# ad.vars stays a list of Var
+	assert type(ad.vars[0].der) is np.ndarray
+
+def test_not_used():
+	vals, ders = np.ones(9), np.ones(9)
+	assert AD(vals[:8], ders[:8]).scalar_vars is not None
+	assert AD(vals, ders).scalar_vars is None # more inputs than _SCALAR_MAX_DIMEN
+	assert AD(vals[:2], ders[:2], sparse=True).scalar_vars is None
+	assert AD(vals[:2], ders[:2], dtype=np.float32).scalar_vars is None
+	assert AD(vals[:2], ders[:2], AD_Mode.REVERSE).scalar_vars is None
+	assert AD(vals[:2], ders[:2], scalar=False).scalar_vars is None
+	# a chunk narrower than the inputs evaluates on Var, a wider one does not matter
+	f = lambda x, y: x * y
+	assert AD(vals[:2], ders[:2], chunk=1).auto_diff(f) == Var(1.0, np.array([1.0, 1.0]))
+	assert not AD(vals[:2], ders[:2])._use_scalar(1) and AD(vals[:2], ders[:2])._use_scalar(2)
+
+def test_auto_mode():
+	f = lambda x, y: [np.sin(x) * y, x + y, x * y, x / y]
+	ad = AD(np.array([1.0, 2.0]), np.array([1, 1]), AD_Mode.AUTO)
+	expected = AD(np.array([1.0, 2.0]), np.array([1, 1]), scalar=False).jac_matrix(f)
+	assert ad.jac_matrix(f) == pytest.approx(expected, rel=1e-12)
+	assert ad.mode == AD_Mode.FORWARD and ad.scalar_vars is not None
+
+def test_auto_mode_small_n():
+	# one output of a few inputs: forward mode on Scalar_Var is estimated cheaper than on Var
+	def f(*xs):
+		z = 0
+		for x in xs:
+			z = z + np.sin(x) * x
+		return z
+	vals = np.linspace(1.0, 2.0, 4)
+	estimates = {}
+	for scalar in (True, False):
+		ad = AD(vals, np.ones(4), AD_Mode.AUTO, trace=True, scalar=scalar)
+		z = ad.auto_diff(f)
+		assert ad.mode == AD_Mode.FORWARD
+		assert z.der == pytest.approx(np.sin(vals) + vals * np.cos(vals))
+		estimates[scalar] = ad.selection[1]
+	assert estimates[True].endswith('forward ~ 7.20, reverse ~ 16.80')
+	assert estimates[False].endswith('forward ~ 12.02, reverse ~ 16.80')
+	# a chunk narrower than the inputs keeps Var
+	ad = AD(vals, np.ones(4), AD_Mode.AUTO, trace=True, chunk=2)
+	ad.auto_diff(f)
+	assert 'forward ~ 12.02' in ad.selection[1]
+
+def test_domain_error():
+	# math.log raises where np.log returns nan, the function is evaluated on Var instead
+	f = lambda x, y: Var.log(x) * y
+	with warnings.catch_warnings():
+		warnings.simplefilter('ignore', RuntimeWarning)
+		_, fast, slow = both([-1.0, 2.0], f)
+		assert np.isnan(fast.val) and np.isnan(slow.val)
+		_, fast, slow = both([0.0, 2.0], lambda x, y: y / x)
+		assert fast.val == slow.val == np.inf
+
+def test_constant_array():
+	# a batch from a constant array operand is evaluated on Var
+	f = lambda x, y: x * np.array([1.0, 2.0, 3.0]) + y
+	_, fast, slow = both([1.0, 2.0], f)
+	assert fast.val == pytest.approx(slow.val)
+	assert np.array_equal(fast.der, slow.der)
+
+def test_constant_output():
+	ad = AD(np.array([1.0, 2.0]), np.array([1, 1]))
+	assert ad.auto_diff(lambda x, y: 3.0) == 3.0
+
+def test_constant_output_evaluated_once():
+	calls = []
+	def f(x, y):
+		calls.append(1)
+		return 3.0
+	def g(x, y):
+		calls.append(1)
+		return [x * y, 3.0]
+	ad = AD(np.array([1.0, 2.0]), np.array([1, 1]))
+	assert ad.auto_diff(f) == 3.0
+	assert ad.jac_matrix(g).tolist() == [[2.0, 1.0], [0.0, 0.0]]
+	assert len(calls) == 2
+	# a math domain error falls back to Var, which evaluates the function again
+	def h(x, y):
+		calls.append(1)
+		return Var.log(x - 1.0)
+	with warnings.catch_warnings():
+		warnings.simplefilter('ignore', RuntimeWarning)
+		ad.auto_diff(h)
+	assert len(calls) == 4
+
+def test_sparse_der_untouched():
+	ad = AD(np.array([1.0, 2.0]), np.array([1, 1]), sparse=True)
+	assert isinstance(ad.auto_diff(lambda x, y: x * y).der, Sparse_Der)
+
+def test_eq():
+	x = Scalar_Var(1.0, (1.0, 0.0))
+	assert x == Scalar_Var(1.0, (1.0, 0.0))
+	assert x != Scalar_Var(1.0, (0.0, 1.0))
+	assert x != 1.0
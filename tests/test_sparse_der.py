@@ -0,0 +1,54 @@
+import pytest
+import numpy as np
+from EasyDiff.sparse_der import Sparse_Der
+from EasyDiff.var import Var
+from EasyDiff.ad import AD
+
+
+def test_sparse_add_sub():
+	a = Sparse_Der({0: 1.0, 2: 3.0}, 4)
+	b = Sparse_Der({2: 1.0, 3: 2.0}, 4)
+	assert (a + b).entries == {0: 1.0, 2: 4.0, 3: 2.0}
+	assert (a - b).entries == {0: 1.0, 2: 2.0, 3: -2.0}
+	assert list(a + np.ones(4)) == [2.0, 1.0, 4.0, 1.0]
+	assert list(np.ones(4) - a) == [0.0, 1.0, -2.0, 1.0]
+
+def test_sparse_scale():
+	a = Sparse_Der({1: 2.0}, 3)
+	assert (a * 3).entries == {1: 6.0}
+	assert (np.float64(3) * a).entries == {1: 6.0}
+	assert (a / 4).entries == {1: 0.5}
+	assert (-a).entries == {1: -2.0}
+	assert list(np.asarray(a)) == [0.0, 2.0, 0.0]
+	assert a[1] == 2.0 and a[0] == 0.0
+
+def test_sparse_matches_dense():
+	f1 = lambda x, y, z: Var.log(x) ** Var.sin(y) + Var.sqrt(x) / y - 2 ** x + Var.tanh(y)
+	dense = AD(np.array([4.12, 5.13, 1.0]), np.array([1, 1, 1])).auto_diff(f1)
+	sparse = AD(np.array([4.12, 5.13, 1.0]), np.array([1, 1, 1]), sparse=True).auto_diff(f1)
+	assert sparse.val == pytest.approx(dense.val)
+	assert sparse.der.nnz == 2
+	assert sparse.der.toarray() == pytest.approx(dense.der)
+
+def test_sparse_many_inputs():
+	n = 20000
+	f1 = lambda *xs: xs[0] * xs[1] + Var.sin(xs[n - 1])
+	ad = AD(np.ones(n), np.ones(n), sparse=True)
+	res = ad.auto_diff(f1)
+	assert res.der.nnz == 3
+	assert res.der[0] == 1.0 and res.der[1] == 1.0
+	assert res.der[n - 1] == pytest.approx(np.cos(1.0))
+
+def test_sparse_jac_matrix():
+	f1 = lambda x, y: Var.log(x) ** Var.sin(y)
+	f2 = lambda x, y: Var.sqrt(x) / y
+	ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), sparse=True)
+	assert ad.jac_matrix([f1, f2]) == pytest.approx(np.array([[-0.11403015, 0.10263124], [0.048018, -0.07712832]]))
+
+def test_sparse_dtype():
+	f1 = lambda x, y, z: x * y + Var.sin(z) / 2.0
+	ad = AD(np.array([4.12, 5.13, 1.0]), np.array([1, 1, 1]), sparse=True, dtype=np.float32)
+	der = ad.auto_diff(f1).der
+	assert der.dtype == np.float32
+	assert der.toarray().dtype == np.float32 and np.asarray(der).dtype == np.float32
+	assert (der * 2.0).toarray().dtype == np.float32
@@ -0,0 +1,225 @@
+import pytest
+import numpy as np
+from EasyDiff.var import Var
+from EasyDiff.tape_var import Tape, Tape_Var, Tape_Op
+from EasyDiff.ad import AD, AD_Mode
+
+
+def grad_of(func, *vals):
+	tape = Tape()
+	xs = [tape.variable(v) for v in vals]
+	z = func(*xs)
+	adjoint = tape.gradient(z)
+	return z.value, [adjoint[x.index] for x in xs]
+
+def test_tape_grad():
+	val, (dx, dy) = grad_of(lambda x, y: x * y + Tape_Var.sin(x), 0.5, 4.2)
+	assert val == pytest.approx(2.579425538604203)
+	assert dx == pytest.approx(4.2 + np.cos(0.5))
+	assert dy == pytest.approx(0.5)
+
+def test_tape_arithmetic():
+	val, (dx, dy) = grad_of(lambda x, y: (x - y) / y + 3 - x, 0.5, 4.2)
+	assert val == pytest.approx((0.5 - 4.2) / 4.2 + 3 - 0.5)
+	assert dx == pytest.approx(1 / 4.2 - 1)
+	assert dy == pytest.approx(-0.5 / 4.2 ** 2)
+
+def test_tape_real_operands():
+	val, (dx,) = grad_of(lambda x: 2 / x + 2 ** x - x / 4 + (-x) * 3, 2.0)
+	assert val == pytest.approx(1 + 4 - 0.5 - 6)
+	assert dx == pytest.approx(-0.5 + 4 * np.log(2) - 0.25 - 3)
+
+def test_tape_pow():
+	val, (dx, dy) = grad_of(lambda x, y: x ** y + x ** 3, 0.5, 4.2)
+	assert val == pytest.approx(0.05440941020600775 + 0.125)
+	assert dx == pytest.approx(0.4570390457304651 + 0.75)
+	assert dy == pytest.approx(-0.03771372928022378)
+
+@pytest.mark.parametrize("name, x, der", [
+	("log", 2.0, 0.5),
+	("exp", 2.0, np.exp(2)),
+	("sqrt", 2.0, 0.3535533905932738),
+	("logistic", 3.0, np.exp(3) / ((1 + np.exp(3))**2)),
+	("sinh", 2.0, 3.7621956910836314),
+	("cosh", 2.0, 3.626860407847019),
+	("tanh", 2.0, 0.07065082485316432),
+	("sin", 2.0, -0.4161468365471424),
+	("cos", 2.0, -0.9092974268256817),
+	("tan", 2.0, 5.774399204041917),
+	("arcsin", 0.5, 1.1547005383792517),
+	("arccos", 0.5, -1.1547005383792517),
+	("arctan", 0.5, 0.8),
+])
+def test_tape_elementary(name, x, der):
+	func = getattr(Tape_Var, name)
+	val, (dx,) = grad_of(func, x)
+	assert val == pytest.approx(getattr(np, name)(x) if hasattr(np, name) else 1 / (1 + np.exp(-x)))
+	assert dx == pytest.approx(der)
+	assert func(x) == pytest.approx(val)
+
+def test_tape_logk_expk():
+	val, (dx,) = grad_of(lambda x: Tape_Var.logk(x, 3.0) + Tape_Var.expk(x, 2.0), 2.0)
+	assert val == pytest.approx(np.log(2) / np.log(3) + 4)
+	assert dx == pytest.approx(0.45511961331341866 + 4 * np.log(2))
+
+def test_tape_grows():
+	tape = Tape(capacity=4)
+	x = tape.variable(0.5)
+	z = x
+	for i in range(1000):
+		z = z + 0.001 * x
+	assert len(tape) == 2001
+	assert tape.gradient(z)[x.index] == pytest.approx(2.0)
+	assert tape.ops[z.index] == Tape_Op.ADD
+
+def test_tape_ad():
+	f1 = lambda x, y: Tape_Var.log(x) ** Tape_Var.sin(y)
+	f2 = lambda x, y: Tape_Var.sqrt(x) / y
+	ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_Mode.TAPE)
+	res = ad.auto_diff(f1)
+	assert res.val == pytest.approx(0.7277131447112022)
+	assert res.der == pytest.approx([-0.11403015, 0.10263124])
+	assert ad.jac_matrix([f1, f2]) == pytest.approx(np.array([[-0.11403015, 0.10263124], [0.048018, -0.07712832]]))
+
+def test_compiled_replay():
+	f1 = lambda x, y: Tape_Var.log(x) ** Tape_Var.sin(y) + x / y
+	ad = AD(np.array([2.0, 2.0]), np.array([1, 1]), AD_Mode.TAPE)
+	f = ad.compile(f1)
+	for vals in ([2.0, 2.0], [4.12, 5.13], [1.5, 0.3]):
+		expected = AD(np.array(vals), np.array([1, 1]), AD_Mode.TAPE).auto_diff(f1)
+		res = f(vals)
+		assert res.val == pytest.approx(expected.val)
+		assert res.der == pytest.approx(expected.der)
+
+def test_compiled_replay_batch():
+	f1 = lambda x, y, z: x * y + Tape_Var.exp(x)
+	f = AD(np.array([1.0, 1.0, 1.0]), np.array([1, 1, 1]), AD_Mode.TAPE).compile(f1)
+	points = np.array([[0.5, 4.2, 9.0], [1.0, 2.0, 9.0], [-1.0, 3.0, 9.0]])
+	res = f(points)
+	assert res.val == pytest.approx(points[:, 0] * points[:, 1] + np.exp(points[:, 0]))
+	assert res.der.shape == (3, 3)
+	assert res.der[:, 0] == pytest.approx(points[:, 1] + np.exp(points[:, 0]))
+	assert res.der[:, 1] == pytest.approx(points[:, 0])
+	assert res.der[:, 2] == pytest.approx(np.zeros(3))
+
+def test_tape_jac_matrix_batch():
+	f1 = lambda x, y: Tape_Var.log(x) ** Tape_Var.sin(y)
+	f2 = lambda x, y: Tape_Var.sqrt(x) / y
+	points = np.array([[4.12, 5.13], [2.0, 2.0], [1.5, 0.3]])
+	ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_Mode.TAPE)
+	values, jacobians = ad.jac_matrix_batch([f1, f2], points)
+	for i, point in enumerate(points):
+		single = AD(point, np.array([1, 1]), AD_Mode.TAPE)
+		assert values[i] == pytest.approx([single.auto_diff(f1).val, single.auto_diff(f2).val])
+		assert jacobians[i] == pytest.approx(single.jac_matrix([f1, f2]))
+
+def test_tape_jac_matrix_recorded_once():
+	f = lambda x, y: [Tape_Var.log(x) ** Tape_Var.sin(y), Tape_Var.sqrt(x) / y]
+	ad = AD(np.array([4.12, 5.13]), np.array([1, 1]), AD_Mode.TAPE)
+	assert ad.jac_matrix(f) == pytest.approx(np.array([[-0.11403015, 0.10263124], [0.048018, -0.07712832]]))
+
+@pytest.mark.parametrize("func", [
+	lambda x, y: Tape_Var.sin(x) * y + Tape_Var.sin(x) * (y * 1 + 0),
+	lambda x, y: (x * y + y * x) / 1 - 0 + x ** 1,
+	lambda x, y: Tape_Var.log(x) ** Tape_Var.sin(y) + Tape_Var.sqrt(x) / y,
+	lambda x, y: 2 ** x - (3 - y) * (x * 0) + Tape_Var.exp(y) / Tape_Var.exp(y),
+])
+def test_optimize_keeps_gradient(func):
+	tape = Tape()
+	x, y = tape.variable(1.3), tape.variable(0.7)
+	z = func(x, y)
+	adjoint = tape.gradient(z)
+	new_tape, (nx, ny), nz, stats = tape.optimize([x, y], z)
+	new_adjoint = new_tape.gradient(nz)
+	assert stats['after'] == len(new_tape) <= stats['before']
+	assert nz.value == pytest.approx(z.value)
+	assert new_adjoint[nx.index] == pytest.approx(adjoint[x.index])
+	assert new_adjoint[ny.index] == pytest.approx(adjoint[y.index])
+
+def test_optimize_folds_constants():
+	tape = Tape()
+	x = tape.variable(2.0)
+	a, b = tape.constant(2.0), tape.constant(3.0)
+	z = Tape_Var.exp(a * b) + x * b - x * 3
+	new_tape, (x,), z, stats = tape.optimize([x], z)
+	assert stats['folded'] == 4 # exp(a * b) is one constant, x * b becomes x * 3
+	assert stats['cse'] == 1
+	assert list(new_tape.ops[:len(new_tape)]) == [Tape_Op.INPUT, Tape_Op.MUL_C, Tape_Op.ADD_C, Tape_Op.SUB]
+	assert z.value == pytest.approx(np.exp(6.0))
+	assert new_tape.gradient(z)[x.index] == pytest.approx(0.0)
+
+def test_compile_optimized():
+	f = lambda x, y: Tape_Var.sin(x) * y + Tape_Var.sin(x) * y + Tape_Var.exp(x) * 0
+	ad = AD(np.array([0.5, 4.2]), np.array([1, 1]), AD_Mode.TAPE)
+	compiled = ad.compile(f, optimize=True)
+	assert compiled.stats['cse'] == 2
+	res, expected = compiled([1.5, 2.0]), ad.compile(f)([1.5, 2.0])
+	assert res.val == pytest.approx(expected.val)
+	assert res.der == pytest.approx(expected.der)
+	assert len(compiled.rows) < len(ad.compile(f).rows)
+
+def test_optimize_to_an_input():
+	# x * 1 + y * 0 simplifies to the input x, which becomes the output row
+	tape = Tape()
+	x, y = tape.variable(0.5), tape.variable(4.2)
+	new_tape, (nx, ny), nz, stats = tape.optimize([x, y], x * 1 + y * 0)
+	assert nz.index == nx.index
+	adjoint = new_tape.gradient(nz)
+	assert (adjoint[nx.index], adjoint[ny.index]) == (1.0, 0.0)
+	compiled = AD(np.array([0.5, 4.2]), np.array([1, 1]), AD_Mode.TAPE).compile(
+		lambda x, y: x * 1 + y * 0, optimize=True)
+	res = compiled(np.array([[1.0, 2.0], [3.0, 4.0]]))
+	assert list(res.val) == [1.0, 3.0]
+	assert res.der.tolist() == [[1.0, 0.0], [1.0, 0.0]]
+	# the output is the first input, y is recorded after it and still kept
+	new_tape, (nx, ny), nz, stats = tape.optimize([x, y], x)
+	assert (nz.index, len(new_tape)) == (nx.index, 2)
+	assert list(new_tape.gradient(nz)) == [1.0, 0.0]
+
+def test_optimize_divide_by_zero_constant():
+	# x / (y * 0) folds to x * inf instead of raising ZeroDivisionError
+	tape = Tape()
+	x, y = tape.variable(0.5), tape.variable(4.2)
+	with pytest.warns(RuntimeWarning):
+		z = x / (y * 0)
+		new_tape, (nx, ny), nz, stats = tape.optimize([x, y], z)
+	assert nz.value == z.value == np.inf
+	with pytest.warns(RuntimeWarning):
+		compiled = AD(np.array([0.5, 4.2]), np.array([1, 1]), AD_Mode.TAPE).compile(
+			lambda x, y: x / (y * 0), optimize=True)
+	assert compiled.stats['folded'] >= 1
+
+def test_output_is_an_input():
+	ad = AD(np.array([2.0, 3.0]), np.array([1, 1]), AD_Mode.TAPE)
+	z = ad.auto_diff(lambda x, y: x)
+	assert z.val == 2.0
+	assert list(z.der) == [1.0, 0.0]
+	jac = ad.jac_matrix(lambda x, y: [x, y, x * y])
+	assert jac.tolist() == [[1.0, 0.0], [0.0, 1.0], [3.0, 2.0]]
+
+def test_divide_by_zero_constant():
+	tape = Tape()
+	x = tape.variable(2.0)
+	with pytest.warns(RuntimeWarning):
+		z = x / 0.0
+	assert z.value == np.inf
+
+def test_compiled_output_is_an_input():
+	f = AD(np.array([2.0, 3.0]), np.array([1, 1]), AD_Mode.TAPE).compile(lambda x, y: x)
+	res = f([4.0, 5.0])
+	assert res.val == 4.0
+	assert list(res.der) == [1.0, 0.0]
+	res = f(np.array([[4.0, 5.0], [6.0, 7.0]]))
+	assert list(res.val) == [4.0, 6.0]
+	assert res.der.tolist() == [[1.0, 0.0], [1.0, 0.0]]
+
+def test_trace_numpy_ufuncs():
+	# np.sin and Var.sin on a Tape_Var record Tape_Var.sin
+	f1 = lambda x, y: np.sin(x) * y + Var.exp(y) / np.float64(2.0)
+	ad = AD(np.array([0.5, 1.5]), np.array([1, 1]), AD_Mode.TAPE)
+	expected = AD(np.array([0.5, 1.5]), np.array([1, 1]), AD_Mode.REVERSE).auto_diff(f1)
+	res = ad.auto_diff(f1)
+	assert res.val == pytest.approx(expected.val)
+	assert res.der == pytest.approx(expected.der)
+	res = ad.compile(f1)([0.5, 1.5])
+	assert res.der == pytest.approx(expected.der)
@@ -0,0 +1,50 @@
+import json
+import pytest
+import numpy as np
+from EasyDiff.rev_var import Rev_Var
+from EasyDiff.ad import AD, AD_Mode
+from EasyDiff.timeline import Timeline
+
+
+f = lambda x, y: [x * x * y, x / y]
+
+def names(timeline, cat='phase'):
+	return [event['name'] for event in timeline.to_json()['traceEvents'] if event['cat'] == cat]
+
+@pytest.mark.parametrize("mode, phases", [
+	(AD_Mode.FORWARD, ['jac_matrix', 'evaluate', 'assemble']),
+	(AD_Mode.REVERSE, ['jac_matrix', 'seed', 'record', 'prune', 'backward', 'backward']),
+	(AD_Mode.TAPE, ['jac_matrix', 'seed', 'record', 'backward', 'backward']),
+])
+def test_jac_matrix_phases(mode, phases):
+	timeline = Timeline()
+	ad = AD(np.array([1.0, 2.0]), np.array([1, 1]), mode, timeline=timeline)
+	ad.jac_matrix(f)
+	assert names(timeline) == phases
+	outer = timeline.to_json()['traceEvents'][0]
+	assert outer['args'] == {'n': 2, 'functions': 1}
+	for event in timeline.events: # every phase lies inside the jac_matrix span
+		assert outer['ts'] <= event['ts'] and event['ts'] + event['dur'] <= outer['ts'] + outer['dur'] + 1e-3
+
+def test_auto_diff_reverse_phases():
+	timeline = Timeline()
+	AD([1.0, 2.0], [1, 1], AD_Mode.REVERSE, timeline=timeline).auto_diff(lambda x, y: x * y)
+	assert names(timeline) == ['auto_diff', 'seed', 'record', 'backward', 'assemble']
+
+def test_op_events(tmp_path):
+	timeline = Timeline(ops=True)
+	AD([1.0, 2.0], [1, 1], AD_Mode.REVERSE, timeline=timeline).jac_matrix(f)
+	ops = names(timeline, 'op')
+	assert 'Rev_Var.__mul__' in ops and 'Rev_Var.__truediv__' in ops
+	assert 'Rev_Var.sweep' in ops
+	assert vars(Rev_Var)['__mul__'].__name__ == '__mul__' # unwrapped after the outermost span
+	path = tmp_path / 'trace.json'
+	timeline.save(str(path))
+	with open(str(path)) as fp:
+		trace = json.load(fp)
+	assert all(event['ph'] == 'X' for event in trace['traceEvents'])
+	assert len(trace['traceEvents']) == len(timeline.events)
+
+def test_no_timeline():
+	ad = AD(np.array([1.0, 2.0]), np.array([1, 1]), AD_Mode.REVERSE)
+	assert np.allclose(ad.jac_matrix(f), [[4.0, 1.0], [0.5, -0.25]])
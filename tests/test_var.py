@@ -170,3 +170,100 @@ def test_arctan():
 	y = 0.5
 	assert Var.arctan(x) == Var(pytest.approx(0.46364760900080615), np.array([pytest.approx(0.8)]))
 	assert Var.arctan(y) == np.arctan(y)
+
+def batched(vals, col, width=2):
+	der = np.zeros((len(vals), width))
+	der[:, col] = 1
+	return Var(np.array(vals), der)
+
+# every operator and elementary function, on a batch of values
+BATCHED_FUNCS = [
+	lambda x, y: x * y + 3 * x - y / 2,
+	lambda x, y: x ** y + y ** 2 + 2 ** x,
+	lambda x, y: 1 / x - y / x + (2 - y) * (-x),
+	lambda x, y: Var.log(x) ** Var.sin(y),
+	lambda x, y: Var.logk(x, 3.0) + Var.exp(y) + Var.expk(x, 4) + Var.logistic(y),
+	lambda x, y: Var.sqrt(x) * Var.sinh(y) + Var.cosh(x) - Var.tanh(y),
+	lambda x, y: Var.cos(x) * Var.tan(y) + Var.arctan(x),
+	lambda x, y: Var.arcsin(y / 4) + Var.arccos(y / 4),
+]
+BATCHED_XS, BATCHED_YS = [1.2, 1.5, 3.0], [0.2, 1.0, 2.5]
+
+@pytest.mark.parametrize("func", BATCHED_FUNCS)
+def test_batched_matches_scalar(func):
+	xs, ys = BATCHED_XS, BATCHED_YS
+	z = func(batched(xs, 0), batched(ys, 1))
+	assert z.val.shape == (3,)
+	assert z.der.shape == (3, 2)
+	for i in range(3):
+		expected = func(Var(xs[i], np.array([1, 0])), Var(ys[i], np.array([0, 1])))
+		assert z.val[i] == pytest.approx(expected.val)
+		assert z.der[i] == pytest.approx(expected.der)
+
+def test_numpy_ufuncs():
+	x = Var(0.5, np.array([1., 0.]))
+	y = Var(2.0, np.array([0., 1.]))
+	z = np.exp(np.sin(x)) * y - np.float64(3.0) / x
+	w = Var.exp(Var.sin(x)) * y - 3.0 / x
+	assert isinstance(z, Var)
+	assert z.val == pytest.approx(w.val)
+	assert z.der == pytest.approx(w.der)
+
+@pytest.mark.parametrize("func", [
+	lambda x, y: x * y + x / y - 2.0 / x,
+	lambda x, y: x ** y + 2 ** x - y ** 2,
+	lambda x, y: Var.logk(x, 10) + Var.expk(y, 3) + Var.log(x),
+	lambda x, y: Var.exp(x) + Var.logistic(y) + Var.sqrt(x),
+	lambda x, y: Var.sinh(x) + Var.cosh(y) + Var.tanh(x),
+	lambda x, y: Var.sin(x) + Var.cos(y) + Var.tan(x),
+	lambda x, y: Var.arcsin(x) + Var.arccos(y) + Var.arctan(x),
+])
+@pytest.mark.parametrize("batched", [False, True])
+def test_dtype_float32(func, batched):
+	vals = ([0.3, 0.4], [0.6, 0.5]) if batched else (0.3, 0.6)
+	ders = (np.array([[1, 0], [1, 0]]), np.array([[0, 1], [0, 1]])) if batched else ([1, 0], [0, 1])
+	z32 = func(*[Var(v, d, dtype=np.float32) for v, d in zip(vals, ders)])
+	z64 = func(*[Var(v, d, dtype=np.float64) for v, d in zip(vals, ders)])
+	assert np.result_type(z32.val) == np.float32
+	assert z32.der.dtype == np.float32
+	assert z64.der.dtype == np.float64
+	assert z32.der == pytest.approx(z64.der, rel=1e-5)
+
+def test_fused_kernels():
+	x = Var(1e-10, np.array([1.0, 2.0]))
+	z = Var.sinh(x)
+	assert z.val == pytest.approx(1e-10, rel=1e-12) # no cancellation between e^x and e^(-x)
+	assert z.der == pytest.approx([1.0, 2.0])
+	z = Var.tanh(Var(0.5, np.array([1.0, 0.0])))
+	assert z.der == pytest.approx([1 / np.cosh(0.5) ** 2, 0.0])
+	z = Var.logk(Var(2.0, np.array([1.0, 3.0])), 10)
+	assert z.der == pytest.approx(np.array([1.0, 3.0]) / (2.0 * np.log(10)))
+
+def test_division_negation():
+	x = Var(1.0, np.array([1.0, 0.0, 0.0]))
+	y = Var(2.0, np.array([0.0, 1.0, 0.0]))
+	w = Var(3.0, np.array([0.0, 0.0, 1.0]))
+	z = x / y - 2 / w + (3 - x) * -y + x / 4
+	assert z.val == pytest.approx(0.5 - 2 / 3.0 - 4.0 + 0.25)
+	assert z.der == pytest.approx([0.5 + 2.0 + 0.25, -0.25 - 2.0, 2 / 9.0])
+	b = Var(np.array([1.0, 2.0]), np.array([[1.0, 0.0], [1.0, 0.0]]))
+	c = Var(np.array([4.0, 8.0]), np.array([[0.0, 1.0], [0.0, 1.0]]))
+	assert (b / c).der == pytest.approx(np.array([[1 / 4.0, -1 / 16.0], [1 / 8.0, -2 / 64.0]]))
+	assert (1 / c).der == pytest.approx(np.array([[0.0, -1 / 16.0], [0.0, -1 / 64.0]]))
+
+@pytest.mark.parametrize("const", [2, 2.0, np.float64(2.0), np.float32(2.0), np.int64(2), np.array(2.0)])
+def test_constant_types(const):
+	x = Var(3.0, np.array([1.0, 0.0]))
+	for z, der in [(x + const, 1.0), (const + x, 1.0), (x - const, 1.0), (const - x, -1.0), (x * const, 2.0),
+	               (const * x, 2.0), (x / const, 0.5), (const / x, -2.0 / 9.0), (x ** const, 6.0)]:
+		assert isinstance(z, Var)
+		assert z.der == pytest.approx([der, 0.0])
+
+def test_constant_array():
+	x = Var(np.array([1.0, 2.0]), np.array([[1.0, 0.0], [1.0, 0.0]]))
+	scale = np.array([3.0, 4.0])
+	for z in (x * scale, scale * x):
+		assert isinstance(z, Var)
+		assert z.der == pytest.approx(np.array([[3.0, 0.0], [4.0, 0.0]]))
+	assert (x + scale).val == pytest.approx([4.0, 6.0])
+	assert (scale - x).der == pytest.approx(-x.der)